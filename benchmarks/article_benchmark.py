@@ -0,0 +1,376 @@
+"""
+Throughput and peak memory of the article hot paths on the data/ fixtures.
+
+Every operation runs on the bundled articles and on synthetically enlarged
+copies of them (content div repeated SCALE times), fully offline. Results
+can be saved to JSON and compared with an earlier run, regressions make the
+benchmark exit with code 1.
+
+    python3 benchmarks/article_benchmark.py [--scales 1,4] [--repeat N]
+        [--parser NAME] [--save PATH] [--compare PATH] [--threshold 0.2]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.exceptions import ContentExtractionError  # noqa: E402
+from src.parsers import CONTENT_DIV_START, PARSER_BACKENDS  # noqa: E402
+from src.wiki_article import WikiArticle  # noqa: E402
+
+
+DATA_DIR = os.path.join(ROOT, "data")
+
+# fixture name -> language of the wiki it was saved from
+FIXTURES = {
+    "Kanto": "en",
+    "pizza": "it",
+    "pythonidae": "en",
+    "monty_python": "pl",
+}
+
+_DIV_TAG = re.compile(r'<div\b|</div\s*>')
+
+_MIN_PEAK_GROWTH_KB = 64
+
+
+@dataclass
+class Fixture:
+    """
+    Article html used by the benchmark.
+    """
+    name: str
+    title: str
+    language: str
+    content: str
+
+    @property
+    def megabytes(self) -> float:
+        return len(self.content.encode("utf-8")) / 2**20
+
+
+@dataclass
+class Result:
+    """
+    Timing of one operation on one fixture.
+    seconds - median time of a single run,
+    best_seconds - fastest run,
+    peak_kb - peak memory allocated by python during one run.
+    """
+    seconds: float
+    best_seconds: float
+    pages_per_s: float
+    mb_per_s: float
+    peak_kb: float
+
+
+def enlarge_content(content: str, scale: int) -> str:
+    """
+    Repeats the inside of the content div `scale` times, so the article has
+    `scale` times more text, links and tables, with the same structure.
+    """
+
+    if scale == 1:
+        return content
+
+    match = CONTENT_DIV_START.search(content)
+    if match is None:
+        raise ValueError("content div not found")
+
+    # the pattern ends inside the opening tag, the inner html starts after it
+    start = content.index(">", match.end()) + 1
+    depth = 1
+    for tag in _DIV_TAG.finditer(content, start):
+        depth += 1 if tag.group().startswith("<div") else -1
+        if depth == 0:
+            inner = content[start:tag.start()]
+            return (content[:start] + inner * scale +
+                    content[tag.start():])
+
+    raise ValueError("content div is not closed")
+
+
+def load_fixtures(scales: list[int]) -> list[Fixture]:
+    fixtures = []
+    for name, language in FIXTURES.items():
+        with open(os.path.join(DATA_DIR, name + ".html"),
+                  encoding="utf-8") as f:
+            content = f.read()
+        for scale in scales:
+            fixtures.append(Fixture(
+                name=f"{name}@x{scale}",
+                title=name,
+                language=language,
+                content=enlarge_content(content, scale),
+            ))
+    return fixtures
+
+
+# An operation gets the fixture, parser name and a scratch directory and
+# returns a function doing the measured work once. Preparation done before
+# returning is not measured.
+Operation = Callable[[Fixture, str, str], Callable[[], object]]
+
+
+def _parsed_article(fixture: Fixture, parser: str) -> WikiArticle:
+    article = WikiArticle(
+        fixture.title, fixture.content, fixture.language, parser)
+    article.content_div
+    return article
+
+
+def _construct(fixture, parser, workdir):
+    def run():
+        article = WikiArticle(
+            fixture.title, fixture.content, fixture.language, parser)
+        # parsing is deferred until the first extraction
+        return article.content_div
+    return run
+
+
+def _method(name: str, *args) -> Operation:
+    def operation(fixture, parser, workdir):
+        method = getattr(_parsed_article(fixture, parser), name)
+        return lambda: method(*args)
+    return operation
+
+
+def _manager(argv: list[str], language: str):
+    from src.wiki_manager import WikiManager
+    from wiki_scraper import parse_arguments
+
+    manager = WikiManager(parse_arguments(argv))
+    manager.scraper.language = language
+    return manager
+
+
+def _update_json_stats(fixture, parser, workdir):
+    word_dict = _parsed_article(fixture, parser).get_word_count()
+    manager = _manager(["--count-words", fixture.title], fixture.language)
+    filename = os.path.join(workdir, "word-counts.json")
+    if os.path.exists(filename):
+        os.remove(filename)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager._update_json_stats(word_dict, filename)
+    return run
+
+
+def _analysis(fixture, parser, workdir):
+    word_dict = _parsed_article(fixture, parser).get_word_count()
+    with open(os.path.join(workdir, "word-counts.json"), "w",
+              encoding="utf-8") as f:
+        json.dump(word_dict, f)
+    manager = _manager(
+        ["--analyze-relative-word-frequency", "--mode", "article",
+         "--count", "50"], fixture.language)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.handle_relative_word_frequency_analysis()
+    return run
+
+
+OPERATIONS: dict[str, Operation] = {
+    "WikiArticle": _construct,
+    "get_summary": _method("get_summary"),
+    "get_table": _method("get_table", 1),
+    "get_word_count": _method("get_word_count"),
+    "get_linked_phrases": _method("get_linked_phrases"),
+    "_update_json_stats": _update_json_stats,
+    "relative_word_frequency_analysis": _analysis,
+}
+
+
+def measure(run: Callable[[], object], fixture: Fixture, repeat: int) -> Result:
+    """
+    Times `repeat` runs after a warm-up, then measures peak memory of one
+    more run (tracemalloc slows the code down, so it is not timed).
+    """
+
+    run()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(times)
+    return Result(
+        seconds=median,
+        best_seconds=min(times),
+        pages_per_s=1 / median,
+        mb_per_s=fixture.megabytes / median,
+        peak_kb=peak / 1024,
+    )
+
+
+def run_benchmarks(
+    fixtures: list[Fixture],
+    operations: list[str],
+    parser: str,
+    repeat: int,
+    workdir: str,
+) -> dict[str, dict[str, dict]]:
+    """
+    Returns results as {fixture: {operation: Result as dict}}. Operations
+    the fixture doesn't support (e.g. no tables) are left out.
+    """
+
+    results = {}
+    for fixture in fixtures:
+        results[fixture.name] = {}
+        for name in operations:
+            try:
+                run = OPERATIONS[name](fixture, parser, workdir)
+                run()
+            except ContentExtractionError as e:
+                print(f"{fixture.name:<18}{name:<34}skipped: {e}")
+                continue
+
+            result = measure(run, fixture, repeat)
+            results[fixture.name][name] = asdict(result)
+            print(
+                f"{fixture.name:<18}{name:<34}"
+                f"{result.seconds * 1000:>9.2f} ms"
+                f"{result.pages_per_s:>10.1f} pages/s"
+                f"{result.mb_per_s:>9.2f} MB/s"
+                f"{result.peak_kb / 1024:>9.2f} MB peak"
+            )
+    return results
+
+
+def find_regressions(
+    results: dict[str, dict[str, dict]],
+    baseline: dict[str, dict[str, dict]],
+    threshold: float = 0.2,
+) -> list[str]:
+    """
+    Compares results with a baseline run, returns descriptions of
+    operations that got slower or use more memory by more than threshold
+    (0.2 = 20%). Fastest runs are compared, as they are the least noisy,
+    and memory growth under _MIN_PEAK_GROWTH_KB is ignored. Operations
+    missing in either run are not compared.
+    """
+
+    regressions = []
+    for fixture, operations in results.items():
+        for name, result in operations.items():
+            old = baseline.get(fixture, {}).get(name)
+            if old is None:
+                continue
+            for key, unit in (("best_seconds", "s"), ("peak_kb", "KB")):
+                if result[key] <= old[key] * (1 + threshold):
+                    continue
+                if key == "peak_kb" and \
+                        result[key] - old[key] < _MIN_PEAK_GROWTH_KB:
+                    continue
+                regressions.append(
+                    f"{fixture} {name}: {key} {old[key]:.4g} {unit} -> "
+                    f"{result[key]:.4g} {unit} "
+                    f"(+{result[key] / old[key] - 1:.0%})"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", default="1,4",
+                        help="Comma separated enlargement factors "
+                        "(default: 1,4).")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Timed runs per operation (default: 5).")
+    parser.add_argument("--parser", default="html.parser",
+                        choices=list(PARSER_BACKENDS),
+                        help="Parser backend of the articles.")
+    parser.add_argument("--operations", default=",".join(OPERATIONS),
+                        help="Comma separated operations to run: " +
+                        ", ".join(OPERATIONS))
+    parser.add_argument("--save", metavar="PATH",
+                        help="Save results to a JSON file.")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="Compare with results saved by --save.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown before a regression is "
+                        "reported (default: 0.2 = 20%%).")
+    args = parser.parse_args(argv)
+
+    try:
+        scales = [int(scale) for scale in args.scales.split(",")]
+    except ValueError:
+        parser.error("--scales must be comma separated integers")
+    if any(scale < 1 for scale in scales):
+        parser.error("--scales must be greater or equal to 1")
+
+    operations = args.operations.split(",")
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        parser.error("unknown operations: " + ", ".join(sorted(unknown)))
+
+    fixtures = load_fixtures(scales)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # the analysis reads word counts from the working directory
+        os.chdir(workdir)
+        try:
+            results = run_benchmarks(
+                fixtures, operations, args.parser, args.repeat, workdir)
+        finally:
+            os.chdir(cwd)
+
+    if args.save:
+        data = {
+            "meta": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "parser": args.parser,
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+        print(f"Results saved to '{args.save}'.")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"]["parser"] != args.parser:
+            print(f"Warning: baseline was measured with "
+                  f"'{baseline['meta']['parser']}' parser.")
+        regressions = find_regressions(
+            results, baseline["results"], args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print("  " + regression)
+            return 1
+        print("\nNo regressions.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Size and decode time of stored pages for every compression setting.
+
+Every data/ fixture is compressed with each codec and level, then decoded
+the way the HTTP cache reads it (streaming into a utf-8 decoder). zstd
+settings are measured only when the 'zstandard' package is installed, the
+dictionary setting uses a dictionary trained on the other fixtures, so it
+never has seen the page it compresses.
+
+    python3 benchmarks/compression_benchmark.py [--repeat N] [--save PATH]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.compression import (  # noqa: E402
+    Compression,
+    train_dictionary,
+    zstd_available,
+)
+
+
+DATA_DIR = os.path.join(ROOT, "data")
+FIXTURES = ["Kanto", "pizza", "pythonidae", "monty_python"]
+
+# (codec, level, with dictionary)
+SETTINGS = [
+    ("none", None, False),
+    ("gzip", 1, False),
+    ("gzip", 6, False),
+    ("gzip", 9, False),
+    ("zstd", 1, False),
+    ("zstd", 3, False),
+    ("zstd", 9, False),
+    ("zstd", 19, False),
+    ("zstd", 3, True),
+]
+
+
+@dataclass
+class Result:
+    """
+    Totals of one setting over all fixtures.
+    ratio - original size / stored size,
+    compress_ms, decode_ms - median time of compressing or decoding all
+    fixtures once.
+    """
+    stored_bytes: int
+    ratio: float
+    compress_ms: float
+    decode_ms: float
+    decode_mb_per_s: float
+
+
+def setting_name(codec: str, level: int | None, dictionary: bool) -> str:
+    name = codec if level is None else f"{codec}-{level}"
+    return name + "+dict" if dictionary else name
+
+
+def load_pages() -> dict[str, bytes]:
+    pages = {}
+    for name in FIXTURES:
+        with open(os.path.join(DATA_DIR, name + ".html"), "rb") as f:
+            pages[name] = f.read()
+    return pages
+
+
+def _median_ms(run, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def measure(
+    compressions: dict[str, Compression],
+    pages: dict[str, bytes],
+    repeat: int,
+) -> Result:
+    """
+    Measures one setting, `compressions` maps every fixture to the
+    compression used for it.
+    """
+
+    stored = {name: compressions[name].compress(page)
+              for name, page in pages.items()}
+    for name, data in stored.items():
+        text = compressions[name].read_text(io.BytesIO(data))
+        if text.encode("utf-8") != pages[name]:
+            raise AssertionError(f"{name} doesn't survive a round trip")
+
+    def compress():
+        for name, page in pages.items():
+            compressions[name].compress(page)
+
+    def decode():
+        for name, data in stored.items():
+            compressions[name].read_text(io.BytesIO(data))
+
+    original = sum(len(page) for page in pages.values())
+    stored_bytes = sum(len(data) for data in stored.values())
+    decode_ms = _median_ms(decode, repeat)
+    return Result(
+        stored_bytes=stored_bytes,
+        ratio=original / stored_bytes,
+        compress_ms=_median_ms(compress, repeat),
+        decode_ms=decode_ms,
+        decode_mb_per_s=original / 2**20 / (decode_ms / 1000),
+    )
+
+
+def _compressions(codec, level, dictionary, pages) -> dict[str, Compression]:
+    if not dictionary:
+        compression = Compression(codec, level)
+        return {name: compression for name in pages}
+    # leave-one-out: the dictionary of a page is trained on the others
+    return {
+        name: Compression(codec, level, train_dictionary(
+            [page for other, page in pages.items() if other != name]))
+        for name in pages
+    }
+
+
+def run_benchmarks(
+    pages: dict[str, bytes],
+    settings: list[tuple[str, int | None, bool]],
+    repeat: int,
+) -> dict[str, dict]:
+    """
+    Returns {setting name: Result as dict}, zstd settings are skipped
+    when zstd is not available.
+    """
+
+    original = sum(len(page) for page in pages.values())
+    print(f"{len(pages)} pages, {original / 1024:.0f} KB\n")
+    print(f"{'setting':<14}{'stored':>12}{'ratio':>8}"
+          f"{'compress':>13}{'decode':>13}{'decode':>13}")
+
+    results = {}
+    for codec, level, dictionary in settings:
+        name = setting_name(codec, level, dictionary)
+        if codec == "zstd" and not zstd_available():
+            print(f"{name:<14}skipped: zstandard is not installed")
+            continue
+
+        result = measure(
+            _compressions(codec, level, dictionary, pages), pages, repeat)
+        results[name] = asdict(result)
+        print(
+            f"{name:<14}"
+            f"{result.stored_bytes / 1024:>9.1f} KB"
+            f"{result.ratio:>8.2f}"
+            f"{result.compress_ms:>10.2f} ms"
+            f"{result.decode_ms:>10.2f} ms"
+            f"{result.decode_mb_per_s:>8.0f} MB/s"
+        )
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Timed runs per setting (default: 5).")
+    parser.add_argument("--save", metavar="PATH",
+                        help="Save results to a JSON file.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(load_pages(), SETTINGS, args.repeat)
+
+    if args.save:
+        data = {
+            "meta": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+        print(f"Results saved to '{args.save}'.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
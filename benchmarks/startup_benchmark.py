@@ -0,0 +1,194 @@
+"""
+Startup cost of wiki_scraper.py per mode, measured with `python -X importtime`.
+
+Every mode runs in a fresh interpreter against local copies of the data/
+articles, so no network is needed. Reported times exclude imports done by
+a bare interpreter (site, encodings, ...). The benchmark fails (exit code 1)
+when a mode imports a module it must not need, or when its import time
+exceeds the budget.
+
+    python3 benchmarks/startup_benchmark.py [--repeat N] [--scale X] [MODE ...]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "data")
+
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "wordfreq")
+PARSER_MODULES = ("requests", "bs4", "lxml")
+
+
+@dataclass
+class Mode:
+    """
+    Command line of one mode, its import time budget in milliseconds and
+    modules that must stay unimported.
+    """
+    argv: list[str]
+    budget_ms: float
+    forbidden: tuple[str, ...] = ()
+
+
+MODES = {
+    "help": Mode(["--help"], 60, HEAVY_MODULES + PARSER_MODULES),
+    "argument-error": Mode(
+        ["--table", "Kanto"], 60, HEAVY_MODULES + PARSER_MODULES),
+    "summary": Mode(["--summary", "Kanto"], 350, HEAVY_MODULES),
+    "count-words": Mode(["--count-words", "Kanto"], 350, HEAVY_MODULES),
+    "table": Mode(
+        ["--table", "Kanto", "--number", "1"], 1000,
+        ("matplotlib", "wordfreq")),
+    "analysis": Mode(
+        ["--analyze-relative-word-frequency", "--mode", "article",
+         "--count", "5"], 1100, ("matplotlib",)),
+    "chart": Mode(
+        ["--analyze-relative-word-frequency", "--mode", "article",
+         "--count", "5", "--chart", "chart.png"], 2000),
+}
+
+# Runs the same code path as `python3 wiki_scraper.py ARGV`, only reading
+# articles from the working directory instead of the network.
+_DRIVER = """
+import sys
+sys.path.insert(0, {root!r})
+import wiki_scraper
+args = wiki_scraper.parse_arguments({argv!r})
+from src.wiki_manager import WikiManager
+WikiManager(args, use_local_html_files_instead=True).handle_args()
+"""
+
+
+@dataclass
+class Measurement:
+    """
+    Import statistics of a single interpreter run.
+    """
+    total_ms: float
+    modules: set[str]
+
+
+def parse_importtime(output: str) -> Measurement:
+    """
+    Sums self times of all imports reported by `-X importtime`.
+    """
+
+    total_us = 0
+    modules = set()
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        total_us += int(fields[0])
+        modules.add(fields[2].strip())
+
+    return Measurement(total_ms=total_us / 1000, modules=modules)
+
+
+def _prepare_workdir(workdir: str) -> None:
+    for name in os.listdir(DATA_DIR):
+        if name.endswith(".html"):
+            shutil.copy(os.path.join(DATA_DIR, name), workdir)
+
+    with open(os.path.join(workdir, "word-counts.json"), "w",
+              encoding="utf-8") as f:
+        json.dump({"kanto": 12, "region": 7, "pokémon": 5, "the": 40}, f)
+
+
+def _run_importtime(code: str, workdir: str) -> Measurement:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=workdir, capture_output=True, text=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure_mode(name: str, workdir: str | None = None) -> Measurement:
+    """
+    Runs the mode once in a fresh interpreter and returns its imports.
+    """
+
+    if workdir is None:
+        with tempfile.TemporaryDirectory() as tmp:
+            _prepare_workdir(tmp)
+            return measure_mode(name, tmp)
+
+    driver = _DRIVER.format(root=ROOT, argv=MODES[name].argv)
+    return _run_importtime(driver, workdir)
+
+
+def imported_forbidden(name: str, measurement: Measurement) -> list[str]:
+    """
+    Returns forbidden top-level packages imported by the mode.
+    """
+    packages = {module.split(".")[0] for module in measurement.modules}
+    return sorted(set(MODES[name].forbidden) & packages)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("modes", nargs="*", metavar="MODE",
+                        help="Modes to measure (default: all): " +
+                        ", ".join(MODES))
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Runs per mode, the fastest one is reported.")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiplies every budget, for slower machines.")
+    parser.add_argument("--json", metavar="PATH",
+                        help="Also save results to a JSON file.")
+    args = parser.parse_args(argv)
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error("unknown modes: " + ", ".join(sorted(unknown)))
+
+    failed = False
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        _prepare_workdir(workdir)
+        baseline = min(
+            _run_importtime("pass", workdir).total_ms
+            for _ in range(args.repeat)
+        )
+
+        for name in args.modes or MODES:
+            runs = [measure_mode(name, workdir) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run.total_ms)
+            import_ms = best.total_ms - baseline
+            budget = MODES[name].budget_ms * args.scale
+            forbidden = imported_forbidden(name, best)
+
+            status = "ok"
+            if forbidden:
+                status = "FAIL imports " + ", ".join(forbidden)
+            elif import_ms > budget:
+                status = "FAIL over budget"
+            failed = failed or status != "ok"
+
+            print(f"{name:<16}{import_ms:>9.1f} ms  (budget "
+                  f"{budget:.0f} ms, {len(best.modules)} modules)  {status}")
+            results[name] = {
+                "import_ms": round(import_ms, 1),
+                "budget_ms": budget,
+                "modules": len(best.modules),
+                "forbidden_imported": forbidden,
+            }
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Memory, load, merge and flush time of word counts kept in a dict and in
+WordCounts.
+
+A synthetic vocabulary of random words with Zipf-like counts is built
+in both structures while tracemalloc measures the memory they keep, the
+words are generated during the build so the dict pays for its own
+strings. The totals are written to a JSON counts file and loaded back,
+the same articles (word samples favouring frequent words) are merged
+into both, the totals are exported to pandas and batches of articles
+are flushed to the file like the JSON counts store does.
+
+    python3 benchmarks/word_counts_benchmark.py [--words N] [--save PATH]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass
+from typing import Iterator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.counts_store import (  # noqa: E402
+    DEFAULT_BATCH_SIZE,
+    JsonCountsStore,
+    write_counts,
+)
+from src.word_counts import WordCounts  # noqa: E402
+
+
+DEFAULT_WORDS = 1_000_000
+ARTICLES = 200
+ARTICLE_WORDS = 2000
+# flushes of DEFAULT_BATCH_SIZE articles measured
+FLUSHES = 3
+
+
+@dataclass
+class Result:
+    """
+    Measurements of one structure.
+    bytes_per_word - memory kept after the build divided by words,
+    load_ms - time of reading the JSON counts file of the vocabulary,
+    merge_ms - time of merging every article's counts,
+    flush_ms - mean time of a JSON counts store flush of a batch,
+    export_ms - time of building a pandas Series of the totals.
+    """
+    kept_mb: float
+    bytes_per_word: float
+    load_ms: float
+    merge_ms: float
+    flush_ms: float
+    export_ms: float
+
+
+def synthetic_pairs(words: int, seed: int = 0) -> Iterator[tuple[str, int]]:
+    """
+    Yields `words` distinct random words (3 to 14 letters) with counts
+    falling like in natural text, the most frequent first.
+    """
+
+    rng = random.Random(seed)
+    seen = set()
+    while len(seen) < words:
+        word = "".join(rng.choices(string.ascii_lowercase,
+                                   k=rng.randint(3, 14)))
+        if word in seen:
+            continue
+        seen.add(word)
+        yield word, max(1, 1_000_000 // (len(seen)))
+
+
+def synthetic_articles(
+    vocabulary: list[str],
+    articles: int = ARTICLES,
+    article_words: int = ARTICLE_WORDS,
+    seed: int = 0,
+) -> list[dict[str, int]]:
+    rng = random.Random(seed)
+    # every other word of an article is one of the 1% most frequent
+    common = vocabulary[:max(1, len(vocabulary) // 100)]
+    return [
+        Counter(rng.choice(common) if i % 2 else rng.choice(vocabulary)
+                for i in range(article_words))
+        for _ in range(articles)
+    ]
+
+
+def _build_dict(pairs) -> dict[str, int]:
+    return dict(pairs)
+
+
+def _merge_dict(totals: dict[str, int], word_dict: dict[str, int]) -> None:
+    # the loop JsonCountsStore used before WordCounts
+    for word, count in word_dict.items():
+        totals[word] = totals.get(word, 0) + count
+
+
+def _export_dict(totals: dict[str, int]):
+    import pandas as pd
+    return pd.Series(totals, name="count")
+
+
+def _load_dict(path: str) -> dict[str, int]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _flush_dict(path: str, batches: list[list[dict[str, int]]]) -> None:
+    # the store before WordCounts read the file again on every flush
+    for batch in batches:
+        totals = _load_dict(path)
+        for word_dict in batch:
+            _merge_dict(totals, word_dict)
+        write_counts(path, totals.items())
+
+
+def _flush_word_counts(
+    path: str,
+    batches: list[list[dict[str, int]]],
+) -> None:
+    with redirect_stdout(io.StringIO()):
+        store = JsonCountsStore(path, batch_size=len(batches[0]))
+        for batch in batches:
+            for word_dict in batch:
+                store.add(word_dict)
+
+
+STRUCTURES = {
+    "dict": (_build_dict, _load_dict, _merge_dict, _flush_dict,
+             _export_dict),
+    "WordCounts": (WordCounts, WordCounts.read_json, WordCounts.update,
+                   _flush_word_counts, WordCounts.to_pandas),
+}
+
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(
+    name: str,
+    words: int,
+    articles: list[dict[str, int]],
+    directory: str,
+) -> Result:
+    build, load, merge, flush, export = STRUCTURES[name]
+
+    tracemalloc.start()
+    totals = build(synthetic_pairs(words))
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    path = os.path.join(directory, f"{name}.json")
+    write_counts(path, totals.items())
+    start = time.perf_counter()
+    load(path)
+    load_ms = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    for word_dict in articles:
+        merge(totals, word_dict)
+    merge_ms = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    export(totals)
+    export_ms = _elapsed_ms(start)
+
+    batches = [articles[i:i + DEFAULT_BATCH_SIZE] for i in range(
+        0, min(len(articles), FLUSHES * DEFAULT_BATCH_SIZE),
+        DEFAULT_BATCH_SIZE)]
+    start = time.perf_counter()
+    flush(path, batches)
+    flush_ms = _elapsed_ms(start) / len(batches)
+
+    return Result(
+        kept_mb=kept / 2**20,
+        bytes_per_word=kept / words,
+        load_ms=load_ms,
+        merge_ms=merge_ms,
+        flush_ms=flush_ms,
+        export_ms=export_ms,
+    )
+
+
+def run_benchmarks(words: int, articles: int = ARTICLES) -> dict[str, dict]:
+    vocabulary = [word for word, _ in synthetic_pairs(words)]
+    article_counts = synthetic_articles(vocabulary, articles)
+    del vocabulary
+
+    print(f"{words} words, {articles} articles of {ARTICLE_WORDS} words\n")
+    print(f"{'structure':<12}{'kept':>12}{'per word':>12}{'load':>12}"
+          f"{'merge':>12}{'flush':>12}{'export':>12}")
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="word-counts-") as directory:
+        for name in STRUCTURES:
+            result = measure(name, words, article_counts, directory)
+            results[name] = asdict(result)
+            print(
+                f"{name:<12}"
+                f"{result.kept_mb:>9.1f} MB"
+                f"{result.bytes_per_word:>10.1f} B"
+                f"{result.load_ms:>9.1f} ms"
+                f"{result.merge_ms:>9.1f} ms"
+                f"{result.flush_ms:>9.1f} ms"
+                f"{result.export_ms:>9.1f} ms"
+            )
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--words", type=int, default=DEFAULT_WORDS,
+                        help=f"Vocabulary size (default: {DEFAULT_WORDS}).")
+    parser.add_argument("--save", metavar="PATH",
+                        help="Save results to a JSON file.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.words)
+
+    if args.save:
+        data = {
+            "meta": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "words": args.words,
+            },
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+        print(f"Results saved to '{args.save}'.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import json
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+from .tables import ALL_TABLES, parse_table_numbers
+
+
+BATCH_MODES = ("summary", "table", "count-words")
+
+
+@dataclass
+class BatchJob:
+    """
+    Single line of the batch input: what to do with which phrase.
+    """
+    mode: str
+    phrase: str
+    number: int | list[int] | str | None = None
+    first_row_is_header: bool = False
+    # line of the batch input, set by read_batch_jobs
+    line_number: int | None = None
+
+
+def _check_table_number(number):
+    """
+    Validates 'number' of a table job, strings are parsed like --number.
+    """
+
+    if isinstance(number, str):
+        try:
+            number = parse_table_numbers(number)
+        except ValueError:
+            number = None
+    if number == ALL_TABLES:
+        return number
+
+    indexes = number if isinstance(number, list) else [number]
+    if not indexes or not all(
+            isinstance(index, int) and index >= 1 for index in indexes):
+        raise ValueError(
+            "table mode needs 'number' greater or equal to 1, " +
+            "a list of them or 'all'"
+        )
+    return number
+
+
+def parse_batch_line(
+    line: str,
+    default_mode: str,
+    default_number: int | list[int] | str | None = None
+) -> BatchJob | None:
+    """
+    Parses one line of batch input. A line is either a plain phrase
+    (handled in default_mode) or a JSON object with 'phrase' and optional
+    'mode', 'number' and 'first_row_is_header' keys. 'number' is a table
+    index, a list of them, or a string accepted by --number (e.g. "1,3"
+    or "all"), table jobs without it use default_number.
+    Returns None for empty lines, raises ValueError for invalid ones.
+    """
+
+    line = line.strip()
+    if not line:
+        return None
+
+    if not line.startswith("{"):
+        job = BatchJob(mode=default_mode, phrase=line)
+    else:
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON ({e})")
+        if not isinstance(data.get("phrase"), str) or not data["phrase"]:
+            raise ValueError("'phrase' is required")
+
+        job = BatchJob(
+            mode=data.get("mode", default_mode),
+            phrase=data["phrase"],
+            number=data.get("number"),
+            first_row_is_header=bool(data.get("first_row_is_header", False)),
+        )
+
+    if job.mode not in BATCH_MODES:
+        raise ValueError(
+            f"unknown mode '{job.mode}', valid modes are " +
+            ", ".join(BATCH_MODES)
+        )
+
+    if job.mode == "table":
+        if job.number is None:
+            job.number = default_number
+        job.number = _check_table_number(job.number)
+
+    return job
+
+
+def read_batch_jobs(
+    lines: Iterable[str],
+    default_mode: str = "summary",
+    default_number: int | list[int] | str | None = None
+) -> Iterator[BatchJob]:
+    """
+    Lazily parses batch input, invalid lines are reported and skipped.
+    """
+
+    for line_number, line in enumerate(lines, start=1):
+        try:
+            job = parse_batch_line(line, default_mode, default_number)
+        except ValueError as e:
+            print(f"Error. Skipping batch line {line_number}: {e}.")
+            continue
+        if job is not None:
+            job.line_number = line_number
+            yield job
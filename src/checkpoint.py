@@ -0,0 +1,152 @@
+import gzip
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from .titles import canonical_title
+from .visited import VisitedSet, dump_visited, load_visited
+
+
+DEFAULT_CHECKPOINT_PATH = "./crawl-checkpoint.json.gz"
+_VERSION = 2
+
+
+@dataclass
+class CrawlState:
+    """
+    State of the breadth-first crawl needed to continue it later. Titles
+    of a depth are visited in chunks, only the chunk in flight is kept
+    here, the rest stays in files of the crawl directory.
+    level_path - name of the file with titles of the current depth, None
+    at depth 0, which has only the start phrase,
+    level_offset - number of titles of the depth already taken in chunks,
+    level - resolved phrases of the chunk in flight, in visiting order,
+    level_start - position of the first of them in the depth,
+    visited - canonical titles of every phrase already queued (up to the
+    current level), a set or one of the compact sets of src.visited,
+    committed - phrases of the chunk whose counts are already saved,
+    frontier_runs - names and sizes of runs holding links found on the
+    committed pages of the depth (see Frontier),
+    mailbox - state of the link exchange of a sharded crawl,
+    pages - number of pages in the finished chunks.
+    """
+    start_phrase: str
+    max_depth: int
+    depth: int = 0
+    level_path: str | None = None
+    level_offset: int = 0
+    level: list[str] = field(default_factory=list)
+    level_start: int = 0
+    visited: VisitedSet = field(default_factory=set)
+    committed: set[str] = field(default_factory=set)
+    frontier_runs: list[tuple[str, int]] = field(default_factory=list)
+    mailbox: dict | None = None
+    pages: int = 0
+
+    @classmethod
+    def start(
+        cls,
+        start_phrase: str,
+        max_depth: int,
+        visited: VisitedSet | None = None,
+    ) -> "CrawlState":
+        visited = visited if visited is not None else set()
+        visited.add(canonical_title(start_phrase))
+        return cls(
+            start_phrase=start_phrase,
+            max_depth=max_depth,
+            visited=visited,
+        )
+
+
+def crawl_directory(path: str) -> str:
+    """
+    Returns the directory with level files and frontier runs of the crawl
+    checkpointed to the path.
+    """
+    return path + ".d"
+
+
+def save_checkpoint(state: CrawlState, path: str) -> None:
+    """
+    Atomically replaces the checkpoint file with the given state.
+    """
+
+    data = {
+        "version": _VERSION,
+        "start_phrase": state.start_phrase,
+        "max_depth": state.max_depth,
+        "depth": state.depth,
+        "level_path": state.level_path,
+        "level_offset": state.level_offset,
+        "level": state.level,
+        "level_start": state.level_start,
+        "visited": dump_visited(state.visited),
+        "committed": sorted(state.committed),
+        "frontier_runs": state.frontier_runs,
+        "mailbox": state.mailbox,
+        "pages": state.pages,
+    }
+
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _titles(value) -> list[str]:
+    if not isinstance(value, list) or \
+            not all(isinstance(title, str) for title in value):
+        raise TypeError("expected a list of titles")
+    return value
+
+
+def load_checkpoint(path: str) -> CrawlState:
+    """
+    Reads crawl state saved by save_checkpoint.
+    Raises ValueError if the file is not a valid checkpoint.
+    """
+
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, EOFError, json.JSONDecodeError) as e:
+        raise ValueError(f"Can't read checkpoint '{path}': {e}")
+
+    if not isinstance(data, dict) or data.get("version") != _VERSION:
+        raise ValueError(f"Unsupported checkpoint version in '{path}'.")
+
+    try:
+        level_path = data["level_path"]
+        mailbox = data["mailbox"]
+        if not (level_path is None or isinstance(level_path, str)) or \
+                not (mailbox is None or isinstance(mailbox, dict)):
+            raise TypeError("level_path or mailbox of a wrong type")
+        return CrawlState(
+            start_phrase=str(data["start_phrase"]),
+            max_depth=int(data["max_depth"]),
+            depth=int(data["depth"]),
+            level_path=level_path,
+            level_offset=int(data["level_offset"]),
+            level=_titles(data["level"]),
+            level_start=int(data["level_start"]),
+            visited=load_visited(data["visited"]),
+            committed=set(_titles(data["committed"])),
+            frontier_runs=[(str(name), int(count))
+                           for name, count in data["frontier_runs"]],
+            mailbox=mailbox,
+            pages=int(data["pages"]),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Checkpoint '{path}' is corrupted: {e}")
+
+
+def remove_checkpoint(path: str) -> None:
+    """
+    Removes checkpoint of a finished crawl together with its directory.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    shutil.rmtree(crawl_directory(path), ignore_errors=True)
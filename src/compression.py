@@ -0,0 +1,231 @@
+import argparse
+import codecs
+import gzip
+import importlib.util
+import zlib
+from typing import BinaryIO, Iterable, Iterator
+
+
+# Stored pages are compressed with zstd when the optional 'zstandard'
+# package is installed and with gzip otherwise. Every compressed body
+# starts with the magic of its format, so readers need no settings except
+# the zstd dictionary, and bodies stored before compression was enabled
+# (plain utf-8, which can't start with either magic) are still readable.
+
+CODECS = ("auto", "zstd", "gzip", "none")
+DEFAULT_LEVELS = {"zstd": 3, "gzip": 6, "none": 0}
+LEVEL_RANGES = {"zstd": (1, 22), "gzip": (0, 9), "none": (0, 0)}
+
+# default size of a trained dictionary, the same as the zstd CLI uses
+DEFAULT_DICT_SIZE = 112640
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_GZIP_MAGIC = b"\x1f\x8b"
+
+_CHUNK_SIZE = 1 << 16
+# pages are split into samples of this size for dictionary training,
+# the trainer needs many small samples rather than a few large pages
+_SAMPLE_SIZE = 1 << 13
+
+
+def zstd_available() -> bool:
+    return importlib.util.find_spec("zstandard") is not None
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError(
+            "zstd needs the 'zstandard' package (pip install zstandard).")
+    return zstandard
+
+
+def _errors(codec: str) -> tuple[type[Exception], ...]:
+    """
+    Returns exceptions raised by decompression of a corrupted body.
+    """
+
+    if codec == "zstd":
+        return (_zstd().ZstdError,)
+    return (OSError, EOFError, zlib.error)
+
+
+def resolve_codec(codec: str) -> str:
+    """
+    Returns codec used for 'auto': zstd if available, gzip otherwise.
+    """
+
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression '{codec}'.")
+    if codec == "auto":
+        return "zstd" if zstd_available() else "gzip"
+    return codec
+
+
+def detect_codec(data: bytes) -> str:
+    """
+    Returns codec of the stored body by its first bytes.
+    """
+
+    if data[:4] == _ZSTD_MAGIC:
+        return "zstd"
+    if data[:2] == _GZIP_MAGIC:
+        return "gzip"
+    return "none"
+
+
+class Compression:
+    """
+    Represents settings used to compress stored pages: codec, its level
+    and an optional zstd dictionary trained on similar pages. Bodies are
+    decompressed according to their own format, whatever the codec is.
+    """
+
+    def __init__(
+        self,
+        codec: str = "auto",
+        level: int | None = None,
+        dictionary: bytes | None = None,
+    ):
+        self.codec = resolve_codec(codec)
+        self.level = DEFAULT_LEVELS[self.codec] if level is None else level
+        low, high = LEVEL_RANGES[self.codec]
+        if not low <= self.level <= high:
+            raise ValueError(
+                f"Level of {self.codec} must be between {low} and {high}.")
+        if dictionary is not None and self.codec != "zstd":
+            raise ValueError("Compression dictionaries need zstd.")
+        self.dictionary = dictionary
+        self._zstd_dict = None
+
+    def _dict_data(self):
+        if self.dictionary is None:
+            return None
+        if self._zstd_dict is None:
+            self._zstd_dict = _zstd().ZstdCompressionDict(self.dictionary)
+        return self._zstd_dict
+
+    def compress(self, data: bytes) -> bytes:
+        if self.codec == "gzip":
+            # mtime=0 keeps the output the same for the same page
+            return gzip.compress(data, compresslevel=self.level, mtime=0)
+        if self.codec == "zstd":
+            # zstd compressors can't be shared between threads
+            return _zstd().ZstdCompressor(
+                level=self.level, dict_data=self._dict_data()).compress(data)
+        return bytes(data)
+
+    def _decompressor(self, codec: str):
+        if codec == "gzip":
+            return zlib.decompressobj(wbits=31)
+        if codec == "zstd":
+            return _zstd().ZstdDecompressor(
+                dict_data=self._dict_data()).decompressobj()
+        return None
+
+    def iter_decompressed(self, file: BinaryIO) -> Iterator[bytes]:
+        """
+        Yields decompressed data of the body read from the file chunk by
+        chunk. Raises ValueError if the body is corrupted or truncated.
+        """
+
+        chunk = file.read(_CHUNK_SIZE)
+        codec = detect_codec(chunk)
+        decompressor = self._decompressor(codec)
+        try:
+            while chunk:
+                yield decompressor.decompress(chunk) if decompressor \
+                    else chunk
+                chunk = file.read(_CHUNK_SIZE)
+        except _errors(codec) as e:
+            raise ValueError(f"Corrupted compressed data: {e}")
+        if decompressor is not None and not decompressor.eof:
+            raise ValueError("Compressed data is truncated.")
+
+    def read_text(self, file: BinaryIO) -> str:
+        """
+        Returns utf-8 text of the body, decoding it while it is being
+        decompressed, so the whole decompressed body is never kept as bytes.
+        """
+
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        parts = [decoder.decode(chunk)
+                 for chunk in self.iter_decompressed(file)]
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts)
+
+    def decompress(self, data: bytes) -> bytes:
+        codec = detect_codec(data)
+        try:
+            if codec == "gzip":
+                return gzip.decompress(data)
+            if codec == "zstd":
+                return _zstd().ZstdDecompressor(
+                    dict_data=self._dict_data()).decompress(data)
+        except _errors(codec) as e:
+            raise ValueError(f"Corrupted compressed data: {e}")
+        return bytes(data)
+
+
+def train_dictionary(
+    pages: Iterable[bytes],
+    size: int = DEFAULT_DICT_SIZE,
+) -> bytes:
+    """
+    Returns zstd dictionary of at most `size` bytes trained on the pages.
+    Raises ValueError if zstd is not available or there are too few pages.
+    """
+
+    zstandard = _zstd()
+    samples = [page[i:i + _SAMPLE_SIZE]
+               for page in pages
+               for i in range(0, len(page), _SAMPLE_SIZE)]
+    try:
+        return zstandard.train_dictionary(size, samples).as_bytes()
+    except zstandard.ZstdError as e:
+        raise ValueError(f"Can't train dictionary: {e}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    from .corpus import cache_articles, directory_articles
+
+    parser = argparse.ArgumentParser(
+        description="Trains a zstd dictionary for compressing stored pages "
+                    "(--cache-dictionary, python -m src.corpus --dictionary).")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--from-dir", metavar="PATH",
+        help="Directory with one '<phrase>.html' file per article.")
+    source.add_argument(
+        "--from-cache", metavar="PATH",
+        help="HTTP cache directory (--cache-dir) of earlier runs.")
+    parser.add_argument(
+        "--size", type=int, default=DEFAULT_DICT_SIZE, metavar="BYTES",
+        help=f"Maximal size of the dictionary (default: {DEFAULT_DICT_SIZE}).")
+    parser.add_argument(
+        "--output", required=True, metavar="PATH",
+        help="Path of the dictionary file.")
+    args = parser.parse_args(argv)
+
+    if args.from_dir:
+        articles = directory_articles(args.from_dir)
+    else:
+        articles = cache_articles(args.from_cache, prefix="/")
+
+    try:
+        pages = [content.encode("utf-8") for _, content in articles]
+        dictionary = train_dictionary(pages, args.size)
+        with open(args.output, "wb") as f:
+            f.write(dictionary)
+    except (ValueError, OSError) as e:
+        print(f"Error. Can't build dictionary: {e}")
+        return 1
+
+    print(f"Trained {len(dictionary)} byte dictionary on {len(pages)} "
+          f"pages into '{args.output}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,393 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Iterator
+from urllib.parse import urlsplit
+from .compression import Compression, zstd_available
+from .titles import canonical_title
+
+
+# Layout of a packed corpus:
+#   header     - magic, format version
+#   codec      - name of the codec and length of the dictionary
+#   dictionary - zstd dictionary the records are compressed with, if any
+#   records    - html of every article compressed separately
+#   index      - zlib compressed JSON {canonical title: [offset, length]}
+#   trailer    - offset and length of the index, magic
+# Aliases (e.g. redirects) are extra index keys pointing at the same record.
+
+_MAGIC = b"WIKIPACK"
+_VERSION = 2
+_HEADER = struct.Struct("<8sI")
+_CODEC = struct.Struct("<8sI")
+_TRAILER = struct.Struct("<QQ8s")
+
+PACK_SUFFIX = ".pack"
+
+
+class DirectoryCorpus:
+    """
+    Represents articles stored as one '<phrase>.html' file per article
+    in `directory`. A file is found by the phrase as given (with spaces or
+    underscores) or by its canonical title. The directory is listed once,
+    so a lookup costs a dict access, only a miss checks the few file names
+    the phrase can have, to see files added later.
+    """
+
+    def __init__(self, directory: str = ""):
+        # directory is a prefix of the file names, '' means the working one
+        self.directory = directory
+        self._names = None
+        self._titles = None
+
+    def _scan(self) -> None:
+        self._names = set()
+        self._titles = {}
+        try:
+            files = os.listdir(self.directory or ".")
+        except OSError:
+            files = []
+        for file in sorted(files):
+            if file.endswith(".html"):
+                name = file[:-len(".html")]
+                self._names.add(name)
+                self._titles.setdefault(canonical_title(name), name)
+
+    @staticmethod
+    def _candidates(phrase: str) -> list[str]:
+        title = canonical_title(phrase)
+        return [phrase, phrase.replace(" ", "_"),
+                title, title.replace(" ", "_")]
+
+    def _find(self, phrase: str) -> str | None:
+        for name in self._candidates(phrase):
+            if name in self._names:
+                return name
+        return self._titles.get(canonical_title(phrase))
+
+    def _find_added(self, phrase: str) -> str | None:
+        # files added since the directory was listed, only the names the
+        # phrase can have are checked, listing it again costs O(files)
+        for name in self._candidates(phrase):
+            if os.path.isfile(self.directory + name + ".html"):
+                self._names.add(name)
+                self._titles.setdefault(canonical_title(name), name)
+                return name
+        return None
+
+    def path(self, phrase: str) -> str | None:
+        """
+        Returns path of the file with the article, None if there is none.
+        """
+
+        if self._names is None:
+            self._scan()
+        name = self._find(phrase) or self._find_added(phrase)
+        return None if name is None else self.directory + name + ".html"
+
+    def get(self, phrase: str) -> str | None:
+        """
+        Returns html of the article or None if it is not in the corpus.
+        Raises IOError if the file can't be read.
+        """
+
+        path = self.path(phrase)
+        if path is None:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                return f.read()
+            except UnicodeDecodeError as e:
+                raise IOError(f"'{path}' is not utf-8: {e}")
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PackedCorpus:
+    """
+    Represents articles packed into a single file by PackWriter. The file
+    is memory-mapped and only the index is read up front, every article
+    is decompressed on access.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._index = self._read_index()
+        except ValueError:
+            self._map.close()
+            raise
+
+    def _read_index(self) -> dict[str, list[int]]:
+        data = self._map
+        if len(data) < _HEADER.size + _TRAILER.size:
+            raise ValueError(f"'{self.path}' is not a packed corpus.")
+
+        magic, version = _HEADER.unpack_from(data, 0)
+        offset, length, end_magic = _TRAILER.unpack_from(
+            data, len(data) - _TRAILER.size)
+        if magic != _MAGIC or end_magic != _MAGIC:
+            raise ValueError(f"'{self.path}' is not a packed corpus.")
+        if version != _VERSION:
+            raise ValueError(
+                f"Unsupported packed corpus version in '{self.path}'.")
+        self._read_codec()
+
+        try:
+            return json.loads(zlib.decompress(data[offset:offset + length]))
+        except (zlib.error, json.JSONDecodeError) as e:
+            raise ValueError(f"Corrupted index of '{self.path}': {e}")
+
+    def _read_codec(self) -> None:
+        codec, dict_length = _CODEC.unpack_from(self._map, _HEADER.size)
+        start = _HEADER.size + _CODEC.size
+        self.codec = codec.rstrip(b"\0").decode("ascii")
+        if self.codec == "zstd" and not zstd_available():
+            raise ValueError(
+                f"'{self.path}' is compressed with zstd, which needs the "
+                "'zstandard' package.")
+        dictionary = self._map[start:start + dict_length]
+        self._compression = Compression(self.codec,
+                                        dictionary=dictionary or None)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, phrase: str) -> bool:
+        return canonical_title(phrase) in self._index
+
+    def titles(self) -> list[str]:
+        return list(self._index)
+
+    def get(self, phrase: str) -> str | None:
+        """
+        Returns html of the article or None if it is not in the corpus.
+        Raises IOError if the record is corrupted or truncated.
+        """
+
+        record = self._index.get(canonical_title(phrase))
+        if record is None:
+            return None
+        offset, length = record
+        data = self._map[offset:offset + length]
+        try:
+            return self._compression.decompress(data).decode("utf-8")
+        except ValueError as e:
+            raise IOError(f"Corrupted record of '{phrase}' in "
+                          f"'{self.path}': {e}")
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PackWriter:
+    """
+    Writes a packed corpus, articles are compressed with `compression`
+    (zstd if available, gzip otherwise, by default). The file appears at
+    `path` only after close, so readers never see a partial pack.
+    """
+
+    def __init__(self, path: str, compression: Compression | None = None):
+        self.path = path
+        self.compression = compression if compression is not None \
+            else Compression()
+        self._index = {}
+        self._tmp_path = path + ".tmp"
+        dictionary = self.compression.dictionary or b""
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(_HEADER.pack(_MAGIC, _VERSION))
+        self._file.write(_CODEC.pack(
+            self.compression.codec.encode("ascii"), len(dictionary)))
+        self._file.write(dictionary)
+
+    def add(self, title: str, content: str) -> None:
+        """
+        Adds article, a later article with the same canonical title
+        replaces the earlier one in the index.
+        """
+
+        data = self.compression.compress(content.encode("utf-8"))
+        offset = self._file.tell()
+        self._file.write(data)
+        self._index[canonical_title(title)] = [offset, len(data)]
+
+    def add_alias(self, alias: str, title: str) -> bool:
+        """
+        Makes alias lead to the already added article. Returns False
+        if there is no such article.
+        """
+
+        record = self._index.get(canonical_title(title))
+        if record is None:
+            return False
+        self._index.setdefault(canonical_title(alias), record)
+        return True
+
+    def close(self) -> None:
+        index = zlib.compress(
+            json.dumps(self._index, ensure_ascii=False).encode("utf-8"))
+        offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(_TRAILER.pack(offset, len(index), _MAGIC))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self) -> None:
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
+
+
+def open_corpus(path: str) -> DirectoryCorpus | PackedCorpus:
+    """
+    Opens packed corpus file or a directory of '.html' files.
+    Raises ValueError if path is neither.
+    """
+
+    if os.path.isdir(path):
+        return DirectoryCorpus(os.path.join(path, ""))
+    if os.path.isfile(path):
+        return PackedCorpus(path)
+    raise ValueError(f"Corpus '{path}' does not exist.")
+
+
+def directory_articles(directory: str) -> Iterator[tuple[str, str]]:
+    """
+    Yields (phrase, html) of every '.html' file in the directory.
+    """
+
+    for file in sorted(os.listdir(directory)):
+        if file.endswith(".html"):
+            path = os.path.join(directory, file)
+            with open(path, "r", encoding="utf-8") as f:
+                yield file[:-len(".html")], f.read()
+
+
+def cache_articles(
+    directory: str,
+    prefix: str = "/wiki/"
+) -> Iterator[tuple[str, str]]:
+    """
+    Yields (title, html) of every page kept in the HTTP cache directory
+    whose url path starts with prefix.
+    """
+    from .http_cache import HttpCache
+
+    for entry in HttpCache(directory).entries():
+        path = urlsplit(entry.url).path
+        if path.startswith(prefix):
+            yield path[len(prefix):], entry.body
+
+
+def build_pack(
+    output: str,
+    articles: Iterator[tuple[str, str]],
+    aliases: dict[str, str] | None = None,
+    compression: Compression | None = None,
+) -> int:
+    """
+    Packs articles into output, aliases map extra titles to titles of
+    packed articles. Returns number of packed articles.
+    """
+
+    count = 0
+    with PackWriter(output, compression) as writer:
+        for title, content in articles:
+            writer.add(title, content)
+            count += 1
+        for alias, title in (aliases or {}).items():
+            writer.add_alias(alias, title)
+    return count
+
+
+def main(argv: list[str] | None = None) -> int:
+    from .compression import CODECS
+    from .redirects import DEFAULT_REDIRECTS_FILE, RedirectMap
+
+    parser = argparse.ArgumentParser(
+        description="Packs articles into a single corpus file for offline "
+                    "mode (--corpus).")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--from-dir", metavar="PATH",
+        help="Directory with one '<phrase>.html' file per article.")
+    source.add_argument(
+        "--from-cache", metavar="PATH",
+        help="HTTP cache directory (--cache-dir) of earlier runs.")
+    parser.add_argument(
+        "--prefix", default="/wiki/",
+        help="Url path prefix of articles in the cache (default: /wiki/).")
+    parser.add_argument(
+        "--output", required=True, metavar="PATH",
+        help=f"Path of the packed corpus, e.g. corpus{PACK_SUFFIX}.")
+    parser.add_argument(
+        "--compression", choices=CODECS, default="auto",
+        help="Codec of the articles (default: zstd if installed, else gzip).")
+    parser.add_argument(
+        "--compression-level", type=int, metavar="N",
+        help="Compression level (default: 3 for zstd, 6 for gzip).")
+    parser.add_argument(
+        "--dictionary", metavar="PATH",
+        help="zstd dictionary trained by 'python -m src.compression', "
+             "it is stored in the pack.")
+    args = parser.parse_args(argv)
+
+    try:
+        dictionary = None
+        if args.dictionary:
+            with open(args.dictionary, "rb") as f:
+                dictionary = f.read()
+        compression = Compression(
+            args.compression, args.compression_level, dictionary)
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+
+    aliases = None
+    if args.from_dir:
+        articles = directory_articles(args.from_dir)
+    else:
+        articles = cache_articles(args.from_cache, args.prefix)
+        # redirects learned while crawling lead to the same records
+        redirects_path = os.path.join(args.from_cache, DEFAULT_REDIRECTS_FILE)
+        if os.path.exists(redirects_path):
+            aliases = RedirectMap(redirects_path).aliases()
+
+    try:
+        count = build_pack(args.output, articles, aliases, compression)
+    except (IOError, OSError) as e:
+        print(f"Error. Can't build corpus: {e}")
+        return 1
+
+    print(f"Packed {count} articles into '{args.output}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,371 @@
+import heapq
+import json
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import Counter
+from json.encoder import encode_basestring
+from operator import itemgetter
+from typing import Iterable, Iterator
+from .profiler import get_profiler
+from .word_counts import WordCounts
+
+
+DEFAULT_JSON_PATH = "./word-counts.json"
+DEFAULT_SQLITE_PATH = "./word-counts.sqlite"
+DEFAULT_BATCH_SIZE = 20
+# count shards are JSON lines ["word", count] sorted by word
+SHARD_SUFFIX = ".jsonl"
+
+
+def load_word_counts(filename: str = DEFAULT_JSON_PATH) -> WordCounts:
+    """
+    Reads word counts saved in JSON format into compact WordCounts,
+    returns empty counts if file is missing or corrupted.
+    """
+
+    if not os.path.exists(filename):
+        print(f"File '{filename}' does not exist. Creating new one.")
+        return WordCounts()
+
+    try:
+        with get_profiler().timer("json.load"):
+            return WordCounts.read_json(filename)
+    except ValueError:
+        print(f"File '{filename}' corrupted or empty, creating new one.")
+        return WordCounts()
+
+
+def save_json_counts(
+    total_counts: dict[str, int] | WordCounts,
+    filename: str = DEFAULT_JSON_PATH
+) -> None:
+    """
+    Saves word counts in the format read by relative word frequency analysis.
+    """
+
+    try:
+        with get_profiler().timer("json.save"):
+            write_counts(filename, total_counts.items())
+    except IOError as e:
+        print(f"Error occurred while saving file: {e}")
+
+
+def _file_stamp(filename: str) -> str | None:
+    """
+    Returns modification time and size of the file, which change whenever
+    someone writes it, or None if it doesn't exist.
+    """
+
+    if not os.path.exists(filename):
+        return None
+    stat = os.stat(filename)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+class CountsStore(ABC):
+    """
+    Base class of word counts stores. Counts of added articles are buffered
+    in memory and written to the storage once per `batch_size` articles
+    (and on close). When the store is left with an exception, buffered
+    counts are still written, unless `discard_on_error` is set because
+    a crawl checkpoint will count these articles again.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        if batch_size < 1:
+            raise ValueError("Batch size must be greater or equal to 1.")
+        self.batch_size = batch_size
+        self.discard_on_error = False
+        self._pending = Counter()
+        self._pending_articles = 0
+
+    def add(self, word_dict: dict[str, int]) -> bool:
+        """
+        Adds counts of one article. Returns True if the batch was flushed.
+        """
+
+        self._pending.update(word_dict)
+        self._pending_articles += 1
+        if self._pending_articles >= self.batch_size:
+            self.flush()
+            return True
+        return False
+
+    def flush(self) -> None:
+        """
+        Writes buffered counts to the storage.
+        """
+
+        if not self._pending_articles:
+            return
+        with get_profiler().timer("counts.flush"):
+            self._write(self._pending)
+        self._pending = Counter()
+        self._pending_articles = 0
+
+    @abstractmethod
+    def _write(self, counts: Counter) -> None:
+        """
+        Adds counts of a batch of articles to the storage.
+        """
+
+    @abstractmethod
+    def totals(self) -> dict[str, int]:
+        """
+        Returns all counts written to the storage so far.
+        """
+
+    def discard(self) -> None:
+        """
+        Drops buffered counts that were not written yet.
+        """
+        self._pending = Counter()
+        self._pending_articles = 0
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None and self.discard_on_error:
+            # counts of an interrupted batch were never committed, a resumed
+            # crawl counts these articles again
+            self.discard()
+        self.close()
+
+
+class JsonCountsStore(CountsStore):
+    """
+    Keeps counts directly in the JSON file. Every flush rewrites the whole
+    file, so bigger batches make it cheaper. The totals stay in memory
+    between flushes, the file is read again only if someone else changed
+    it in the meantime.
+    """
+
+    def __init__(
+        self,
+        filename: str = DEFAULT_JSON_PATH,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        super().__init__(batch_size)
+        self.filename = filename
+        self._totals = None
+        self._stamp = None
+
+    def _write(self, counts: Counter) -> None:
+        if self._totals is None or self._stamp != _file_stamp(self.filename):
+            self._totals = load_word_counts(self.filename)
+        self._totals.update(counts)
+
+        save_json_counts(self._totals, self.filename)
+        self._stamp = _file_stamp(self.filename)
+        print(f"JSON file: '{self.filename}' has been updated.")
+
+    def totals(self) -> WordCounts:
+        return load_word_counts(self.filename)
+
+
+class SqliteCountsStore(CountsStore):
+    """
+    Keeps counts in an embedded SQLite database, a flush is a single batched
+    upsert touching only words of the batch. On close the totals are
+    exported to the JSON file, so the analysis can read them as before.
+    The database is seeded from the JSON file whenever the JSON file was
+    changed by someone else since the last export.
+    """
+
+    def __init__(
+        self,
+        filename: str = DEFAULT_SQLITE_PATH,
+        json_filename: str = DEFAULT_JSON_PATH,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        super().__init__(batch_size)
+        self.filename = filename
+        self.json_filename = json_filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS counts (
+                word TEXT PRIMARY KEY,
+                count INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._sync_with_json()
+
+    def _json_stamp(self) -> str | None:
+        return _file_stamp(self.json_filename)
+
+    def _set_meta(self, key: str, value: str | None) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def _sync_with_json(self) -> None:
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'json_stamp'").fetchone()
+        stamp = self._json_stamp()
+        if row is not None and row[0] == stamp:
+            return
+
+        with self.connection:
+            self.connection.execute("DELETE FROM counts")
+            if stamp is not None:
+                self.connection.executemany(
+                    "INSERT INTO counts VALUES (?, ?)",
+                    load_word_counts(self.json_filename).items()
+                )
+            self._set_meta("json_stamp", stamp)
+
+    def _write(self, counts: Counter) -> None:
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO counts VALUES (?, ?) ON CONFLICT(word) "
+                "DO UPDATE SET count = count + excluded.count",
+                counts.items()
+            )
+
+    def totals(self) -> dict[str, int]:
+        return dict(self.connection.execute("SELECT word, count FROM counts"))
+
+    def export_json(self, filename: str | None = None) -> None:
+        """
+        Writes all counts to the JSON file used by the analysis.
+        """
+
+        filename = filename or self.json_filename
+        save_json_counts(self.totals(), filename)
+        if filename == self.json_filename:
+            with self.connection:
+                self._set_meta("json_stamp", self._json_stamp())
+        print(f"JSON file: '{filename}' has been updated.")
+
+    def close(self) -> None:
+        self.flush()
+        self.export_json()
+        self.connection.close()
+
+
+class ShardCountsStore(CountsStore):
+    """
+    Keeps counts of one shard of a sharded crawl in a count shard file.
+    Every flush merges the batch into the sorted file, so shards of many
+    processes can be combined by merge_counts without loading them.
+    """
+
+    def __init__(self, filename: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        super().__init__(batch_size)
+        self.filename = filename
+
+    def _write(self, counts: Counter) -> None:
+        streams = [sorted(counts.items())]
+        if os.path.exists(self.filename):
+            streams.append(read_counts(self.filename))
+        write_counts(self.filename, merge_sorted_counts(streams))
+        print(f"Count shard: '{self.filename}' has been updated.")
+
+    def totals(self) -> dict[str, int]:
+        if not os.path.exists(self.filename):
+            return {}
+        return dict(read_counts(self.filename))
+
+
+def read_counts(filename: str) -> Iterator[tuple[str, int]]:
+    """
+    Yields (word, count) sorted by word from a count shard or from a JSON
+    counts file. Raises ValueError if the file is corrupted.
+    """
+
+    with open(filename, "r", encoding="utf-8") as f:
+        try:
+            if not filename.endswith(SHARD_SUFFIX):
+                yield from sorted(json.load(f).items())
+                return
+            for line in f:
+                word, count = json.loads(line)
+                yield word, count
+        except (json.JSONDecodeError, AttributeError, TypeError,
+                ValueError) as e:
+            raise ValueError(f"File '{filename}' is corrupted: {e}")
+
+
+def merge_sorted_counts(
+    streams: Iterable[Iterable[tuple[str, int]]]
+) -> Iterator[tuple[str, int]]:
+    """
+    K-way merge of (word, count) streams sorted by word, counts of the same
+    word are summed. The merge is associative, merged shards can be merged
+    again with the rest.
+    """
+
+    word, total = None, 0
+    for next_word, count in heapq.merge(*streams, key=itemgetter(0)):
+        if next_word != word:
+            if word is not None:
+                yield word, total
+            word, total = next_word, 0
+        total += count
+    if word is not None:
+        yield word, total
+
+
+def write_counts(filename: str, counts: Iterable[tuple[str, int]]) -> int:
+    """
+    Atomically writes sorted (word, count) pairs as a count shard or, unless
+    the name ends with SHARD_SUFFIX, in the JSON format of save_json_counts.
+    The pairs are streamed, never loaded all at once. Returns number of
+    written words.
+    """
+
+    # json.dumps(word, ensure_ascii=False) with no encoder made per word
+    quote = encode_basestring
+    words = 0
+    tmp_path = filename + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if filename.endswith(SHARD_SUFFIX):
+            for word, count in counts:
+                f.write(f"[{quote(word)}, {count}]\n")
+                words += 1
+        else:
+            for word, count in counts:
+                f.write("{\n    " if not words else ",\n    ")
+                f.write(f"{quote(word)}: {count}")
+                words += 1
+            f.write("\n}" if words else "{}")
+    os.replace(tmp_path, filename)
+    return words
+
+
+def merge_counts(inputs: list[str], output: str) -> int:
+    """
+    Merges count shards and JSON counts files into output, returns number
+    of words. Output may be one of the inputs.
+    Raises ValueError if an input is corrupted.
+    """
+
+    with get_profiler().timer("counts.merge"):
+        return write_counts(
+            output, merge_sorted_counts(read_counts(path) for path in inputs))
+
+
+COUNTS_STORES = ("json", "sqlite")
+
+
+def open_counts_store(
+    kind: str = "json",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    json_filename: str = DEFAULT_JSON_PATH,
+    sqlite_filename: str = DEFAULT_SQLITE_PATH,
+) -> CountsStore:
+    """
+    Creates counts store of the given kind ('json' or 'sqlite').
+    """
+
+    if kind == "sqlite":
+        return SqliteCountsStore(sqlite_filename, json_filename, batch_size)
+    return JsonCountsStore(json_filename, batch_size)
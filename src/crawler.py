@@ -0,0 +1,539 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from itertools import islice
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterator
+from .scraper_logic import WikiScraper
+from .wiki_article import WikiArticle
+from .rate_limiter import TokenBucket
+from .checkpoint import CrawlState, crawl_directory, save_checkpoint
+from .frontier import DEFAULT_MEMORY_LIMIT, Frontier
+from .sharding import ShardMailbox
+from .visited import DEFAULT_FP_RATE, VisitedSet, make_visited_set
+from .profiler import Profiler, get_profiler, profiling
+from .titles import canonical_title
+from .exceptions import ArticleFetchError, ContentExtractionError
+
+
+DEFAULT_CONCURRENCY = 4
+# pages of a level taken at once from its file, coroutines (and titles)
+# of a whole level of a deep crawl would take too much memory
+_VISIT_BATCH = 1024
+
+
+def parse_page(
+    phrase: str,
+    content: str,
+    language: str,
+    parser: str,
+    with_links: bool
+) -> tuple[dict[str, int], list[str]]:
+    """
+    Parses raw html of a single page and returns only compact results:
+    word counts and linked phrases. Runs in a worker thread or process.
+    """
+
+    data = WikiArticle(phrase, content, language, parser).extract_all()
+    links = data.links if with_links else []
+    return data.word_count, links
+
+
+def _profiled_parse_page(
+    *args
+) -> tuple[tuple[dict[str, int], list[str]], dict]:
+    """
+    Runs parse_page in a worker process with its own profiler and returns
+    the result together with stats of the profiler.
+    """
+
+    profiler = Profiler()
+    with profiling(profiler):
+        result = parse_page(*args)
+    return result, profiler.stats()
+
+
+@dataclass
+class _Stages:
+    """
+    Executors and limits shared by all page visits of one crawl.
+    """
+    limiter: TokenBucket
+    page_slots: asyncio.Semaphore
+    fetch_slots: asyncio.Semaphore
+    fetch_executor: Executor
+    parse_executor: Executor
+
+
+class Crawler:
+    """
+    Represents a concurrent breadth-first crawler used by auto-count-words.
+    Up to `concurrency` pages are fetched at once, while a shared token
+    bucket keeps the aggregate request rate at one request per `wait_time`.
+    Pages are processed level by level, so depth of every page and the order
+    of visiting are the same as in the sequential breadth-first search.
+
+    Fetching and parsing are separate stages: threads download raw html
+    and, if `workers` is given, a pool of `workers` processes parses it,
+    so parsing is not limited to a single core. Otherwise pages are parsed
+    in the fetching threads.
+
+    Links to known redirects are followed straight to their targets and a
+    page that turns out to redirect to an already visited article is not
+    counted again.
+
+    Links of a level are collected in a Frontier, which spills them to
+    disk above `frontier_memory` titles. The next level is written from it
+    to a file in the `priority` order, with at most `max_pages_per_depth`
+    pages and no more than is left of the `max_pages` budget of the whole
+    crawl, and read back in chunks of _VISIT_BATCH titles.
+    Visited titles are kept in a set of the `visited_set` kind (see
+    src.visited), a Bloom filter skips unvisited pages with `fp_rate`
+    probability.
+
+    With a `mailbox`, the crawler is one shard of a crawl run by several
+    processes: it visits only titles its shard owns and passes links to
+    other titles to their owners at the end of every depth. Redirects to
+    titles of other shards are forwarded to their owners, which visit them
+    at the same depth, as a crawl without shards would. Limits then apply
+    to every shard separately.
+
+    `on_words` receives counts of every page and returns True when all
+    counts passed so far are saved. At that moment the frontier is spilled
+    and the crawl state is written to `checkpoint_path` (if given), so the
+    crawl can be resumed without counting saved pages again. Level files
+    and runs are kept in crawl_directory(checkpoint_path) until a newer
+    checkpoint no longer needs them. `on_page` (if given) receives
+    the counts before `on_words`, together with the canonical title of
+    the page.
+    """
+
+    def __init__(
+        self,
+        scraper: WikiScraper,
+        max_depth: int,
+        wait_time: float,
+        on_words: Callable[[dict[str, int]], bool | None],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        checkpoint_path: str | None = None,
+        workers: int | None = None,
+        max_pages: int | None = None,
+        max_pages_per_depth: int | None = None,
+        priority: str = "bfs",
+        frontier_memory: int = DEFAULT_MEMORY_LIMIT,
+        visited_set: str = "exact",
+        fp_rate: float = DEFAULT_FP_RATE,
+        mailbox: ShardMailbox | None = None,
+        on_page: Callable[[str, dict[str, int]], None] | None = None,
+    ):
+        if concurrency < 1:
+            raise ValueError("Concurrency must be greater or equal to 1.")
+        if workers is not None and workers < 1:
+            raise ValueError("Number of workers must be greater or equal to 1.")
+        for limit in (max_pages, max_pages_per_depth):
+            if limit is not None and limit < 1:
+                raise ValueError("Page limits must be greater or equal to 1.")
+
+        self.scraper = scraper
+        self.max_depth = max_depth
+        self.wait_time = wait_time
+        self.on_words = on_words
+        self.concurrency = concurrency
+        self.checkpoint_path = checkpoint_path
+        self.workers = workers
+        self.max_pages = max_pages
+        self.max_pages_per_depth = max_pages_per_depth
+        self.priority = priority
+        self.frontier_memory = frontier_memory
+        self.visited_set = visited_set
+        self.fp_rate = fp_rate
+        self.mailbox = mailbox
+        self.on_page = on_page
+        self.state = None
+        # pages processed since counts were saved last time
+        self._pending = []
+        # phrases of the chunk in flight
+        self._chunk = set()
+        self._frontier = None
+        self._directory = None
+        # files the last checkpoint may still need
+        self._obsolete = []
+
+    @property
+    def visited(self) -> VisitedSet:
+        return self.state.visited if self.state else set()
+
+    def run(self, start_phrase: str) -> None:
+        """
+        Crawls pages starting from start_phrase until max_depth is reached,
+        the page budget is used up or there are no more links to visit.
+        """
+        state = CrawlState.start(
+            start_phrase, self.max_depth,
+            make_visited_set(self.visited_set, self.fp_rate))
+        if self.checkpoint_path:
+            # left by a crawl that was never resumed
+            shutil.rmtree(crawl_directory(self.checkpoint_path),
+                          ignore_errors=True)
+        self.resume(state)
+
+    def _owns(self, title: str) -> bool:
+        return self.mailbox is None or self.mailbox.owns(title)
+
+    def resume(self, state: CrawlState) -> None:
+        """
+        Continues crawl from the given state, pages already committed
+        in it are not fetched again.
+        """
+        self.state = state
+        self._pending = []
+        self._obsolete = []
+        if self.checkpoint_path:
+            self._directory = crawl_directory(self.checkpoint_path)
+            os.makedirs(self._directory, exist_ok=True)
+        else:
+            self._directory = tempfile.mkdtemp(prefix="crawl-")
+        try:
+            asyncio.run(self._crawl())
+        finally:
+            if not self.checkpoint_path:
+                shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _commit(self) -> None:
+        """
+        Marks pending pages as committed and saves the checkpoint.
+        """
+
+        state = self.state
+        for phrase, depth in self._pending:
+            # pages of finished chunks need no tracking anymore
+            if depth == state.depth and phrase in self._chunk and \
+                    self.checkpoint_path:
+                state.committed.add(phrase)
+        self._pending = []
+
+        if self.checkpoint_path:
+            # links of the committed pages, the checkpoint keeps no titles
+            # of the next level itself
+            self._frontier.spill()
+            state.frontier_runs = [(os.path.basename(path), count)
+                                   for path, count in self._frontier.runs]
+            if self.mailbox:
+                state.mailbox = self.mailbox.checkpoint()
+            save_checkpoint(state, self.checkpoint_path)
+            for path in self._obsolete:
+                self._remove(path)
+            self._obsolete = []
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _retire(self, path: str) -> None:
+        """
+        Removes a level file or a frontier run, once no checkpoint needs it.
+        """
+
+        if self.checkpoint_path:
+            self._obsolete.append(path)
+        else:
+            self._remove(path)
+
+    def _create_parse_executor(self) -> Executor | None:
+        if self.workers is None:
+            return None
+        return ProcessPoolExecutor(max_workers=self.workers)
+
+    def _resolve_level(
+        self,
+        titles: list[str],
+        links: Frontier | ShardMailbox,
+    ) -> list[str]:
+        """
+        Resolves a chunk of titles of the current level before they are
+        fetched (in batches, if the scraper uses the API). Missing articles
+        and redirects to visited articles are dropped, other redirects are
+        replaced with their targets, or forwarded to the shard owning them.
+        """
+
+        state = self.state
+        try:
+            targets = self.scraper.resolve_many(titles)
+        except ArticleFetchError as e:
+            print(f"Can't resolve titles, fetching them as they are: {e}")
+            return titles
+
+        level = []
+        for position, phrase in enumerate(titles, state.level_start):
+            target = targets.get(phrase, phrase)
+            if target is None:
+                print(f"Skipped '{phrase}' - article does not exist.")
+                continue
+            if target != canonical_title(phrase):
+                if target in state.visited:
+                    print(f"Skipped '{phrase}' - redirects to already "
+                          f"visited '{target}'.")
+                    continue
+                if not self._owns(target):
+                    self.mailbox.forward(target, position)
+                    continue
+                state.visited.add(target)
+                phrase = target
+            level.append(phrase)
+        return level
+
+    def _level_titles(self) -> Iterator[str]:
+        """
+        Yields titles of the current level not taken in chunks yet.
+        """
+
+        state = self.state
+        if state.level_path is None:
+            if self._owns(state.start_phrase):
+                yield from [state.start_phrase][state.level_offset:]
+            return
+        path = os.path.join(self._directory, state.level_path)
+        with open(path, "r", encoding="utf-8") as f:
+            for line in islice(f, state.level_offset, None):
+                yield json.loads(line)
+
+    async def _crawl(self) -> None:
+        loop = asyncio.get_running_loop()
+        limiter = TokenBucket(self.wait_time)
+        state = self.state
+
+        # Fetched pages waiting for a parser are limited, so a slow parse
+        # stage doesn't pile up raw html in memory.
+        in_flight = self.concurrency
+        if self.workers:
+            in_flight += 2 * self.workers
+
+        fetch_executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        parse_executor = self._create_parse_executor()
+        stages = _Stages(
+            limiter=limiter,
+            page_slots=asyncio.Semaphore(in_flight),
+            fetch_slots=asyncio.Semaphore(self.concurrency),
+            fetch_executor=fetch_executor,
+            parse_executor=parse_executor or fetch_executor,
+        )
+
+        failed = True
+        try:
+            while True:
+                runs = [(os.path.join(self._directory, name), count)
+                        for name, count in state.frontier_runs]
+                with Frontier(self.priority, self.frontier_memory,
+                              self._directory, runs, self._retire) \
+                        as frontier:
+                    self._frontier = links = frontier
+                    if self.mailbox:
+                        self.mailbox.open_level(
+                            state.depth, frontier, state.mailbox)
+                        links = self.mailbox
+
+                    titles = self._level_titles()
+                    try:
+                        while await self._visit_chunk(titles, links, stages):
+                            pass
+                    finally:
+                        titles.close()
+
+                    # shards with nothing to visit still take part in the
+                    # exchange of links, until no shard finds any
+                    queued = None
+                    while self.mailbox:
+                        queued, forwarded = await loop.run_in_executor(
+                            fetch_executor, self.mailbox.exchange,
+                            state.visited)
+                        if forwarded is None:
+                            break
+                        # redirect targets found by other shards
+                        state.level_start = state.level_offset
+                        state.level_offset += len(forwarded)
+                        state.level = forwarded
+                        await self._visit_chunk(iter(()), links, stages)
+
+                    level_path, size = self._next_level(frontier)
+                    self._frontier = None
+
+                if state.level_path is not None:
+                    self._retire(
+                        os.path.join(self._directory, state.level_path))
+                state.depth += 1
+                state.level_path = level_path
+                state.level_offset = state.level_start = 0
+                state.frontier_runs = []
+                state.mailbox = None
+                if queued == 0 or (queued is None and size == 0):
+                    break
+            failed = False
+        finally:
+            if self.mailbox:
+                self.mailbox.close(failed)
+            fetch_executor.shutdown()
+            if parse_executor:
+                parse_executor.shutdown()
+
+    async def _visit_chunk(
+        self,
+        titles: Iterator[str],
+        links: Frontier | ShardMailbox,
+        stages: _Stages,
+    ) -> bool:
+        """
+        Visits the chunk in flight (left by a checkpoint) or the next chunk
+        of the level, returns False when the level is finished.
+        """
+
+        state = self.state
+        if not state.level:
+            chunk = list(islice(titles, _VISIT_BATCH))
+            if not chunk:
+                return False
+            state.level_start = state.level_offset
+            state.level_offset += len(chunk)
+            state.committed = set()
+            if self.scraper.api:
+                # batched titles query is a request too
+                await stages.limiter.acquire()
+            state.level = await asyncio.get_running_loop().run_in_executor(
+                stages.fetch_executor, self._resolve_level, chunk, links)
+
+        self._chunk = set(state.level)
+        await asyncio.gather(*(
+            self._visit(phrase, position, links, stages)
+            for position, phrase in enumerate(state.level, state.level_start)
+            if phrase not in state.committed
+        ))
+        state.pages += len(state.level)
+        state.level = []
+        state.committed = set()
+        return True
+
+    def _queue_links(
+        self,
+        frontier: Frontier | ShardMailbox,
+        position: int,
+        links: list[str],
+    ) -> None:
+        """
+        Adds links found on the page at the position of the current level
+        to the frontier (or the mailbox of a sharded crawl). Links to known
+        redirects are replaced with their targets, every target counts
+        once per page.
+        """
+
+        seen = set()
+        for index, link in enumerate(links):
+            target = self.scraper.resolve(link)
+            if target not in seen and target not in self.state.visited:
+                seen.add(target)
+                frontier.add(target, position, index)
+
+    def _next_level(self, frontier: Frontier) -> tuple[str, int]:
+        """
+        Writes pages of the next level from the frontier to a new level
+        file, within the page limits, and marks them as visited. Returns
+        name of the file and number of pages.
+        """
+
+        state = self.state
+        limit = self.max_pages_per_depth
+        if self.max_pages is not None:
+            left = max(0, self.max_pages - state.pages)
+            limit = left if limit is None else min(limit, left)
+
+        fd, path = tempfile.mkstemp(
+            prefix="level-", suffix=".jsonl", dir=self._directory)
+        size = 0
+        with open(fd, "w", encoding="utf-8") as f:
+            # a redirect may have reached a page after its link was queued
+            for phrase in frontier.pop(limit, exclude=state.visited):
+                state.visited.add(phrase)
+                f.write(json.dumps(phrase, ensure_ascii=False))
+                f.write("\n")
+                size += 1
+        if frontier.spilled:
+            print(f"Frontier of depth {state.depth + 1} spilled "
+                  f"{frontier.spilled} titles to disk.")
+        return os.path.basename(path), size
+
+    async def _fetch_and_parse(
+        self,
+        phrase: str,
+        depth: int,
+        stages: _Stages,
+    ) -> tuple[dict[str, int], list[str]]:
+        loop = asyncio.get_running_loop()
+
+        async with stages.page_slots:
+            async with stages.fetch_slots:
+                await stages.limiter.acquire()
+                print(
+                    f"\n-----Counting Words on '{phrase}' (Depth: {depth})-----")
+                content = await loop.run_in_executor(
+                    stages.fetch_executor, self.scraper.fetch, phrase)
+
+            parse_args = (phrase, content, self.scraper.language,
+                          self.scraper.parser, depth < self.max_depth)
+            profiler = get_profiler()
+            if not (self.workers and profiler.enabled):
+                return await loop.run_in_executor(
+                    stages.parse_executor, parse_page, *parse_args)
+
+            # profiler of the main process can't see inside the workers
+            result, stats = await loop.run_in_executor(
+                stages.parse_executor, _profiled_parse_page, *parse_args)
+            profiler.merge(stats)
+            return result
+
+    async def _visit(
+        self,
+        phrase: str,
+        position: int,
+        frontier: Frontier | ShardMailbox,
+        stages: _Stages,
+    ) -> None:
+        depth = self.state.depth
+        try:
+            word_dict, links = await self._fetch_and_parse(
+                phrase, depth, stages)
+        except (ArticleFetchError, ContentExtractionError) as e:
+            print(f"Skipped '{phrase}' - error occured : {e}.")
+            word_dict, links = {}, []
+        except Exception as e:
+            print(f"Unexpected error on '{phrase}': {e}")
+            word_dict, links = {}, []
+
+        # the page turned out to be a redirect
+        target = self.scraper.resolve(phrase)
+        if target != canonical_title(phrase):
+            if target in self.state.visited:
+                print(f"Skipped '{phrase}' - redirects to already "
+                      f"visited '{target}'.")
+                word_dict, links = {}, []
+            elif not self._owns(target):
+                print(f"Skipped '{phrase}' - redirects to '{target}' "
+                      f"of another shard.")
+                word_dict, links = {}, []
+                self.mailbox.forward(target, position)
+            else:
+                self.state.visited.add(target)
+
+        self._queue_links(frontier, position, links)
+        self._pending.append((phrase, depth))
+
+        if word_dict and self.on_page:
+            self.on_page(target, word_dict)
+
+        # Counts are merged from the event loop thread only, so the
+        # statistics file has a single writer.
+        if word_dict and self.on_words(word_dict):
+            self._commit()
@@ -14,4 +14,10 @@ class ContentExtractionError(Exception):
     """
     Raised, when parsing html goes wrong (no table, no content div, etc).
     """
-    pass
\ No newline at end of file
+    pass
+
+class ShardError(Exception):
+    """
+    Raised when another shard of a sharded crawl stopped responding.
+    """
+    pass
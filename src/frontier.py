@@ -0,0 +1,232 @@
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from itertools import islice
+from typing import Callable, Container, Iterable, Iterator
+from .profiler import get_profiler
+
+
+# Order in which pages of the next depth are visited (and kept, when the
+# depth is capped):
+#   bfs     - order of discovery, the same as in the breadth-first search
+#   inlinks - pages linked from more pages of the previous depth first,
+#             ties in order of discovery
+PRIORITIES = ("bfs", "inlinks")
+DEFAULT_MEMORY_LIMIT = 100_000
+
+# title, in-links, position of the first page linking to it, position of
+# the link on that page
+_Entry = tuple[str, int, int, int]
+
+
+class Frontier:
+    """
+    Represents pages found for the next depth of the crawl. Every link is
+    added with its position: the position of the page it was found on
+    and of the link on that page, so pages fetched in any order give the
+    same frontier. A title added many times keeps its first position and
+    counts its in-links.
+
+    Above `memory_limit` titles (and on every spill) the entries are
+    written to a run: a file sorted by title. The last two runs are merged
+    while the older one is at most twice as big, so n entries take about
+    log(n) runs. Runs are kept in `directory` and removed with `remove`,
+    which lets the caller keep files still needed by a checkpoint; without
+    a directory they go to a temporary one removed by close. `runs` are
+    (path, entries) pairs of a frontier spilled earlier.
+    """
+
+    def __init__(
+        self,
+        priority: str = "bfs",
+        memory_limit: int = DEFAULT_MEMORY_LIMIT,
+        directory: str | None = None,
+        runs: Iterable[tuple[str, int]] = (),
+        remove: Callable[[str], None] = os.remove,
+    ):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'.")
+        if memory_limit < 1:
+            raise ValueError("Memory limit must be greater or equal to 1.")
+
+        self.priority = priority
+        self.memory_limit = memory_limit
+        # title -> [in-links, page position, link position]
+        self._entries: dict[str, list[int]] = {}
+        self._directory = directory
+        self._temporary = directory is None
+        self._runs: list[tuple[str, int]] = [
+            (path, count) for path, count in runs]
+        self._remove = remove
+        self.spilled = 0
+
+    @property
+    def runs(self) -> list[tuple[str, int]]:
+        return list(self._runs)
+
+    def add(self, title: str, page: int, link: int) -> None:
+        entry = self._entries.get(title)
+        if entry is None:
+            self._entries[title] = [1, page, link]
+            if len(self._entries) > self.memory_limit:
+                self.spill()
+            return
+
+        entry[0] += 1
+        if (page, link) < (entry[1], entry[2]):
+            entry[1], entry[2] = page, link
+
+    def _new_path(self, prefix: str) -> str:
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="frontier-")
+        fd, path = tempfile.mkstemp(
+            prefix=f"{prefix}-", suffix=".jsonl", dir=self._directory)
+        os.close(fd)
+        return path
+
+    def _write_run(self, path: str, entries: Iterable[_Entry]) -> int:
+        count = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False))
+                f.write("\n")
+                count += 1
+        return count
+
+    def _read_run(self, path: str) -> Iterator[_Entry]:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield tuple(json.loads(line))
+
+    def spill(self) -> None:
+        """
+        Writes entries kept in memory to a new run and merges the last
+        runs while they are of similar size.
+        """
+
+        if not self._entries:
+            return
+        spilled = len(self._entries)
+        path = self._new_path("run")
+        self._write_run(path, ((title, *entry) for title, entry
+                               in sorted(self._entries.items())))
+        self._entries = {}
+        self._runs.append((path, spilled))
+        self.spilled += spilled
+        get_profiler().count("frontier_spilled", spilled)
+
+        while len(self._runs) > 1 and \
+                self._runs[-2][1] <= 2 * self._runs[-1][1]:
+            older = self._runs[-2:]
+            path = self._new_path("run")
+            count = self._write_run(path, self._merge_runs(
+                [self._read_run(run) for run, _ in older]))
+            self._runs[-2:] = [(path, count)]
+            for run, _ in older:
+                self._remove(run)
+
+    @staticmethod
+    def _merge_runs(runs: list[Iterator[_Entry]]) -> Iterator[_Entry]:
+        """
+        Yields every title of the runs once, with in-links summed and the
+        earliest position.
+        """
+
+        current = None
+        for entry in heapq.merge(*runs, key=lambda e: e[0]):
+            if current is None or entry[0] != current[0]:
+                if current is not None:
+                    yield current
+                current = entry
+                continue
+            current = (current[0], current[1] + entry[1],
+                       *min(current[2:], entry[2:]))
+        if current is not None:
+            yield current
+
+    def _merged(self) -> Iterator[_Entry]:
+        in_memory = ((title, *entry)
+                     for title, entry in sorted(self._entries.items()))
+        if not self._runs:
+            return in_memory
+        return self._merge_runs(
+            [in_memory, *(self._read_run(path) for path, _ in self._runs)])
+
+    def _key(self, entry: _Entry) -> tuple[int, ...]:
+        if self.priority == "inlinks":
+            return -entry[1], entry[2], entry[3]
+        return entry[2], entry[3]
+
+    def _ordered(self, entries: Iterator[_Entry]) -> Iterator[_Entry]:
+        """
+        Sorts entries by priority with at most `memory_limit` of them in
+        memory: chunks are sorted and written to files, which are merged.
+        """
+
+        chunk = list(islice(entries, self.memory_limit))
+        if len(chunk) < self.memory_limit:
+            yield from sorted(chunk, key=self._key)
+            return
+
+        paths = []
+        try:
+            while chunk:
+                chunk.sort(key=self._key)
+                paths.append(self._new_path("order"))
+                self._write_run(paths[-1], chunk)
+                chunk = list(islice(entries, self.memory_limit))
+            yield from heapq.merge(
+                *(self._read_run(path) for path in paths), key=self._key)
+        finally:
+            for path in paths:
+                os.remove(path)
+
+    def pop(
+        self,
+        limit: int | None = None,
+        exclude: Container[str] = (),
+    ) -> Iterator[str]:
+        """
+        Yields titles in the order of priority, at most `limit` of them,
+        and empties the frontier. Titles in `exclude` are skipped and don't
+        count toward the limit. Runs are merged as they are read, so at
+        most `memory_limit` entries (or `limit`, if smaller) are kept in
+        memory.
+        """
+
+        ordered = None
+        try:
+            entries = (entry for entry in self._merged()
+                       if entry[0] not in exclude)
+            if limit is not None and limit <= self.memory_limit:
+                best = iter(heapq.nsmallest(limit, entries, key=self._key))
+            else:
+                ordered = self._ordered(entries)
+                best = islice(ordered, limit)
+            for entry in best:
+                yield entry[0]
+        finally:
+            if ordered is not None:
+                ordered.close()
+            self.close()
+
+    def close(self) -> None:
+        """
+        Removes runs and forgets every entry.
+        """
+
+        self._entries = {}
+        runs, self._runs = self._runs, []
+        for path, _ in runs:
+            self._remove(path)
+        if self._temporary and self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
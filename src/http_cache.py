@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterator
+from urllib.parse import quote, unquote, urlsplit, urlunsplit, parse_qsl, urlencode
+from .compression import Compression
+
+
+def normalize_url(url: str) -> str:
+    """
+    Returns canonical form of the url used as a cache key: lowercase scheme
+    and host, no default port, no fragment, consistent percent-encoding and
+    sorted query parameters.
+    """
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+
+    port = parts.port
+    if port and not (scheme, port) in (("http", 80), ("https", 443)):
+        host = f"{host}:{port}"
+
+    path = quote(unquote(parts.path), safe="/:@!$&'()*+,;=-._~") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+@dataclass
+class CacheEntry:
+    """
+    Single cached response: body and validators needed for revalidation.
+    """
+    url: str
+    body: str
+    etag: str | None
+    last_modified: str | None
+    stored_at: float
+
+    def is_fresh(self, ttl: float, now: float) -> bool:
+        return now - self.stored_at < ttl
+
+
+class HttpCache:
+    """
+    Represents a persistent on-disk cache of fetched pages. Every response is
+    stored under the hash of its normalized url, next to a small metadata
+    file with ETag and Last-Modified values. Entries younger than `ttl` are
+    served directly, older ones have to be revalidated by the caller.
+    When the total size exceeds `max_size` bytes the least recently used
+    entries are evicted. Bodies are stored compressed with `compression`
+    (plain by default), sizes count the stored bytes.
+    """
+
+    _BODY_SUFFIX = ".body"
+    _META_SUFFIX = ".meta.json"
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: float = 3600,
+        max_size: int | None = None,
+        clock=time.time,
+        compression: Compression | None = None,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self.compression = compression if compression is not None \
+            else Compression("none")
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+        # key -> size in bytes, least recently used first
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._total_size = 0
+        self._load_index()
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def _load_index(self) -> None:
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self._BODY_SUFFIX):
+                continue
+            key = name[:-len(self._BODY_SUFFIX)]
+            try:
+                stat = os.stat(self._path(key, self._BODY_SUFFIX))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, key, stat.st_size))
+
+        # modification times keep the LRU order between runs
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_size += size
+
+    def _remove(self, key: str) -> None:
+        size = self._index.pop(key)
+        self._total_size -= size
+        for suffix in (self._BODY_SUFFIX, self._META_SUFFIX):
+            try:
+                os.remove(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self) -> None:
+        if self.max_size is None or self._total_size <= self.max_size:
+            return
+
+        while self._index and self._total_size > self.max_size:
+            self._remove(next(iter(self._index)))
+            self.evictions += 1
+
+    def _mark_used(self, key: str) -> None:
+        self._index.move_to_end(key)
+        now = self._clock()
+        try:
+            # modification time of the body keeps LRU order between runs
+            os.utime(self._path(key, self._BODY_SUFFIX), (now, now))
+        except OSError:
+            pass
+
+    def _read(self, key: str) -> CacheEntry:
+        """
+        Raises OSError or ValueError if the entry can't be read.
+        """
+
+        with open(self._path(key, self._META_SUFFIX),
+                  "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(self._path(key, self._BODY_SUFFIX), "rb") as f:
+            body = self.compression.read_text(f)
+        try:
+            return CacheEntry(body=body, **meta)
+        except TypeError as e:
+            raise ValueError(f"Corrupted cache metadata: {e}")
+
+    def get(self, url: str) -> CacheEntry | None:
+        """
+        Returns cached entry for the url (fresh or stale) or None.
+        """
+
+        key = self._key(url)
+        with self._lock:
+            if key not in self._index:
+                return None
+            try:
+                entry = self._read(key)
+            except (OSError, ValueError):
+                self._remove(key)
+                return None
+
+            self._mark_used(key)
+
+        return entry
+
+    def put(
+        self,
+        url: str,
+        body: str,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        """
+        Stores response body with its validators, evicting old entries
+        if the cache grows above max_size.
+        """
+
+        key = self._key(url)
+        data = self.compression.compress(body.encode("utf-8"))
+        meta = {
+            "url": normalize_url(url),
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": self._clock(),
+        }
+
+        with self._lock:
+            if key in self._index:
+                self._remove(key)
+
+            # write to temporary files first so readers never see a partial
+            # entry, even from another process sharing the directory
+            for suffix, payload in ((self._BODY_SUFFIX, data),
+                                    (self._META_SUFFIX,
+                                     json.dumps(meta).encode("utf-8"))):
+                path = self._path(key, suffix)
+                with open(path + ".tmp", "wb") as f:
+                    f.write(payload)
+                os.replace(path + ".tmp", path)
+
+            self._index[key] = len(data)
+            self._total_size += len(data)
+            self._mark_used(key)
+            self._evict()
+
+    def refresh(self, url: str) -> None:
+        """
+        Marks entry as fresh again after successful revalidation (304).
+        An entry that can't be updated is removed, so it is fetched again.
+        """
+
+        key = self._key(url)
+        with self._lock:
+            if key not in self._index:
+                return
+            path = self._path(key, self._META_SUFFIX)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                meta["stored_at"] = self._clock()
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+                os.replace(path + ".tmp", path)
+            except (OSError, ValueError, TypeError):
+                self._remove(key)
+
+    def entries(self) -> Iterator[CacheEntry]:
+        """
+        Yields every cached entry, without marking them as used.
+        """
+
+        with self._lock:
+            keys = list(self._index)
+
+        for key in keys:
+            try:
+                yield self._read(key)
+            except (OSError, ValueError):
+                continue
+
+    def record(self, outcome: str) -> None:
+        """
+        Increments one of the 'hits', 'misses' or 'revalidations' counters.
+        """
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    @property
+    def size(self) -> int:
+        return self._total_size
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "entries": len(self._index),
+            "size": self._total_size,
+        }
+
+    def summary(self) -> str:
+        requests = self.hits + self.misses + self.revalidations
+        hit_rate = (self.hits + self.revalidations) / requests if requests else 0
+        return (
+            f"Cache: {self.hits} hits, {self.revalidations} revalidated, "
+            f"{self.misses} misses (hit rate {hit_rate:.0%}), "
+            f"{len(self._index)} entries, {self._total_size / 1e6:.1f} MB, "
+            f"{self.evictions} evicted."
+        )
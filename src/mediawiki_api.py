@@ -0,0 +1,115 @@
+import json
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+from .parsers import CONTENT_DIV_CLASS, has_content_div
+from .exceptions import ArticleFetchError
+
+
+# titles resolved by a single query request, the limit for regular users
+API_BATCH_SIZE = 50
+
+_COMMON_PARAMS = {"format": "json", "formatversion": "2", "redirects": "1"}
+
+
+@dataclass
+class ApiPage:
+    """
+    Article returned by action=parse.
+    title - title of the article after following redirects,
+    html - page with the rendered content div, as WikiArticle expects it,
+    redirects - (from, to) pairs of followed redirects.
+    """
+    title: str
+    html: str
+    redirects: list[tuple[str, str]] = field(default_factory=list)
+
+
+class MediaWikiApi:
+    """
+    Represents the MediaWiki action API of a wiki (its api.php url).
+    Builds request urls and decodes JSON responses, the requests are sent
+    by the scraper, so they share its session, cache and retries.
+    """
+
+    def __init__(self, api_url: str):
+        self.api_url = api_url
+
+    def _url(self, params: dict[str, str]) -> str:
+        return f"{self.api_url}?{urlencode({**params, **_COMMON_PARAMS})}"
+
+    def parse_url(self, title: str) -> str:
+        """
+        Returns url of the rendered content of a single article.
+        """
+        return self._url({"action": "parse", "page": title, "prop": "text"})
+
+    def query_url(self, titles: list[str]) -> str:
+        """
+        Returns url resolving redirects and existence of up to
+        API_BATCH_SIZE titles at once.
+        """
+        return self._url({"action": "query", "titles": "|".join(titles)})
+
+    @staticmethod
+    def _decode(body: str) -> dict:
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise ArticleFetchError(f"Invalid API response: {e}")
+        if "error" in data:
+            error = data["error"]
+            raise ArticleFetchError(
+                f"API error '{error.get('code')}': {error.get('info')}")
+        return data
+
+    def read_parse(self, body: str) -> ApiPage:
+        """
+        Decodes action=parse response.
+        Raises ArticleFetchError if the API returned an error.
+        """
+
+        parse = self._decode(body).get("parse")
+        if not parse or "text" not in parse:
+            raise ArticleFetchError("API response without parsed text.")
+
+        text = parse["text"]
+        if isinstance(text, dict):
+            # formatversion=1 keeps the html under '*'
+            text = text["*"]
+        if not has_content_div(text):
+            # older wikis wrap the content only in 'mw-parser-output'
+            text = f'<div class="{CONTENT_DIV_CLASS}">{text}</div>'
+
+        return ApiPage(
+            title=parse["title"],
+            html=f"<html><body>{text}</body></html>",
+            redirects=[(r["from"], r["to"])
+                       for r in parse.get("redirects", [])],
+        )
+
+    def read_query(
+        self,
+        body: str,
+        titles: list[str]
+    ) -> dict[str, str | None]:
+        """
+        Decodes action=query response for the requested titles. Maps every
+        title to the title of the article it leads to (after normalization
+        and redirects) or to None if the article doesn't exist.
+        """
+
+        query = self._decode(body).get("query", {})
+        normalized = {n["from"]: n["to"] for n in query.get("normalized", [])}
+        redirects = {r["from"]: r["to"] for r in query.get("redirects", [])}
+        missing = {
+            page["title"] for page in query.get("pages", [])
+            if page.get("missing") or page.get("invalid")
+        }
+
+        targets = {}
+        for title in titles:
+            target = normalized.get(title, title)
+            # the API follows only a single redirect
+            target = redirects.get(target, target)
+            targets[title] = None if target in missing else target
+        return targets
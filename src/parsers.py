@@ -0,0 +1,434 @@
+import re
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Iterator
+from .exceptions import ContentExtractionError
+
+
+CONTENT_DIV_CLASS = 'mw-content-ltr mw-parser-output'
+
+CONTENT_DIV_START = re.compile(
+    r'<div\b[^>]*\bclass\s*=\s*["\']\s*mw-content-ltr\s+mw-parser-output\s*["\']')
+# MediaWiki puts the print footer right after the article content.
+_CONTENT_DIV_END = '<div class="printfooter"'
+
+
+def slice_content_div(content: str) -> str:
+    """
+    Cuts the raw html down to the part starting with the content div, up to
+    the print footer that follows it. Parser closes the div on its own, so
+    the head, navigation, footer and scripts are never parsed. Returns
+    the whole content if the content div can't be found.
+    """
+
+    match = CONTENT_DIV_START.search(content)
+    if match is None:
+        return content
+
+    start = match.start()
+    end = content.find(_CONTENT_DIV_END, start)
+    return content[start:end] if end != -1 else content[start:]
+
+
+def has_content_div(content: str) -> bool:
+    return CONTENT_DIV_START.search(content) is not None
+
+
+@dataclass
+class ContentScan:
+    """
+    Everything collected during a single traversal of the content div.
+    """
+    strings: list[str] = field(default_factory=list)
+    hrefs: list[str] = field(default_factory=list)
+    tables: list[Any] = field(default_factory=list)
+    first_paragraph: Any = None
+
+
+@dataclass
+class TableCell:
+    """
+    Cell of a table row: tag name ('td' or 'th'), its text and raw rowspan
+    and colspan attributes.
+    """
+    tag: str
+    text: str
+    rowspan: str | None = None
+    colspan: str | None = None
+
+
+@dataclass
+class TableRows:
+    """
+    Rows of a table found the same way pandas.read_html finds them:
+    head - rows of every <thead>,
+    body - rows inside any <tbody>, followed by rows directly in <table>,
+    foot - rows inside any <tfoot>.
+    Elements hidden with 'display:none' and <style> elements are skipped.
+    """
+    head: list[list[TableCell]] = field(default_factory=list)
+    body: list[list[TableCell]] = field(default_factory=list)
+    foot: list[list[TableCell]] = field(default_factory=list)
+
+
+def _is_dropped(tag: str, style: str | None) -> bool:
+    # pandas.read_html drops these before reading table rows
+    return tag == 'style' or 'display:none' in (style or '').replace(' ', '')
+
+
+# bs4 and lxml are imported by the backend methods, so choosing a backend
+# (or only listing them for --help) doesn't load any parser library.
+
+
+class SoupBackend:
+    """
+    Parser backend building a BeautifulSoup tree with the given
+    BeautifulSoup tree builder ('html.parser' or 'lxml').
+    """
+
+    def __init__(self, features: str):
+        self.features = features
+
+    def parse(self, content: str):
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(content, self.features)
+
+    def parse_content(self, content: str):
+        """
+        Parses only the content div subtree, returns None if it is missing.
+        """
+        from bs4 import BeautifulSoup, SoupStrainer
+        strainer = SoupStrainer('div', attrs={'class': CONTENT_DIV_CLASS})
+        soup = BeautifulSoup(
+            slice_content_div(content), self.features, parse_only=strainer)
+        return self.find_content_div(soup)
+
+    def find_content_div(self, root):
+        return root.find('div', class_=CONTENT_DIV_CLASS)
+
+    def find(self, node, tag: str):
+        return node.find(tag)
+
+    def find_all(self, node, tag: str, limit: int | None = None) -> list:
+        return node.find_all(tag, limit=limit)
+
+    def strings(self, node) -> Iterator[str]:
+        return node.strings
+
+    def text(self, node) -> str:
+        return node.get_text()
+
+    def hrefs(self, node) -> Iterator[str]:
+        for a_tag in node.find_all('a', href=True):
+            yield str(a_tag['href'])
+
+    def scan(self, node) -> ContentScan:
+        """
+        Collects text strings, link targets, tables and the first paragraph
+        of the node in one pass over its descendants.
+        """
+        from bs4 import NavigableString, Tag
+
+        scan = ContentScan()
+        # the same string types as node.strings yields
+        types = node.interesting_string_types
+        if isinstance(types, type):
+            types = (types,)
+
+        for element in node.descendants:
+            if isinstance(element, NavigableString):
+                if type(element) in types:
+                    scan.strings.append(element)
+            elif isinstance(element, Tag):
+                name = element.name
+                if name == 'a':
+                    href = element.get('href')
+                    if href is not None:
+                        scan.hrefs.append(str(href))
+                elif name == 'table':
+                    scan.tables.append(element)
+                elif name == 'p' and scan.first_paragraph is None:
+                    scan.first_paragraph = element
+
+        return scan
+
+    def _table_text(self, node, parts: list[str]) -> None:
+        from bs4.element import PreformattedString, Tag
+        for child in node.children:
+            if isinstance(child, Tag):
+                if _is_dropped(child.name, child.get('style')):
+                    continue
+                if child.name == 'br':
+                    parts.append('\n')
+                self._table_text(child, parts)
+            elif not isinstance(child, PreformattedString):
+                # comments, doctypes and such are not text
+                parts.append(child)
+
+    def _table_cells(self, row) -> list[TableCell]:
+        from bs4 import Tag
+        cells = []
+        for child in row.children:
+            if isinstance(child, Tag) and child.name in ('td', 'th') and \
+                    not _is_dropped(child.name, child.get('style')):
+                parts = []
+                self._table_text(child, parts)
+                cells.append(TableCell(
+                    child.name, ''.join(parts),
+                    child.get('rowspan'), child.get('colspan')
+                ))
+        return cells
+
+    def _child_rows(self, node) -> list:
+        from bs4 import Tag
+        return [
+            child for child in node.children
+            if isinstance(child, Tag) and child.name == 'tr' and
+            not _is_dropped(child.name, child.get('style'))
+        ]
+
+    def table_rows(self, table) -> TableRows:
+        """
+        Collects rows of the table with cell texts, without serializing it.
+        """
+        from bs4 import Tag
+
+        rows = TableRows()
+
+        def walk(node, in_tbody: bool, in_tfoot: bool) -> None:
+            for child in node.children:
+                if not isinstance(child, Tag) or \
+                        _is_dropped(child.name, child.get('style')):
+                    continue
+                name = child.name
+                if name == 'tr':
+                    if in_tbody:
+                        rows.body.append(self._table_cells(child))
+                    if in_tfoot:
+                        rows.foot.append(self._table_cells(child))
+                elif name == 'thead':
+                    rows.head.extend(
+                        self._table_cells(tr) for tr in self._child_rows(child))
+                    # <thead> with cells but without <tr>
+                    root_cells = self._table_cells(child)
+                    if root_cells:
+                        rows.head.append(root_cells)
+                walk(child, in_tbody or name == 'tbody',
+                     in_tfoot or name == 'tfoot')
+
+        walk(table, False, False)
+        rows.body.extend(
+            self._table_cells(tr) for tr in self._child_rows(table))
+        return rows
+
+
+class LxmlBackend:
+    """
+    Parser backend working directly on the lxml.html tree. Text is extracted
+    the same way BeautifulSoup does it, so results match the other backends.
+    """
+
+    # BeautifulSoup keeps strings inside these tags out of extracted text.
+    _HIDDEN_TEXT_TAGS = frozenset(
+        ('script', 'style', 'template', 'rt', 'rp'))
+    _PRESERVE_WHITESPACE_TAGS = frozenset(('pre', 'textarea'))
+    _ASCII_SPACES = str.maketrans('', '', '\x20\x0a\x09\x0c\x0d')
+
+    def parse(self, content: str):
+        import lxml.etree
+        import lxml.html
+        try:
+            return lxml.html.document_fromstring(content)
+        except lxml.etree.ParserError:
+            # empty document
+            return None
+
+    def parse_content(self, content: str):
+        """
+        Parses only the content div subtree, returns None if it is missing.
+        """
+        return self.find_content_div(self.parse(slice_content_div(content)))
+
+    def find_content_div(self, root):
+        if root is None:
+            return None
+        found = root.xpath(
+            '//div[normalize-space(@class)=$cls]', cls=CONTENT_DIV_CLASS)
+        return found[0] if found else None
+
+    def find(self, node, tag: str):
+        return next(node.iterdescendants(tag), None)
+
+    def find_all(self, node, tag: str, limit: int | None = None) -> list:
+        return list(islice(node.iterdescendants(tag), limit or None))
+
+    def _normalize(self, text: str, preserve: bool) -> str:
+        # BeautifulSoup replaces whitespace-only strings with a single
+        # newline or space.
+        if preserve or text.translate(self._ASCII_SPACES):
+            return text
+        return '\n' if '\n' in text else ' '
+
+    def _iter_strings(self, node, preserve: bool) -> Iterator[str]:
+        if node.text:
+            yield self._normalize(node.text, preserve)
+
+        for child in node:
+            if isinstance(child.tag, str):
+                if child.tag not in self._HIDDEN_TEXT_TAGS:
+                    yield from self._iter_strings(
+                        child,
+                        preserve or child.tag in self._PRESERVE_WHITESPACE_TAGS
+                    )
+            if child.tail:
+                yield self._normalize(child.tail, preserve)
+
+    def strings(self, node) -> Iterator[str]:
+        preserve = any(
+            el.tag in self._PRESERVE_WHITESPACE_TAGS
+            for el in node.iterancestors()
+        ) or node.tag in self._PRESERVE_WHITESPACE_TAGS
+        return self._iter_strings(node, preserve)
+
+    def text(self, node) -> str:
+        return ''.join(self.strings(node))
+
+    def _scan(self, node, preserve: bool, scan: ContentScan) -> None:
+        strings = scan.strings
+        if node.text:
+            strings.append(self._normalize(node.text, preserve))
+
+        for child in node:
+            tag = child.tag
+            if isinstance(tag, str):
+                if tag == 'a':
+                    href = child.get('href')
+                    if href is not None:
+                        scan.hrefs.append(href)
+                elif tag == 'table':
+                    scan.tables.append(child)
+                elif tag == 'p' and scan.first_paragraph is None:
+                    scan.first_paragraph = child
+
+                if tag in self._HIDDEN_TEXT_TAGS:
+                    # text is hidden, but links and tables inside still count
+                    hidden = ContentScan()
+                    self._scan(child, preserve, hidden)
+                    scan.hrefs.extend(hidden.hrefs)
+                    scan.tables.extend(hidden.tables)
+                    if scan.first_paragraph is None:
+                        scan.first_paragraph = hidden.first_paragraph
+                else:
+                    self._scan(
+                        child,
+                        preserve or tag in self._PRESERVE_WHITESPACE_TAGS,
+                        scan
+                    )
+            if child.tail:
+                strings.append(self._normalize(child.tail, preserve))
+
+    def scan(self, node) -> ContentScan:
+        """
+        Collects text strings, link targets, tables and the first paragraph
+        of the node in one recursive pass over its subtree.
+        """
+        scan = ContentScan()
+        self._scan(node, node.tag in self._PRESERVE_WHITESPACE_TAGS, scan)
+        return scan
+
+    def hrefs(self, node) -> Iterator[str]:
+        for a_tag in node.iterdescendants('a'):
+            href = a_tag.get('href')
+            if href is not None:
+                yield href
+
+    def _table_text(self, node, preserve: bool, parts: list[str]) -> None:
+        if node.text:
+            parts.append(self._normalize(node.text, preserve))
+        for child in node:
+            # text of comments is skipped, their tail is not
+            if isinstance(child.tag, str) and \
+                    not _is_dropped(child.tag, child.get('style')):
+                if child.tag == 'br':
+                    parts.append('\n')
+                self._table_text(
+                    child,
+                    preserve or child.tag in self._PRESERVE_WHITESPACE_TAGS,
+                    parts
+                )
+            if child.tail:
+                parts.append(self._normalize(child.tail, preserve))
+
+    def _table_cells(self, row) -> list[TableCell]:
+        cells = []
+        for child in row:
+            if child.tag in ('td', 'th') and \
+                    not _is_dropped(child.tag, child.get('style')):
+                parts = []
+                self._table_text(
+                    child, child.tag in self._PRESERVE_WHITESPACE_TAGS, parts)
+                cells.append(TableCell(
+                    child.tag, ''.join(parts),
+                    child.get('rowspan'), child.get('colspan')
+                ))
+        return cells
+
+    def _child_rows(self, node) -> list:
+        return [
+            child for child in node
+            if child.tag == 'tr' and
+            not _is_dropped(child.tag, child.get('style'))
+        ]
+
+    def table_rows(self, table) -> TableRows:
+        """
+        Collects rows of the table with cell texts, without serializing it.
+        """
+
+        rows = TableRows()
+
+        def walk(node, in_tbody: bool, in_tfoot: bool) -> None:
+            for child in node:
+                tag = child.tag
+                if not isinstance(tag, str) or \
+                        _is_dropped(tag, child.get('style')):
+                    continue
+                if tag == 'tr':
+                    if in_tbody:
+                        rows.body.append(self._table_cells(child))
+                    if in_tfoot:
+                        rows.foot.append(self._table_cells(child))
+                elif tag == 'thead':
+                    rows.head.extend(
+                        self._table_cells(tr) for tr in self._child_rows(child))
+                    # <thead> with cells but without <tr>
+                    root_cells = self._table_cells(child)
+                    if root_cells:
+                        rows.head.append(root_cells)
+                walk(child, in_tbody or tag == 'tbody',
+                     in_tfoot or tag == 'tfoot')
+
+        walk(table, False, False)
+        rows.body.extend(
+            self._table_cells(tr) for tr in self._child_rows(table))
+        return rows
+
+
+PARSER_BACKENDS = {
+    'html.parser': SoupBackend('html.parser'),
+    'lxml': SoupBackend('lxml'),
+    'lxml.html': LxmlBackend(),
+}
+
+
+def get_backend(name: str):
+    """
+    Returns parser backend registered under the given name.
+    """
+    try:
+        return PARSER_BACKENDS[name]
+    except KeyError:
+        raise ContentExtractionError(
+            f"Unknown parser '{name}'. Available parsers: " +
+            ", ".join(PARSER_BACKENDS) + "."
+        )
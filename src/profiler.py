@@ -0,0 +1,235 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class Profiler:
+    """
+    Collects wall time spent in named stages of the pipeline (fetch, parse,
+    tokenize, ...) and named counters (pages, bytes, ...). Stages and
+    counters are created on first use. Fetching threads share a single
+    profiler, results of worker processes are added with merge.
+    Stages may nest (e.g. json.save inside counts.flush) and run in
+    parallel, so their times don't have to add up to the elapsed time.
+    """
+
+    enabled = True
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self._lock = threading.Lock()
+        # stage -> [calls, seconds]
+        self._timings: dict[str, list] = {}
+        self._counters: dict[str, int | float] = {}
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.add_time(stage, self.clock() - start)
+
+    def add_time(self, stage: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            timing = self._timings.setdefault(stage, [0, 0.0])
+            timing[0] += calls
+            timing[1] += seconds
+
+    def count(self, name: str, value: int | float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def merge(self, stats: dict) -> None:
+        """
+        Adds stages and counters of stats returned by another profiler.
+        """
+
+        for stage, timing in stats["stages"].items():
+            self.add_time(stage, timing["seconds"], timing["calls"])
+        for name, value in stats["counters"].items():
+            self.count(name, value)
+
+    def stats(self) -> dict:
+        """
+        Returns elapsed time, stages, counters and rates derived from them.
+        """
+
+        elapsed = self.clock() - self.started
+        with self._lock:
+            stages = {
+                stage: {"calls": calls, "seconds": seconds}
+                for stage, (calls, seconds) in self._timings.items()
+            }
+            counters = dict(self._counters)
+
+        rates = {}
+        if elapsed > 0:
+            rates["pages_per_second"] = counters.get("pages_parsed", 0) / elapsed
+            rates["mb_per_second"] = \
+                counters.get("bytes_fetched", 0) / 1e6 / elapsed
+
+        cache_requests = sum(
+            counters.get(f"cache_{name}", 0)
+            for name in ("hits", "misses", "revalidations")
+        )
+        if cache_requests:
+            rates["cache_hit_rate"] = (
+                counters.get("cache_hits", 0)
+                + counters.get("cache_revalidations", 0)
+            ) / cache_requests
+
+        return {
+            "elapsed_seconds": elapsed,
+            "stages": stages,
+            "counters": counters,
+            "rates": rates,
+        }
+
+    def summary(self) -> str:
+        """
+        Returns stages and counters formatted as a table.
+        """
+
+        stats = self.stats()
+        elapsed = stats["elapsed_seconds"]
+
+        lines = [
+            "-----Profile-----",
+            f"{'Stage':<16}{'Calls':>8}{'Total s':>11}{'Mean ms':>11}"
+            f"{'Share':>8}",
+        ]
+        stages = sorted(
+            stats["stages"].items(), key=lambda x: x[1]["seconds"],
+            reverse=True)
+        for stage, timing in stages:
+            mean_ms = timing["seconds"] / timing["calls"] * 1000
+            share = timing["seconds"] / elapsed if elapsed > 0 else 0
+            lines.append(
+                f"{stage:<16}{timing['calls']:>8}{timing['seconds']:>11.3f}"
+                f"{mean_ms:>11.2f}{share:>8.1%}"
+            )
+
+        for name, value in sorted(stats["counters"].items()):
+            lines.append(f"{name:<24}{value:>14}")
+
+        rates = stats["rates"]
+        line = f"Elapsed {elapsed:.3f} s"
+        if "pages_per_second" in rates:
+            line += (f", {rates['pages_per_second']:.1f} pages/s, "
+                     f"{rates['mb_per_second']:.2f} MB/s")
+        if "cache_hit_rate" in rates:
+            line += f", cache hit rate {rates['cache_hit_rate']:.0%}"
+        lines.append(line + ".")
+
+        return "\n".join(lines)
+
+    def to_prometheus(self, prefix: str = "wiki_scraper") -> str:
+        """
+        Returns stats in the Prometheus text exposition format, as read by
+        the node exporter textfile collector.
+        """
+
+        stats = self.stats()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        stages = stats["stages"]
+        if stages:
+            metric("stage_seconds_total", "counter",
+                   "Wall time spent in a stage.",
+                   [(f'{{stage="{stage}"}}', timing["seconds"])
+                    for stage, timing in stages.items()])
+            metric("stage_calls_total", "counter",
+                   "Number of times a stage was entered.",
+                   [(f'{{stage="{stage}"}}', timing["calls"])
+                    for stage, timing in stages.items()])
+
+        for name, value in stats["counters"].items():
+            metric(f"{_metric_name(name)}_total", "counter",
+                   f"Counter {name}.", [("", value)])
+
+        metric("elapsed_seconds", "gauge", "Duration of the run.",
+               [("", stats["elapsed_seconds"])])
+        for name, value in stats["rates"].items():
+            metric(name, "gauge", f"Rate {name}.", [("", value)])
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Writes the report to path, in the Prometheus format if path ends
+        with '.prom', as JSON otherwise. The file is replaced atomically,
+        so a collector never reads a partial report.
+        """
+
+        if path.endswith(".prom"):
+            report = self.to_prometheus()
+        else:
+            report = json.dumps(self.stats(), indent=4)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(report)
+        os.replace(tmp_path, path)
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+class NullProfiler:
+    """
+    Profiler used when profiling is off, every call does nothing.
+    """
+
+    enabled = False
+
+    _timer = nullcontext()
+
+    def timer(self, stage: str):
+        return self._timer
+
+    def add_time(self, stage: str, seconds: float, calls: int = 1) -> None:
+        pass
+
+    def count(self, name: str, value: int | float = 1) -> None:
+        pass
+
+    def merge(self, stats: dict) -> None:
+        pass
+
+
+_profiler = NullProfiler()
+
+
+def get_profiler() -> Profiler | NullProfiler:
+    """
+    Returns the profiler of the current process, instrumented code reports
+    to it.
+    """
+    return _profiler
+
+
+@contextmanager
+def profiling(profiler: Profiler | NullProfiler):
+    """
+    Makes profiler the profiler of the current process until exit.
+    """
+
+    global _profiler
+    previous = _profiler
+    _profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _profiler = previous
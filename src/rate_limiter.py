@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Represents a token bucket rate limiter shared by all crawler workers.
+    Tokens are refilled at a constant rate, so the limit applies to the
+    aggregate request rate and not to every single worker separately.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        capacity: int = 1,
+        clock=time.monotonic,
+        sleep=asyncio.sleep,
+    ):
+        """
+        interval - minimal average time (in seconds) between two requests,
+        capacity - maximal number of requests that can be issued in a burst.
+        """
+        if interval < 0:
+            raise ValueError("Interval must be greater or equal to 0.")
+        if capacity < 1:
+            raise ValueError("Capacity must be greater or equal to 1.")
+
+        self.interval = interval
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._last_refill = clock()
+        self._lock = None
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.interval == 0:
+            self._tokens = float(self.capacity)
+        else:
+            self._tokens = min(
+                float(self.capacity), self._tokens + elapsed / self.interval)
+
+    async def acquire(self) -> None:
+        """
+        Waits until a token is available and takes it.
+        """
+
+        # Lock is created lazily so it is bound to the running event loop.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await self._sleep((1 - self._tokens) * self.interval)
+                self._refill()
+            self._tokens = max(0.0, self._tokens - 1)
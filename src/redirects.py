@@ -0,0 +1,114 @@
+import json
+import os
+import re
+import threading
+from .titles import canonical_title
+
+
+# name of the redirect map kept in the cache directory
+DEFAULT_REDIRECTS_FILE = "redirects.jsonl"
+
+_CANONICAL_LINK = re.compile(r'<link\b[^>]*\brel="canonical"[^>]*>')
+_HREF = re.compile(r'\bhref="([^"]*)"')
+
+
+def canonical_link(content: str) -> str | None:
+    """
+    Returns url from <link rel="canonical"> in the head of the page.
+    MediaWiki serves the target of a redirect under the url of the
+    redirect page, only this link points at the target.
+    """
+
+    head_end = content.find("</head>")
+    head = content[:head_end] if head_end != -1 else content
+    link = _CANONICAL_LINK.search(head)
+    if link is None:
+        return None
+    href = _HREF.search(link.group(0))
+    return href.group(1) if href else None
+
+
+class RedirectMap:
+    """
+    Represents a map from canonical titles of redirect pages (aliases)
+    to canonical titles of the articles they redirect to. If `path` is
+    given, the map is loaded from it and every new alias is appended to
+    it as a JSON line, so later runs don't have to fetch the alias again.
+    """
+
+    # redirect chains longer than this are treated as loops
+    _MAX_HOPS = 10
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._aliases: dict[str, str] = {}
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._aliases[entry["alias"]] = entry["target"]
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        # a line cut off by an interrupted write
+                        continue
+        except IOError as e:
+            print(f"Error. Can't read redirect map '{self.path}': {e}")
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def resolve(self, title: str) -> str:
+        """
+        Returns canonical title of the article the title leads to,
+        following known redirects.
+        """
+
+        title = canonical_title(title)
+        with self._lock:
+            for _ in range(self._MAX_HOPS):
+                target = self._aliases.get(title)
+                if target is None or target == title:
+                    break
+                title = target
+        return title
+
+    def aliases(self) -> dict[str, str]:
+        """
+        Returns every known alias mapped to its final target.
+        """
+        with self._lock:
+            aliases = list(self._aliases)
+        return {alias: self.resolve(alias) for alias in aliases}
+
+    def add(self, alias: str, target: str) -> None:
+        """
+        Records that alias redirects to target.
+        """
+
+        alias = canonical_title(alias)
+        target = canonical_title(target)
+        if alias == target:
+            return
+
+        with self._lock:
+            if self._aliases.get(alias) == target:
+                return
+            self._aliases[alias] = target
+            if self.path:
+                self._append(alias, target)
+
+    def _append(self, alias: str, target: str) -> None:
+        line = json.dumps({"alias": alias, "target": target},
+                          ensure_ascii=False)
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except IOError as e:
+            print(f"Error. Can't save redirect map '{self.path}': {e}")
@@ -1,9 +1,26 @@
 import requests
-import os
+import time
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .wiki_article import WikiArticle
+from .http_cache import HttpCache
+from .profiler import get_profiler
+from .titles import canonical_title, title_to_path
+from .corpus import DirectoryCorpus, PackedCorpus
+from .mediawiki_api import API_BATCH_SIZE, MediaWikiApi
+from .redirects import RedirectMap, canonical_link
 from .exceptions import ArticleFetchError
 
 
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
 class WikiScraper:
     """
     Represents a scrapper responsible for fetching wiki data.
@@ -16,47 +33,229 @@ class WikiScraper:
         language: str = "en",
         use_local_html_file_instead: bool = False,
         base_path: str = "",
+        cache: HttpCache | None = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        parser: str = "html.parser",
+        redirects: RedirectMap | None = None,
+        corpus: DirectoryCorpus | PackedCorpus | None = None,
+        api_url: str | None = None,
     ):
         self.base_url = base_url.rstrip("/")
         self.language = language
         self.use_local_file = use_local_html_file_instead
         self.base_path = base_path
+        self.cache = cache
+        self.parser = parser
+        self.redirects = redirects if redirects is not None else RedirectMap()
+        # local articles are read from the corpus, by default from
+        # '<phrase>.html' files in base_path
+        self.corpus = corpus if corpus is not None \
+            else DirectoryCorpus(base_path)
+        # with api, only article content is fetched through api.php
+        self.api = MediaWikiApi(api_url) if api_url else None
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = self._create_session(pool_size, retries, backoff)
+
+    def _create_session(
+        self,
+        pool_size: int,
+        retries: int,
+        backoff: float
+    ) -> requests.Session:
+        """
+        Creates keep-alive session shared by all requests of this scraper.
+        Transient errors (429 and 5xx) are retried with exponential backoff,
+        Retry-After header sent by the server takes precedence.
+        """
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=("GET",),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({
+            "User-Agent": "wiki-scraper",
+            "Accept-Encoding": "gzip, deflate",
+        })
+        return session
+
+    def close(self) -> None:
+        """
+        Closes pooled connections and the corpus.
+        """
+        self.session.close()
+        self.corpus.close()
 
     def get_language(self) -> str:
         return self.language
 
-    def _extract_text_from_file(self, filename: str) -> str :
+    def _handle_local_file(self, phrase: str) -> str:
+        profiler = get_profiler()
         try:
-            with open(filename, "r") as f:
-                content = f.read()
-                return content
+            with profiler.timer("fetch"):
+                content = self.corpus.get(phrase)
         except IOError as e:
             raise ArticleFetchError(f"Error reading local file: {e}")
 
-    def _handle_local_file(self, phrase: str) -> str:
-        # Handle files with ' ' or '_' the same.
-        file = self.base_path + phrase + ".html"
-        file_ = self.base_path + file.replace(" ", "_")
+        if content is None:
+            raise ArticleFetchError(
+                f"Local file not found for phrase: {phrase}")
+
+        if profiler.enabled:
+            profiler.count("pages_fetched")
+            profiler.count("bytes_fetched", len(content.encode("utf-8")))
+        return content
+
+    def article_url(self, phrase: str) -> str:
+        """
+        Returns url of the article, the same for every form of its title.
+        """
+        return f"{self.base_url}/{title_to_path(phrase)}"
+
+    def resolve(self, phrase: str) -> str:
+        """
+        Returns canonical title of the article the phrase leads to,
+        following redirects seen so far.
+        """
+        return self.redirects.resolve(phrase)
+
+    def _title_from_url(self, url: str) -> str | None:
+        base_path = urlsplit(self.base_url).path + "/"
+        path = urlsplit(url).path
+        if not path.startswith(base_path):
+            return None
+        return canonical_title(path[len(base_path):])
+
+    def resolve_many(self, phrases: list[str]) -> dict[str, str | None]:
+        """
+        Returns canonical titles of articles the phrases lead to, None for
+        articles that don't exist. With api, titles are resolved by the
+        server in batches of API_BATCH_SIZE per request, otherwise only
+        redirects seen so far are followed.
+        Raises ArticleFetchError if error occurs.
+        """
 
-        if not os.path.exists(file) and not os.path.exists(file_):
-            raise ArticleFetchError(f"Local file not found for phrase: {phrase}")
+        targets = {phrase: self.resolve(phrase) for phrase in phrases}
+        if self.api is None or self.use_local_file:
+            return targets
 
-        if os.path.exists(file):
-            return self._extract_text_from_file(file)
-        else:
-            return self._extract_text_from_file(file_)
+        titles = list(dict.fromkeys(targets.values()))
+        resolved = {}
+        for i in range(0, len(titles), API_BATCH_SIZE):
+            batch = titles[i:i + API_BATCH_SIZE]
+            content, _ = self._get(self.api.query_url(batch))
+            resolved.update(self.api.read_query(content, batch))
+
+        for title, target in resolved.items():
+            if target is not None:
+                self.redirects.add(title, target)
+
+        for phrase, title in targets.items():
+            target = resolved[title]
+            targets[phrase] = canonical_title(target) if target else None
+        return targets
+
+    def _handle_api_request(self, title: str) -> str:
+        content, _ = self._get(self.api.parse_url(title))
+        page = self.api.read_parse(content)
+
+        for alias, target in page.redirects:
+            self.redirects.add(alias, target)
+        self.redirects.add(title, page.title)
+
+        return page.html
 
     def _handle_online_request(self, phrase: str) -> str:
-        url = f"{self.base_url}/{phrase.replace(' ', '_')}"
+        # Known redirects are resolved before asking the server, so the
+        # request (or the cache) uses the url of the target article.
+        title = self.resolve(phrase)
+        if self.api:
+            return self._handle_api_request(title)
+
+        content, final_url = self._get(self.article_url(title))
+
+        # The server may redirect with a http redirect or serve the target
+        # under the requested url and point at it with the canonical link.
+        target = self._title_from_url(canonical_link(content) or final_url)
+        if target:
+            self.redirects.add(title, target)
+
+        return content
+
+    def _get(self, url: str) -> tuple[str, str]:
+        """
+        Returns html content and the final url (after http redirects)
+        of the page, using the cache if there is one.
+        """
+
+        entry = self.cache.get(url) if self.cache else None
+        if entry and entry.is_fresh(self.cache.ttl, time.time()):
+            self.cache.record("hits")
+            return entry.body, url
+
+        # Stale entries are revalidated with a conditional request.
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
 
+        profiler = get_profiler()
         try:
-            response = requests.get(url)
+            with profiler.timer("fetch"):
+                response = self.session.get(
+                    url, headers=headers, timeout=self.timeout)
+            profiler.count("pages_fetched")
+            profiler.count("bytes_fetched", len(response.content))
+
+            if entry and response.status_code == 304:
+                self.cache.refresh(url)
+                self.cache.record("revalidations")
+                return entry.body, url
 
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
             raise ArticleFetchError(f"Network error fetching '{url}': {e}.")
 
-        return response.text
+        if self.cache:
+            self.cache.record("misses")
+            self.cache.put(
+                url,
+                response.text,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+
+        return response.text, response.url
+
+    def fetch(self, phrase: str) -> str:
+        """
+        Returns raw html content of the article without parsing it.
+        Raises ArticleFetchError if error occurs.
+        """
+
+        if self.use_local_file:
+            return self._handle_local_file(phrase)
+        return self._handle_online_request(phrase)
 
     def scrape(self, phrase: str) -> WikiArticle:
         """
@@ -64,9 +263,12 @@ class WikiScraper:
         Raises ArticleFetchError if error occurs.
         """
 
-        if self.use_local_file:
-            content = self._handle_local_file(phrase)
-        else:
-            content = self._handle_online_request(phrase)
+        content = self.fetch(phrase)
 
-        return WikiArticle(phrase, content, self.language)
+        return self.article_from_content(phrase, content)
+
+    def article_from_content(self, phrase: str, content: str) -> WikiArticle:
+        """
+        Wraps already fetched html content into WikiArticle object.
+        """
+        return WikiArticle(phrase, content, self.language, self.parser)
@@ -0,0 +1,367 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from .exceptions import ShardError
+from .frontier import Frontier
+from .titles import canonical_title
+from .visited import VisitedSet
+
+
+# Layout of the shared directory of a sharded crawl:
+#   crawl.json                       - start phrase, depth and shard count
+#   alive-<shard>                    - touched while the shard runs
+#   abandoned-<shard>                - the shard stopped with an error
+#   depth-<d>/<sender>-to-<shard>-<r>.jsonl
+#                                    - links found at depth d in round r on
+#                                      pages of sender, owned by shard, and
+#                                      titles forwarded to shard
+#   depth-<d>/done-<sender>-<r>.json - sender finished round r of depth d,
+#                                      numbers of links it queued and of
+#                                      titles it forwarded
+#   counts-<shard>-of-<shards>.jsonl - word counts of the shard
+#
+# A depth has more rounds when redirects lead to titles of other shards:
+# they are forwarded to their owners, which visit them at the same depth.
+
+_CRAWL_FILE = "crawl.json"
+DEFAULT_SHARD_TIMEOUT = 600.0
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """
+    Parses 'I/N' (shard I of N, counted from 0) for argparse.
+    """
+
+    try:
+        shard, shards = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"'{value}' is not a shard, expected I/N, e.g. 0/4")
+    if not 0 <= shard < shards:
+        raise argparse.ArgumentTypeError(
+            f"Shard index must be between 0 and {shards - 1}.")
+    return shard, shards
+
+
+def shard_of(title: str, shards: int) -> int:
+    """
+    Returns index of the shard owning the title. The hash is stable
+    between processes and machines, unlike hash().
+    """
+
+    digest = hashlib.blake2b(
+        canonical_title(title).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % shards
+
+
+def counts_shard_path(directory: str, shard: int, shards: int) -> str:
+    return os.path.join(directory, f"counts-{shard}-of-{shards}.jsonl")
+
+
+def _write_atomic(path: str, data: dict) -> None:
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+class ShardMailbox:
+    """
+    Represents the exchange of links between crawler processes, each of
+    them crawling the titles its shard owns. Links to titles of other
+    shards are written to files in the shared directory, at the end of
+    every depth the shards wait for each other and read links sent to
+    them, so the crawl stays breadth-first across all processes.
+
+    While the crawl runs, a thread touches the alive file of the shard
+    every `timeout` / 4 seconds. Waiting shards fail with ShardError when
+    another shard abandoned the crawl or was not alive for `timeout`
+    seconds, e.g. its process was killed.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        shard: int,
+        shards: int,
+        poll_interval: float = 0.2,
+        timeout: float = DEFAULT_SHARD_TIMEOUT,
+    ):
+        if timeout <= 0:
+            raise ValueError("Shard timeout must be greater than 0.")
+
+        self.directory = directory
+        self.shard = shard
+        self.shards = shards
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._frontier = None
+        self._outboxes = {}
+        self._depth = 0
+        self._round = 0
+        # links queued and titles forwarded in the current round
+        self._queued = 0
+        self._forwarded = 0
+        # links queued by all shards in the finished rounds of the depth
+        self._total = 0
+        self._heartbeat = None
+        self._stopped = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    def join(self, start_phrase: str, max_depth: int) -> None:
+        """
+        Registers the crawl in the shared directory.
+        Raises ValueError if the directory belongs to another crawl.
+        """
+
+        crawl = {"start_phrase": canonical_title(start_phrase),
+                 "max_depth": max_depth, "shards": self.shards}
+        path = os.path.join(self.directory, _CRAWL_FILE)
+        try:
+            with open(path, "x", encoding="utf-8") as f:
+                json.dump(crawl, f)
+            existing = crawl
+        except FileExistsError:
+            existing = self._read_crawl(path)
+
+        if existing != crawl:
+            raise ValueError(
+                f"Directory '{self.directory}' belongs to a crawl from "
+                f"'{existing['start_phrase']}' with depth "
+                f"{existing['max_depth']} and {existing['shards']} shards.")
+        # a resumed shard takes part again
+        try:
+            os.remove(self._marker_path("abandoned", self.shard))
+        except FileNotFoundError:
+            pass
+
+    def _read_crawl(self, path: str) -> dict:
+        # written by another shard, wait until it is complete
+        for _ in range(100):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                time.sleep(self.poll_interval)
+        raise ValueError(f"Can't read '{path}'.")
+
+    def owns(self, title: str) -> bool:
+        return shard_of(title, self.shards) == self.shard
+
+    def _level_dir(self, depth: int) -> str:
+        return os.path.join(self.directory, f"depth-{depth}")
+
+    def _marker_path(self, kind: str, shard: int) -> str:
+        return os.path.join(self.directory, f"{kind}-{shard}")
+
+    def _beat(self) -> None:
+        path = self._marker_path("alive", self.shard)
+        while True:
+            with open(path, "a"):
+                os.utime(path)
+            if self._stopped.wait(self.timeout / 4):
+                return
+
+    def open_level(
+        self,
+        depth: int,
+        frontier: Frontier,
+        saved: dict | None = None,
+    ) -> None:
+        """
+        Starts collecting links found at the depth, links of this shard
+        go straight to the frontier. `saved` is the state returned by
+        checkpoint, links written after it are dropped from the outboxes.
+        """
+
+        if self._heartbeat is None:
+            self._stopped.clear()
+            self._heartbeat = threading.Thread(target=self._beat, daemon=True)
+            self._heartbeat.start()
+
+        os.makedirs(self._level_dir(depth), exist_ok=True)
+        self._frontier = frontier
+        self._outboxes = {}
+        self._depth = depth
+        self._round = self._queued = self._forwarded = self._total = 0
+        if saved:
+            self._round = int(saved["round"])
+            self._queued = int(saved["queued"])
+            self._forwarded = int(saved["forwarded"])
+            self._total = int(saved["total"])
+            for owner, size in saved["outboxes"].items():
+                path = self._outbox_path(int(owner))
+                os.truncate(path, size)
+                self._outboxes[int(owner)] = open(path, "a", encoding="utf-8")
+
+    def checkpoint(self) -> dict:
+        """
+        Flushes the outboxes and returns what open_level needs to continue
+        the depth from this point.
+        """
+
+        sizes = {}
+        for owner, outbox in self._outboxes.items():
+            outbox.flush()
+            sizes[str(owner)] = os.fstat(outbox.fileno()).st_size
+        return {"round": self._round, "queued": self._queued,
+                "forwarded": self._forwarded, "total": self._total,
+                "outboxes": sizes}
+
+    def _outbox_path(self, owner: int, sender: int | None = None) -> str:
+        sender = self.shard if sender is None else sender
+        return os.path.join(self._level_dir(self._depth),
+                            f"{sender}-to-{owner}-{self._round}.jsonl")
+
+    def _send(self, owner: int, message: list) -> None:
+        outbox = self._outboxes.get(owner)
+        if outbox is None:
+            outbox = self._outboxes[owner] = open(
+                self._outbox_path(owner), "w", encoding="utf-8")
+        outbox.write(json.dumps(message, ensure_ascii=False))
+        outbox.write("\n")
+
+    def add(self, title: str, page: int, link: int) -> None:
+        """
+        Queues link found on the page at the position of the current
+        level, see Frontier.add.
+        """
+
+        self._queued += 1
+        # positions of pages of different shards interleave, so the
+        # order is the same in every run
+        owner = shard_of(title, self.shards)
+        if owner == self.shard:
+            self._frontier.add(title, page * self.shards + self.shard, link)
+        else:
+            self._send(owner, [title, page, link])
+
+    def forward(self, title: str, page: int) -> None:
+        """
+        Passes a title of another shard, which the page at the position
+        of the current level redirects to, to be visited at this depth.
+        """
+
+        self._forwarded += 1
+        self._send(shard_of(title, self.shards), [title, page])
+
+    def _done_path(self, shard: int) -> str:
+        return os.path.join(self._level_dir(self._depth),
+                            f"done-{shard}-{self._round}.json")
+
+    def _check_alive(self, shard: int, waited: float) -> None:
+        """
+        Raises ShardError if the shard abandoned the crawl or was not alive
+        for longer than the timeout.
+        """
+
+        if os.path.exists(self._marker_path("abandoned", shard)):
+            raise ShardError(f"Shard {shard} abandoned the crawl.")
+        # a shard not started yet (or resumed after a crash) gets the
+        # whole timeout from the moment the wait began
+        silent = waited
+        try:
+            silent = min(silent, time.time() - os.path.getmtime(
+                self._marker_path("alive", shard)))
+        except FileNotFoundError:
+            pass
+        if silent > self.timeout:
+            raise ShardError(
+                f"Shard {shard} didn't respond for {self.timeout:g} s "
+                f"at depth {self._depth}.")
+
+    def _wait_for_shards(self) -> tuple[int, int]:
+        """
+        Waits until every shard finishes the round, returns numbers of
+        links queued and titles forwarded by all of them.
+        Raises ShardError if a shard stopped responding.
+        """
+
+        done = {}
+        started = time.monotonic()
+        waiting_reported = False
+        while len(done) < self.shards:
+            for shard in range(self.shards):
+                if shard in done:
+                    continue
+                try:
+                    with open(self._done_path(shard), "r",
+                              encoding="utf-8") as f:
+                        done[shard] = json.load(f)
+                except FileNotFoundError:
+                    self._check_alive(shard, time.monotonic() - started)
+            if len(done) < self.shards:
+                if not waiting_reported:
+                    print(f"Waiting for other shards to finish depth "
+                          f"{self._depth}...")
+                    waiting_reported = True
+                time.sleep(self.poll_interval)
+        return (sum(data["queued"] for data in done.values()),
+                sum(data["forwarded"] for data in done.values()))
+
+    def exchange(
+        self,
+        visited: VisitedSet,
+    ) -> tuple[int, list[str] | None]:
+        """
+        Finishes a round of the current depth: publishes links and
+        forwarded titles, waits for all shards, adds links they sent to
+        the frontier and marks forwarded titles as visited, except already
+        visited ones. Returns number of links queued by all shards in the
+        depth (0 means the crawl is over everywhere) and titles forwarded
+        to this shard, to be visited before the next round, or None when
+        the depth is over.
+        Raises ShardError if a shard stopped responding.
+        """
+
+        for outbox in self._outboxes.values():
+            outbox.close()
+        self._outboxes = {}
+
+        _write_atomic(self._done_path(self.shard),
+                      {"queued": self._queued, "forwarded": self._forwarded})
+        queued, forwarded = self._wait_for_shards()
+        self._total += queued
+
+        titles = []
+        for sender in range(self.shards):
+            path = self._outbox_path(self.shard, sender)
+            if sender == self.shard or not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    message = json.loads(line)
+                    title, page = message[0], message[1]
+                    if title in visited:
+                        continue
+                    if len(message) == 2:
+                        visited.add(title)
+                        titles.append((page, sender, title))
+                    else:
+                        self._frontier.add(
+                            title, page * self.shards + sender, message[2])
+
+        self._round += 1
+        self._queued = self._forwarded = 0
+        if not forwarded:
+            self._frontier = None
+            return self._total, None
+        return self._total, [title for _, _, title in sorted(titles)]
+
+    def close(self, failed: bool = False) -> None:
+        """
+        Stops the heartbeat, `failed` tells other shards waiting for this
+        one to give up.
+        """
+
+        for outbox in self._outboxes.values():
+            outbox.close()
+        self._outboxes = {}
+        if failed:
+            _write_atomic(self._marker_path("abandoned", self.shard), {})
+        if self._heartbeat is not None:
+            self._stopped.set()
+            self._heartbeat.join()
+            self._heartbeat = None
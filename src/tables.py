@@ -0,0 +1,173 @@
+import re
+from typing import TYPE_CHECKING
+from .parsers import TableCell, TableRows
+from .exceptions import ContentExtractionError
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Tables are turned into DataFrames the same way pandas.read_html does it,
+# but from rows of the already parsed article instead of re-parsing
+# the serialized table.
+
+_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+
+# (column index, text, rows left) of a cell spanning following rows
+_Remainder = list[tuple[int, str, int]]
+
+
+def _remove_whitespace(text: str) -> str:
+    return _WHITESPACE.sub(" ", text.strip())
+
+
+def _expand_spans(
+    rows: list[list[TableCell]],
+    remainder: _Remainder | None = None,
+    overflow: bool = True,
+) -> tuple[list[list[str]], _Remainder]:
+    """
+    Turns rows of cells into rows of texts, text of a cell with rowspan or
+    colspan is copied to every cell it spans. Cells spanning past the
+    last row are returned as remainder when overflow is True, otherwise
+    extra rows are added for them.
+    """
+
+    all_texts = []
+    remainder = remainder if remainder is not None else []
+
+    for row in rows:
+        texts = []
+        next_remainder = []
+
+        index = 0
+        for cell in row:
+            # texts of cells from previous rows that come before this one
+            while remainder and remainder[0][0] <= index:
+                prev_index, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append(
+                        (prev_index, prev_text, prev_rowspan - 1))
+                index += 1
+
+            text = _remove_whitespace(cell.text)
+            rowspan = int(cell.rowspan or 1)
+            colspan = int(cell.colspan or 1)
+
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((index, text, rowspan - 1))
+                index += 1
+
+        # texts of cells from previous rows at the end of this one
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append(
+                    (prev_index, prev_text, prev_rowspan - 1))
+
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    if not overflow:
+        while remainder:
+            next_remainder = []
+            texts = []
+            for prev_index, prev_text, prev_rowspan in remainder:
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append(
+                        (prev_index, prev_text, prev_rowspan - 1))
+            all_texts.append(texts)
+            remainder = next_remainder
+
+    return all_texts, remainder
+
+
+def rows_to_texts(
+    rows: TableRows
+) -> tuple[list[list[str]], list[list[str]], list[list[str]]]:
+    """
+    Returns header, body and footer rows as lists of cell texts. Without
+    <thead>, leading rows made only of <th> cells become the header.
+    """
+
+    head = list(rows.head)
+    body = list(rows.body)
+    if not head:
+        while body and all(cell.tag == 'th' for cell in body[0]):
+            head.append(body.pop(0))
+
+    header, remainder = _expand_spans(head)
+    body, remainder = _expand_spans(
+        body, remainder, overflow=len(rows.foot) > 0)
+    footer, _ = _expand_spans(rows.foot, remainder, overflow=False)
+
+    return header, body, footer
+
+
+def table_to_frame(rows: TableRows, header: int | None = None) -> "pd.DataFrame":
+    """
+    Builds a DataFrame indexed by the first column, with values parsed like
+    in pandas.read_html (numbers, thousands separators, missing values).
+    Raises ContentExtractionError if the table has no data.
+    """
+    from pandas.errors import EmptyDataError
+    from pandas.io.parsers import TextParser
+
+    head, body, foot = rows_to_texts(rows)
+    if head:
+        body = head + body
+        if header is None:
+            if len(head) == 1:
+                header = 0
+            else:
+                # all-empty header rows are ignored
+                header = [i for i, row in enumerate(head) if any(row)]
+    body += foot
+
+    # ragged rows are filled with empty cells
+    width = max((len(row) for row in body), default=0)
+    body = [row + [""] * (width - len(row)) for row in body]
+
+    try:
+        with TextParser(
+            body, header=header, index_col=0, skiprows=0,
+            parse_dates=False, thousands=",", decimal=".",
+            converters=None, na_values=None, keep_default_na=True,
+        ) as parser:
+            return parser.read()
+    except EmptyDataError:
+        raise ContentExtractionError("there is no data in selected table.")
+
+
+ALL_TABLES = "all"
+
+
+def parse_table_numbers(value: str) -> int | list[int] | str:
+    """
+    Parses selection of tables: a single index, comma separated indexes
+    (e.g. '1,3,5') or 'all'. Raises ValueError for anything else.
+    """
+
+    value = value.strip()
+    if value.lower() == ALL_TABLES:
+        return ALL_TABLES
+
+    numbers = [int(part) for part in value.split(",")]
+    return numbers[0] if len(numbers) == 1 else numbers
+
+
+def table_indexes(number: int | list[int] | str) -> list[int] | None:
+    """
+    Returns table indexes of a selection made by parse_table_numbers,
+    None means all tables.
+    """
+
+    if number == ALL_TABLES:
+        return None
+    if isinstance(number, int):
+        return [number]
+    return list(number)
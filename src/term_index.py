@@ -0,0 +1,297 @@
+import argparse
+import sqlite3
+import sys
+from array import array
+from typing import Iterable
+from .titles import canonical_title
+
+
+DEFAULT_INDEX_PATH = "./word-index.sqlite"
+_SCHEMA_VERSION = "1"
+# SQLite limit of parameters in a single statement
+_MAX_PARAMS = 900
+
+
+def _pack(values: Iterable[int]) -> bytes:
+    data = array("I", values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tobytes()
+
+
+def _unpack(blob: bytes) -> array:
+    data = array("I")
+    data.frombytes(blob)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data
+
+
+class TermIndex:
+    """
+    Represents per-article word counts kept in an SQLite database. Words
+    are interned in a vocabulary table and every article is stored as
+    a sparse vector: sorted arrays of word ids and counts. An inverted
+    index (word id -> articles with counts) is kept next to the vectors,
+    so articles containing a word are found without scanning them, while
+    the vector tells which postings to drop when an article is removed
+    or replaced. Totals are derived from the postings.
+
+    Changes are written on commit (and close), so they can follow
+    the flushes of the counts store.
+    """
+
+    def __init__(self, filename: str = DEFAULT_INDEX_PATH):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS vocabulary (
+                id INTEGER PRIMARY KEY,
+                word TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL UNIQUE,
+                words BLOB NOT NULL,
+                counts BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                word_id INTEGER NOT NULL,
+                article_id INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (word_id, article_id)
+            ) WITHOUT ROWID;
+        """)
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT INTO meta VALUES ('version', ?)",
+                    (_SCHEMA_VERSION,))
+        elif row[0] != _SCHEMA_VERSION:
+            self.connection.close()
+            raise ValueError(
+                f"Unsupported term index version in '{filename}'.")
+
+        # word -> id and id -> word, the vocabulary is needed by every put
+        self._ids: dict[str, int] = {}
+        self._words: dict[int, str] = {}
+        for word_id, word in self.connection.execute(
+                "SELECT id, word FROM vocabulary"):
+            self._ids[word] = word_id
+            self._words[word_id] = word
+
+    def _word_ids(self, words: Iterable[str]) -> list[int]:
+        """
+        Returns ids of the words, adding new ones to the vocabulary.
+        """
+
+        ids = []
+        new_words = []
+        for word in words:
+            word_id = self._ids.get(word)
+            if word_id is None:
+                word_id = len(self._ids) + 1
+                self._ids[word] = word_id
+                self._words[word_id] = word
+                new_words.append((word_id, word))
+            ids.append(word_id)
+        if new_words:
+            self.connection.executemany(
+                "INSERT INTO vocabulary VALUES (?, ?)", new_words)
+        return ids
+
+    def _article(self, title: str) -> tuple[int, array, array] | None:
+        row = self.connection.execute(
+            "SELECT id, words, counts FROM articles WHERE title = ?",
+            (canonical_title(title),)).fetchone()
+        if row is None:
+            return None
+        return row[0], _unpack(row[1]), _unpack(row[2])
+
+    def __len__(self) -> int:
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def __contains__(self, title: str) -> bool:
+        return self._article(title) is not None
+
+    def titles(self) -> list[str]:
+        return [title for title, in self.connection.execute(
+            "SELECT title FROM articles ORDER BY title")]
+
+    def put(self, title: str, word_dict: dict[str, int]) -> None:
+        """
+        Stores counts of the article, replacing counts stored for it
+        before. An article without words is removed.
+        """
+
+        self.remove(title)
+        if not word_dict:
+            return
+
+        ids = self._word_ids(word_dict)
+        vector = sorted(zip(ids, word_dict.values()))
+        cursor = self.connection.execute(
+            "INSERT INTO articles (title, words, counts) VALUES (?, ?, ?)",
+            (canonical_title(title), _pack(i for i, _ in vector),
+             _pack(c for _, c in vector)))
+        article_id = cursor.lastrowid
+        self.connection.executemany(
+            "INSERT INTO postings VALUES (?, ?, ?)",
+            ((word_id, article_id, count) for word_id, count in vector))
+
+    def remove(self, title: str) -> bool:
+        """
+        Removes the article, returns False if it is not in the index.
+        """
+
+        article = self._article(title)
+        if article is None:
+            return False
+        article_id, word_ids, _ = article
+        self.connection.executemany(
+            "DELETE FROM postings WHERE word_id = ? AND article_id = ?",
+            ((word_id, article_id) for word_id in word_ids))
+        self.connection.execute(
+            "DELETE FROM articles WHERE id = ?", (article_id,))
+        return True
+
+    def vector(self, title: str) -> dict[str, int] | None:
+        """
+        Returns word counts of the article or None if it is not indexed.
+        """
+
+        article = self._article(title)
+        if article is None:
+            return None
+        _, word_ids, counts = article
+        return {self._words[i]: c for i, c in zip(word_ids, counts)}
+
+    def articles_with(
+        self,
+        word: str,
+        limit: int | None = None
+    ) -> list[tuple[str, int]]:
+        """
+        Returns (title, count) of articles containing the word, the ones
+        where it occurs most often first.
+        """
+
+        word_id = self._ids.get(word)
+        if word_id is None:
+            return []
+        return self.connection.execute(
+            "SELECT a.title, p.count FROM postings p "
+            "JOIN articles a ON a.id = p.article_id WHERE p.word_id = ? "
+            "ORDER BY p.count DESC, a.title LIMIT ?",
+            (word_id, -1 if limit is None else limit)).fetchall()
+
+    def totals(self, exclude: Iterable[str] = ()) -> dict[str, int]:
+        """
+        Returns counts of every word summed over all articles except the
+        excluded ones, the same as word-counts.json of a crawl of these
+        articles would hold.
+        """
+
+        excluded = list(map(canonical_title, exclude))
+        excluded_ids = set()
+        for start in range(0, len(excluded), _MAX_PARAMS):
+            chunk = excluded[start:start + _MAX_PARAMS]
+            excluded_ids.update(article_id for article_id, in
+                                self.connection.execute(
+                                    "SELECT id FROM articles WHERE title IN "
+                                    f"({','.join('?' * len(chunk))})", chunk))
+
+        totals = {}
+        if not excluded_ids:
+            rows = self.connection.execute(
+                "SELECT word_id, SUM(count) FROM postings GROUP BY word_id")
+            for word_id, count in rows:
+                totals[self._words[word_id]] = count
+            return totals
+
+        rows = self.connection.execute(
+            "SELECT word_id, article_id, count FROM postings")
+        for word_id, article_id, count in rows:
+            if article_id not in excluded_ids:
+                word = self._words[word_id]
+                totals[word] = totals.get(word, 0) + count
+        return totals
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.connection.rollback()
+        self.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    from .counts_store import write_counts
+
+    parser = argparse.ArgumentParser(
+        description="Queries and edits the per-article term index written "
+                    "by counting modes with --term-index.")
+    parser.add_argument(
+        "--index", default=DEFAULT_INDEX_PATH, metavar="PATH",
+        help=f"Term index file (default: {DEFAULT_INDEX_PATH}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    articles = commands.add_parser(
+        "articles", help="List articles containing the word.")
+    articles.add_argument("word")
+    articles.add_argument("--limit", type=int, default=20,
+                          help="Number of articles (default: 20).")
+
+    remove = commands.add_parser(
+        "remove", help="Remove articles from the index.")
+    remove.add_argument("titles", nargs="+", metavar="TITLE")
+
+    totals = commands.add_parser(
+        "totals", help="Write word counts of the indexed articles.")
+    totals.add_argument("--output", required=True, metavar="PATH",
+                        help="JSON counts file, e.g. ./word-counts.json.")
+    totals.add_argument("--exclude", nargs="+", default=[], metavar="TITLE",
+                        help="Articles left out of the totals.")
+
+    args = parser.parse_args(argv)
+
+    try:
+        index = TermIndex(args.index)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Error. Can't open term index: {e}")
+        return 1
+
+    with index:
+        if args.command == "articles":
+            for title, count in index.articles_with(
+                    args.word.lower(), args.limit):
+                print(f"{count:>8}  {title}")
+        elif args.command == "remove":
+            for title in args.titles:
+                if not index.remove(title):
+                    print(f"'{title}' is not in the index.")
+        else:
+            words = write_counts(
+                args.output, sorted(index.totals(args.exclude).items()))
+            print(f"Wrote {words} words of {len(index)} articles "
+                  f"into '{args.output}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
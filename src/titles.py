@@ -0,0 +1,32 @@
+import re
+from urllib.parse import quote, unquote
+
+
+# characters MediaWiki leaves unescaped in article urls
+_URL_SAFE = ";@$!*(),/~:"
+
+_SPACES = re.compile(r" +")
+
+
+def canonical_title(title: str) -> str:
+    """
+    Returns the canonical form of an article title, the same for all ways
+    of linking to the article: 'Pok%C3%A9mon', 'pokémon' and 'Pokémon#Types'
+    are all 'Pokémon', 'Team_Rocket' is 'Team Rocket'. The title is
+    percent-decoded, query string and fragment are dropped, underscores
+    become spaces (runs of them collapsed, none at the ends) and the first
+    letter is uppercased like MediaWiki does.
+    """
+
+    title = title.split("#", 1)[0].split("?", 1)[0]
+    title = unquote(title).replace("_", " ")
+    title = _SPACES.sub(" ", title).strip(" ")
+    return title[:1].upper() + title[1:]
+
+
+def title_to_path(title: str) -> str:
+    """
+    Returns the url path segment of the article, e.g. 'Team_Rocket'
+    for 'team rocket'.
+    """
+    return quote(canonical_title(title).replace(" ", "_"), safe=_URL_SAFE)
@@ -0,0 +1,238 @@
+import base64
+import bisect
+import hashlib
+import math
+import sys
+from array import array
+from typing import Iterable
+
+
+# Sets of canonical titles the crawler already queued. 'exact' is a plain
+# set of strings, the other kinds keep only hashes of the titles:
+#   hashed - 64-bit hashes, about 16 bytes per title, practically exact
+#   bloom  - Bloom filter, a few bits per title, but a title that was never
+#            added is reported as present with probability fp_rate
+
+VISITED_SETS = ("exact", "hashed", "bloom")
+DEFAULT_FP_RATE = 0.001
+DEFAULT_BLOOM_CAPACITY = 1 << 16
+
+
+def _digest(title: str, size: int) -> bytes:
+    return hashlib.blake2b(title.encode("utf-8"), digest_size=size).digest()
+
+
+class HashedSet:
+    """
+    Represents a set of titles kept as 64-bit hashes in a sorted array.
+    New hashes go to a small set first and are merged into the array when
+    that set grows above 1/8 of the array, so inserts stay cheap on average.
+    Two titles with the same hash (chance about n^2 / 2^65) count as one.
+    """
+
+    _MIN_RECENT = 1024
+
+    def __init__(self, titles: Iterable[str] = ()):
+        self._sorted = array("Q")
+        self._recent = set()
+        for title in titles:
+            self.add(title)
+
+    @staticmethod
+    def _hash(title: str) -> int:
+        return int.from_bytes(_digest(title, 8), "little")
+
+    def _has(self, value: int) -> bool:
+        if value in self._recent:
+            return True
+        i = bisect.bisect_left(self._sorted, value)
+        return i < len(self._sorted) and self._sorted[i] == value
+
+    def __contains__(self, title: str) -> bool:
+        return self._has(self._hash(title))
+
+    def add(self, title: str) -> None:
+        value = self._hash(title)
+        if self._has(value):
+            return
+        self._recent.add(value)
+        if len(self._recent) > max(self._MIN_RECENT, len(self._sorted) // 8):
+            self._merge()
+
+    def _merge(self) -> None:
+        """
+        Merges the recent hashes into a new sorted array. Runs of the old
+        array between them are copied as slices, only the recent set is
+        sorted in Python.
+        """
+
+        if not self._recent:
+            return
+        old = self._sorted
+        merged = array("Q")
+        start = 0
+        for value in sorted(self._recent):
+            end = bisect.bisect_left(old, value, start)
+            merged += old[start:end]
+            merged.append(value)
+            start = end
+        merged += old[start:]
+        self._sorted = merged
+        self._recent = set()
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._recent)
+
+    def to_json(self) -> dict:
+        self._merge()
+        values = array("Q", self._sorted)
+        if sys.byteorder == "big":
+            values.byteswap()
+        return {"kind": "hashed",
+                "hashes": base64.b64encode(values.tobytes()).decode("ascii")}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "HashedSet":
+        values = array("Q")
+        values.frombytes(base64.b64decode(data["hashes"]))
+        if sys.byteorder == "big":
+            values.byteswap()
+        hashed = cls()
+        hashed._sorted = values
+        return hashed
+
+
+class _BloomSlice:
+    """
+    Single Bloom filter sized for `capacity` titles at `fp_rate`.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float, bits: bytes = None):
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.size = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits else bytearray(
+            (self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: bytes) -> Iterable[int]:
+        # double hashing: k positions from two 64-bit hashes
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7))
+                   for p in self._positions(digest))
+
+    def add(self, digest: bytes) -> None:
+        for p in self._positions(digest):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+
+class BloomFilter:
+    """
+    Represents a scalable Bloom filter of titles. When a filter is full,
+    a twice larger one with half the false positive rate is added, so
+    the total rate stays under `fp_rate` however many titles are added.
+    """
+
+    def __init__(
+        self,
+        fp_rate: float = DEFAULT_FP_RATE,
+        capacity: int = DEFAULT_BLOOM_CAPACITY,
+    ):
+        if not 0 < fp_rate < 1:
+            raise ValueError("False positive rate must be between 0 and 1.")
+        self.fp_rate = fp_rate
+        self._slices = [_BloomSlice(capacity, fp_rate / 2)]
+
+    def __contains__(self, title: str) -> bool:
+        digest = _digest(title, 16)
+        return any(digest in part for part in self._slices)
+
+    def add(self, title: str) -> None:
+        digest = _digest(title, 16)
+        if any(digest in part for part in self._slices):
+            return
+        last = self._slices[-1]
+        if last.count >= last.capacity:
+            last = _BloomSlice(2 * last.capacity, last.fp_rate / 2)
+            self._slices.append(last)
+        last.add(digest)
+
+    def __len__(self) -> int:
+        return sum(part.count for part in self._slices)
+
+    def to_json(self) -> dict:
+        return {
+            "kind": "bloom",
+            "fp_rate": self.fp_rate,
+            "slices": [
+                [part.capacity, part.fp_rate, part.count,
+                 base64.b64encode(part.bits).decode("ascii")]
+                for part in self._slices
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "BloomFilter":
+        bloom = cls(data["fp_rate"])
+        bloom._slices = []
+        for capacity, fp_rate, count, bits in data["slices"]:
+            part = _BloomSlice(capacity, fp_rate, base64.b64decode(bits))
+            part.count = count
+            bloom._slices.append(part)
+        return bloom
+
+
+VisitedSet = set[str] | HashedSet | BloomFilter
+
+
+def make_visited_set(
+    kind: str = "exact",
+    fp_rate: float = DEFAULT_FP_RATE,
+) -> VisitedSet:
+    """
+    Creates empty visited set of the given kind ('exact', 'hashed' or
+    'bloom').
+    """
+
+    if kind == "exact":
+        return set()
+    if kind == "hashed":
+        return HashedSet()
+    if kind == "bloom":
+        return BloomFilter(fp_rate)
+    raise ValueError(f"Unknown visited set '{kind}'.")
+
+
+def dump_visited(visited: VisitedSet) -> list[str] | dict:
+    """
+    Returns JSON serializable form of the visited set.
+    """
+
+    if isinstance(visited, set):
+        return sorted(visited)
+    return visited.to_json()
+
+
+def load_visited(data: list[str] | dict) -> VisitedSet:
+    """
+    Returns visited set saved by dump_visited.
+    Raises ValueError if data is not a saved visited set.
+    """
+
+    if isinstance(data, list):
+        return set(data)
+    try:
+        if data["kind"] == "hashed":
+            return HashedSet.from_json(data)
+        if data["kind"] == "bloom":
+            return BloomFilter.from_json(data)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Corrupted visited set: {e}")
+    raise ValueError(f"Unknown visited set '{data.get('kind')}'.")
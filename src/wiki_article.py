@@ -1,22 +1,84 @@
-from bs4 import BeautifulSoup
-from io import StringIO
-import pandas as pd
-import numpy as np
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Iterator
 import re
+from .parsers import get_backend
+from .tables import table_to_frame
+from .profiler import get_profiler
+from .titles import canonical_title
 from .exceptions import ContentExtractionError
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Words are \w+ tokens made only of letters. Tokens like 'mp3' or '1990s'
+# are dropped as a whole, a letters-only pattern would count their
+# letters as words instead.
+_WORD = re.compile(r'\w+')
+
+# text nodes are tokenized in chunks of about this many characters
+_CHUNK_SIZE = 1 << 16
+
+
+def _text_chunks(strings: Iterable[str], size: int) -> Iterator[str]:
+    """
+    Joins consecutive text nodes with spaces into chunks of at least size
+    characters (except the last one). Words never span two text nodes,
+    so they never span two chunks either.
+    """
+
+    chunk = []
+    length = 0
+    for string in strings:
+        chunk.append(string)
+        length += len(string)
+        if length >= size:
+            yield ' '.join(chunk)
+            chunk = []
+            length = 0
+    if chunk:
+        yield ' '.join(chunk)
+
+
+@dataclass
+class ArticleData:
+    """
+    Result of a single pass extraction of the article content.
+    summary - text of the first paragraph (None if there is no paragraph),
+    word_count - occurrences of every word, as returned by get_word_count,
+    links - unique linked phrases in order of appearance,
+    table_count - number of tables available for get_table.
+    """
+    summary: str | None
+    word_count: dict[str, int]
+    links: list[str]
+    table_count: int
+
 
 class WikiArticle:
     """
     Represents a parsed Wiki article and provides methods to extract data.
-    Handles parsing of raw HTML contnet using BeautifulSoup.
+    Handles parsing of raw HTML contnet using one of the parser backends
+    (BeautifulSoup with 'html.parser' or 'lxml', or native 'lxml.html').
+    Parsing is deferred until the first extraction and limited to the main
+    content div.
     """
 
-    def __init__(self, title: str, content: str, language: str):
+    def __init__(
+        self,
+        title: str,
+        content: str,
+        language: str,
+        parser: str = 'html.parser'
+    ):
         self.title = title
         self.content = content
         self.language = language
-        self.soup = BeautifulSoup(content, 'html.parser')
+        self.parser = get_backend(parser)
+        self._content_div = None
+        self._is_parsed = False
+        self._tables = None
         self._BANNED_PREFIXES = (
             '/wiki/File:',
             '/wiki/Template:',
@@ -29,8 +91,19 @@ class WikiArticle:
             '/wiki/Special:'
         )
 
-        self.content_div = self.soup.find(
-            'div', class_='mw-content-ltr mw-parser-output')
+    @property
+    def content_div(self):
+        """
+        Main content div of the article, parsed on first access.
+        None if the article has no content div.
+        """
+        if not self._is_parsed:
+            profiler = get_profiler()
+            with profiler.timer("parse"):
+                self._content_div = self.parser.parse_content(self.content)
+            profiler.count("pages_parsed")
+            self._is_parsed = True
+        return self._content_div
 
     def _get_content_div(self):
         """
@@ -50,25 +123,63 @@ class WikiArticle:
 
         content = self._get_content_div()
 
-        first_paragraph = content.find('p')
+        first_paragraph = self.parser.find(content, 'p')
 
-        if not first_paragraph:
+        if first_paragraph is None:
             raise ContentExtractionError(
                 f"No paragraph found in '{self.title}'")
 
-        return first_paragraph.get_text().strip()
+        return self.parser.text(first_paragraph).strip()
+
+    def _find_tables(self, limit: int | None = None) -> list:
+        content = self._get_content_div()
+
+        if self._tables is not None:
+            # tables were already indexed by extract_all or table_count
+            return self._tables[:limit]
+        return self.parser.find_all(content, 'table', limit=limit)
+
+    def table_count(self) -> int:
+        """
+        Returns number of tables available for get_table.
+        """
+        if self._tables is None:
+            self._tables = self._find_tables()
+        return len(self._tables)
+
+    def _table_frame(
+        self,
+        table,
+        use_first_row_as_header: bool
+    ) -> "pd.DataFrame":
+        import numpy as np
+
+        header_row = 0 if use_first_row_as_header else None
+        try:
+            with get_profiler().timer("table"):
+                df_table = table_to_frame(
+                    self.parser.table_rows(table), header_row)
+        except ValueError as e:
+            raise ContentExtractionError(
+                f"Pandas dataframe ValueError: {e}"
+            )
+
+        if df_table.empty:
+            raise ContentExtractionError(
+                "there is no data in selected table."
+            )
+
+        return df_table.replace(np.nan, "")
 
     def get_table(self,
                   index: int,
                   use_first_row_as_header: bool = False
-                  ) -> pd.DataFrame:
+                  ) -> "pd.DataFrame":
         """
         Extracts the nth table (index is 1-based) from the article content.
         """
 
-        content = self._get_content_div()
-
-        tables = content.find_all('table', limit=index)
+        tables = self._find_tables(limit=max(index, 0))
 
         if not tables:
             raise ContentExtractionError(
@@ -80,34 +191,7 @@ class WikiArticle:
                 f"page index should be between 1 and {len(tables)}."
             )
 
-        selected_table = tables[-1]
-        selected_table_pd = StringIO(str(selected_table))
-
-        header_row = 0 if use_first_row_as_header else None
-        try:
-            df_selected_table = pd.read_html(
-                selected_table_pd,
-                header=header_row,
-                index_col=0
-            )
-
-            if df_selected_table[0].empty:
-                raise ContentExtractionError(
-                    "there is no data in selected table."
-                )
-
-            return df_selected_table[0].replace(np.nan, "")
-        except ValueError as e:
-            raise ContentExtractionError(
-                "Pandas dataframe ValueError: {e}"
-            )
-
-    def _count_words(self, words: list[str]) -> dict[str, int]:
-        word_count = {}
-        for word in words:
-            if word.isalpha():
-                word_count[word] = word_count.get(word, 0) + 1
-        return word_count
+        return self._table_frame(tables[index - 1], use_first_row_as_header)
 
     def get_word_count(self) -> dict[str, int]:
         """
@@ -117,12 +201,21 @@ class WikiArticle:
 
         content = self._get_content_div()
 
-        text = content.get_text(separator=' ')
-        words = re.findall(r'\w+', text.lower())
+        return self._count_text(self.parser.strings(content))
+
+    def _count_text(self, strings: Iterable[str]) -> dict[str, int]:
+        """
+        Counts words of text nodes streamed in chunks, so neither the whole
+        text nor the list of all its tokens is kept in memory.
+        """
 
-        word_dict = self._count_words(words)
+        word_count = Counter()
+        with get_profiler().timer("tokenize"):
+            for chunk in _text_chunks(strings, _CHUNK_SIZE):
+                word_count.update(
+                    filter(str.isalpha, _WORD.findall(chunk.lower())))
 
-        return word_dict
+        return word_count
 
     def _is_valid_link(self, href: str) -> bool:
         """
@@ -140,14 +233,12 @@ class WikiArticle:
 
     def _process_link(self, href: str) -> str:
         """
-        Eliminate repetitions caused by '#'.
+        Returns canonical title of the linked article, which eliminates
+        repetitions caused by '#', query strings, percent-encoding,
+        underscores and lowercase first letter.
         """
 
-        if '#' in href:
-            href = href.split('#')[0]
-
-        href_phrase = href.replace('/wiki/', '')
-        return href_phrase
+        return canonical_title(href.removeprefix('/wiki/'))
 
     def get_linked_phrases(self) -> list[str]:
         """
@@ -159,12 +250,38 @@ class WikiArticle:
 
         unique_links = set()
 
-        link_candidates = content.find_all('a', href=True)
-        for a_tag in link_candidates:
-            href = str(a_tag['href'])
-
+        for href in self.parser.hrefs(content):
             if self._is_valid_link(href):
                 href_phrase = self._process_link(href)
                 unique_links.add(href_phrase)
 
         return list(unique_links)
+
+    def extract_all(self) -> ArticleData:
+        """
+        Extracts summary, word counts, linked phrases and tables in a single
+        traversal of the content div. Tables found on the way are reused by
+        later get_table calls.
+        """
+
+        content = self._get_content_div()
+
+        with get_profiler().timer("scan"):
+            scan = self.parser.scan(content)
+        self._tables = scan.tables
+
+        summary = None
+        if scan.first_paragraph is not None:
+            summary = self.parser.text(scan.first_paragraph).strip()
+
+        links = {}
+        for href in scan.hrefs:
+            if self._is_valid_link(href):
+                links[self._process_link(href)] = None
+
+        return ArticleData(
+            summary=summary,
+            word_count=self._count_text(scan.strings),
+            links=list(links),
+            table_count=len(scan.tables),
+        )
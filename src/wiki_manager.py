@@ -1,13 +1,41 @@
-from .scraper_logic import WikiScraper
-import time
-import pandas as pd
-import json
+from .scraper_logic import WikiScraper, DEFAULT_POOL_SIZE
+from .crawler import Crawler, DEFAULT_CONCURRENCY
+from .http_cache import HttpCache
+from .compression import Compression
+from .redirects import RedirectMap, DEFAULT_REDIRECTS_FILE
+from .corpus import DirectoryCorpus, PackedCorpus, open_corpus
+from .checkpoint import load_checkpoint, remove_checkpoint
+from .counts_store import (
+    CountsStore,
+    JsonCountsStore,
+    ShardCountsStore,
+    open_counts_store,
+    load_word_counts,
+    merge_counts,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_JSON_PATH,
+    SHARD_SUFFIX,
+)
+from .sharding import DEFAULT_SHARD_TIMEOUT, ShardMailbox, counts_shard_path
+from .term_index import TermIndex
+from .word_counts import WordCounts
+from .batch import BatchJob, read_batch_jobs
+from .tables import table_indexes
+from .profiler import Profiler, NullProfiler, profiling
+from .wiki_article import WikiArticle
 import os
-import wordfreq
-import matplotlib.pyplot as plt
-import numpy as np
+import sqlite3
+import sys
 from collections import deque
-from .exceptions import ArticleFetchError, ContentExtractionError
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from .exceptions import ArticleFetchError, ContentExtractionError, ShardError
+
+# pandas, numpy, wordfreq and matplotlib take most of the startup time,
+# they are imported only by the handlers that need them
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class WikiManager:
@@ -19,8 +47,83 @@ class WikiManager:
     def __init__(self, args, use_local_html_files_instead: bool = False):
         self.args = args
         self.scraper = WikiScraper(
-            use_local_html_file_instead=use_local_html_files_instead
+            use_local_html_file_instead=(
+                use_local_html_files_instead or self.args.corpus is not None),
+            cache=self._build_cache(),
+            redirects=self._build_redirects(),
+            corpus=self._open_corpus(),
+            **self._network_options(),
             )
+        # phrase -> Future with html content, filled in batch mode
+        self._prefetched: dict[str, Future] = {}
+        # per-article counts, open while the modes run with --term-index
+        self._term_index: TermIndex | None = None
+
+    def _network_options(self) -> dict:
+        """
+        Collects session and parser settings given on the command line,
+        the scraper defaults are used for the rest.
+        """
+
+        names = ("pool_size", "connect_timeout", "read_timeout",
+                 "retries", "backoff", "parser", "api_url")
+        options = {
+            name: getattr(self.args, name) for name in names
+            if getattr(self.args, name) is not None
+        }
+
+        # every concurrent crawler fetch needs its own pooled connection
+        if self.args.concurrency and "pool_size" not in options:
+            options["pool_size"] = max(
+                DEFAULT_POOL_SIZE, self.args.concurrency)
+
+        return options
+
+    def _build_cache(self) -> HttpCache | None:
+        if not self.args.cache_dir:
+            return None
+
+        options = {}
+        if self.args.cache_ttl is not None:
+            options["ttl"] = self.args.cache_ttl
+        if self.args.cache_max_size is not None:
+            options["max_size"] = int(self.args.cache_max_size * 1024 * 1024)
+
+        return HttpCache(self.args.cache_dir,
+                         compression=self._build_compression(), **options)
+
+    def _build_compression(self) -> Compression:
+        dictionary = None
+        if self.args.cache_dictionary:
+            try:
+                with open(self.args.cache_dictionary, "rb") as f:
+                    dictionary = f.read()
+            except IOError as e:
+                print(f"Error. Can't read cache dictionary: {e}")
+                sys.exit(1)
+
+        return Compression(self.args.cache_compression or "auto",
+                           self.args.cache_compression_level, dictionary)
+
+    def _open_corpus(self) -> DirectoryCorpus | PackedCorpus | None:
+        if self.args.corpus is None:
+            return None
+        try:
+            return open_corpus(self.args.corpus)
+        except (ValueError, OSError) as e:
+            print(f"Error. Can't open corpus: {e}")
+            sys.exit(1)
+
+    def _build_redirects(self) -> RedirectMap:
+        """
+        Redirects are kept in --redirect-map or next to the cached pages,
+        otherwise only for the current run.
+        """
+
+        path = self.args.redirect_map
+        if path is None and self.args.cache_dir:
+            path = os.path.join(self.args.cache_dir, DEFAULT_REDIRECTS_FILE)
+        return RedirectMap(path)
 
     def _print_license_info(self, url: str):
         print(f"\nWyjście programu na licencji zgodnej z źródłem "
@@ -32,8 +135,52 @@ class WikiManager:
         Automatically handle all given arguments.
         """
 
+        profiler = Profiler() if self.args.profile else NullProfiler()
+        with profiling(profiler):
+            try:
+                self._handle_modes()
+            finally:
+                # pooled connections and the opened corpus
+                self.scraper.close()
+
+        if profiler.enabled:
+            self._report_profile(profiler)
+
+    def _report_profile(self, profiler: Profiler) -> None:
+        if self.scraper.cache:
+            for name, value in self.scraper.cache.stats().items():
+                if name in ("hits", "misses", "revalidations"):
+                    profiler.count(f"cache_{name}", value)
+
+        print(profiler.summary())
+
+        if self.args.profile_output:
+            try:
+                profiler.write(self.args.profile_output)
+            except IOError as e:
+                print(f"Error. Can't write profile: {e}")
+
+    def _handle_modes(self) -> None:
+        if self.args.term_index is None:
+            self._run_modes()
+            return
+
+        try:
+            self._term_index = TermIndex(self.args.term_index)
+        except (ValueError, sqlite3.Error) as e:
+            print(f"Error. Can't open term index: {e}")
+            return
+        try:
+            self._run_modes()
+        finally:
+            self._term_index.close()
+            self._term_index = None
+
+    def _run_modes(self) -> None:
         phrase = ""
 
+        if self.args.batch:
+            self.handle_batch()
         if self.args.summary:
             self.handle_summary()
             phrase = self.args.summary
@@ -48,14 +195,29 @@ class WikiManager:
         if self.args.auto_count_words:
             self.handle_auto_count_words()
             phrase = self.args.auto_count_words
+        if self.args.merge_counts:
+            self.handle_merge_counts()
+
+        self._print_license_info(self.scraper.article_url(phrase))
 
-        full_url = self.scraper.base_url + "/" + phrase.replace(" ", "_")
-        self._print_license_info(full_url)
+        if self.scraper.cache:
+            print(self.scraper.cache.summary())
 
-    def handle_summary(self) -> None:
-        phrase = self.args.summary
+    def _scrape(self, phrase: str) -> WikiArticle:
+        """
+        Returns article for the phrase, reusing content prefetched
+        in batch mode if there is any.
+        """
+
+        future = self._prefetched.get(phrase)
+        if future is None:
+            return self.scraper.scrape(phrase)
+        return self.scraper.article_from_content(phrase, future.result())
+
+    def handle_summary(self, phrase: str | None = None) -> None:
+        phrase = phrase or self.args.summary
         try:
-            article = self.scraper.scrape(phrase)
+            article = self._scrape(phrase)
             summary_text = article.get_summary()
 
             print("\n-----Summary-----")
@@ -66,36 +228,78 @@ class WikiManager:
         except ContentExtractionError as e:
             print(f"Error. Failed to extract summary for '{phrase}': {e}")
 
-    def handle_table(self) -> None:
-        phrase = self.args.table
-        try:
-            article = self.scraper.scrape(phrase)
+    def _table_value_counts(self, df_table: "pd.DataFrame") -> "pd.DataFrame":
+        """
+        Counts occurrences of every cell value (as text) of the table,
+        most common values first.
+        """
+        import pandas as pd
 
-            df_table = article.get_table(
-                self.args.number,
-                self.args.first_row_is_header
-            )
+        # cells in row order, so equal counts keep order of first appearance
+        values = pd.Series(df_table.to_numpy().ravel(), dtype=object)
+        counts = values.map(str).value_counts(sort=False)
 
-            print("\n-----Table-----")
-            print(df_table.to_string(), "\n")
+        stats_df = pd.DataFrame(
+            {"Value": counts.index.to_numpy(), "Count": counts.to_numpy()})
+        return stats_df.sort_values(by="Count", ascending=False)
 
+    def _print_table(
+        self,
+        phrase: str,
+        df_table: "pd.DataFrame",
+        index: int | None = None
+    ) -> None:
+        """
+        Prints the table with its value counts and saves it to CSV. Index
+        is given when several tables of the article are printed.
+        """
+
+        if index is None:
+            print("\n-----Table-----")
             filename = f"{phrase}.csv"
-            df_table.to_csv(filename)
-            print(f"Table saved to file: '{filename}'.\n")
+        else:
+            print(f"\n-----Table {index}-----")
+            filename = f"{phrase}-{index}.csv"
+        print(df_table.to_string(), "\n")
 
-            counts = {}
+        df_table.to_csv(filename)
+        print(f"Table saved to file: '{filename}'.\n")
 
-            for row in df_table.values:
-                for item in row:
-                    val = str(item)
-                    if val in counts:
-                        counts[val] += 1
-                    else:
-                        counts[val] = 1
+        stats_df = self._table_value_counts(df_table)
+        print(stats_df.to_string(index=False), "\n")
 
-            stats_df = pd.DataFrame(counts.items(), columns=["Value", "Count"])
-            stats_df = stats_df.sort_values(by="Count", ascending=False)
-            print(stats_df.to_string(index=False), "\n")
+    def handle_table(
+        self,
+        phrase: str | None = None,
+        number: int | list[int] | str | None = None,
+        first_row_is_header: bool | None = None
+    ) -> None:
+        phrase = phrase or self.args.table
+        number = number or self.args.number
+        if first_row_is_header is None:
+            first_row_is_header = self.args.first_row_is_header
+        try:
+            article = self._scrape(phrase)
+
+            indexes = table_indexes(number)
+            if indexes is None:
+                if article.table_count() == 0:
+                    raise ContentExtractionError(
+                        f"No tables found on page '{phrase}'")
+                indexes = range(1, article.table_count() + 1)
+
+            # every table comes from the same parsed article
+            for index in indexes:
+                try:
+                    df_table = article.get_table(index, first_row_is_header)
+                except ContentExtractionError as e:
+                    print(f"Error. Table operation failed: {e}")
+                    continue
+
+                self._print_table(
+                    phrase, df_table,
+                    None if isinstance(number, int) else index
+                )
 
         except (ArticleFetchError, ContentExtractionError) as e:
             print(f"Error. Table operation failed: {e}")
@@ -104,68 +308,92 @@ class WikiManager:
 
     def _get_total_counts(
         self,
-        filename: str = "./word-counts.json"
-    ) -> dict[str, int]:
-        total_counts = {}
-        if os.path.exists(filename):
-            try:
-                with open(filename, "r", encoding="utf-8") as f:
-                    total_counts = json.load(f)
-            except json.JSONDecodeError:
-                print(
-                    f"File '{filename}' corrupted or empty, creating new one.")
-        else:
-            print(f"File '{filename}' does not exist. Creating new one.")
-
-        return total_counts
+        filename: str = DEFAULT_JSON_PATH
+    ) -> WordCounts:
+        return load_word_counts(filename)
 
     def _update_json_stats(
         self, new_words_dict: dict[str, int],
-        filename: str = "./word-counts.json"
+        filename: str = DEFAULT_JSON_PATH
     ) -> None:
-        total_counts = self._get_total_counts()
-        for word, count in new_words_dict.items():
-            total_counts[word] = total_counts.get(word, 0) + count
+        with JsonCountsStore(filename, batch_size=1) as store:
+            store.add(new_words_dict)
 
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(total_counts, f, ensure_ascii=False, indent=4)
-        except IOError as e:
-            print(f"Error occurred while saving file: {e}")
-
-        print("JSON file: 'word-counts.json' has been updated.")
+    def _open_counts_store(
+        self,
+        discard_on_error: bool = False
+    ) -> CountsStore:
+        """
+        Opens counts store selected on the command line.
+        """
+        if self.args.shard:
+            store = ShardCountsStore(
+                counts_shard_path(self.args.shard_dir, *self.args.shard),
+                self.args.counts_batch or DEFAULT_BATCH_SIZE,
+            )
+        else:
+            store = open_counts_store(
+                self.args.counts_store or "json",
+                self.args.counts_batch or DEFAULT_BATCH_SIZE,
+            )
+        store.discard_on_error = discard_on_error
+        return store
 
-    def handle_count_words(self) -> None:
-        phrase = self.args.count_words
+    def handle_count_words(
+        self,
+        phrase: str | None = None,
+        store: CountsStore | None = None
+    ) -> None:
+        phrase = phrase or self.args.count_words
 
         try:
-            article = self.scraper.scrape(phrase)
+            article = self._scrape(phrase)
             word_dict = article.get_word_count()
-            self._update_json_stats(word_dict)
+            if self._term_index is not None:
+                self._term_index.put(self.scraper.resolve(phrase), word_dict)
+            if store is not None:
+                self._add_counts(store, word_dict)
+            else:
+                with self._open_counts_store() as store:
+                    self._add_counts(store, word_dict)
 
         except ArticleFetchError as e:
             print(f"Error scraping article {phrase} : {e}.")
         except ContentExtractionError as e:
             print(f"Error. Could not extract words from '{phrase}': {e}.")
 
+    def _add_counts(
+        self,
+        store: CountsStore,
+        word_dict: dict[str, int]
+    ) -> bool:
+        """
+        Adds counts to the store, the term index is committed together
+        with the store, so a resumed crawl finds both in the same state.
+        """
+
+        saved = store.add(word_dict)
+        if saved and self._term_index is not None:
+            self._term_index.commit()
+        return saved
+
     def _get_n_most_popular(
         self,
         mode: str,
-        total_counts: dict[str, int],
+        total_counts: WordCounts,
         n: int,
         language: str = "en"
     ) -> list[str]:
         if mode == "article":
-            sorted_words = sorted(
-                total_counts.keys(), key=lambda x: total_counts[x], reverse=True
-            )
-            return sorted_words[:n]
+            from .word_frequency import top_n_words
+            return top_n_words(total_counts, n)
         else:
+            import wordfreq
             return wordfreq.top_n_list(language, n)
 
     def _handle_chart(
         self,
-        data: pd.DataFrame,
+        data: "pd.DataFrame",
         path: str,
         language: str,
         base_width: int = 6,
@@ -176,6 +404,11 @@ class WikiManager:
         wiki language and scraping data.
         """
 
+        import matplotlib
+        # the chart is only saved to a file, no GUI backend is needed
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
         n_items = len(data)
         fig_width = max(10, base_width + (n_items * per_item_width))
         fig_height = 6
@@ -206,19 +439,26 @@ class WikiManager:
             print("Warning: there is no data collected from wiki yet.")
             return None
 
+        import numpy as np
+        import pandas as pd
+        from .word_frequency import language_frequencies
+
         language = self.scraper.get_language()
 
         n_most_popular = self._get_n_most_popular(
             mode, total_counts, n_rows, language)
 
-        data = []
-        for word in n_most_popular:
-            wiki_count = total_counts.get(word, 0)
-            lang_freq = wordfreq.word_frequency(word, language)
-
-            data.append({"word": word, "wiki": wiki_count, "lang": lang_freq})
-
-        data_pd = pd.DataFrame(data).set_index("word")
+        wiki_counts = np.fromiter(
+            (total_counts.get(word, 0) for word in n_most_popular),
+            dtype=np.int64, count=len(n_most_popular)
+        )
+        data_pd = pd.DataFrame(
+            {
+                "wiki": wiki_counts,
+                "lang": language_frequencies(n_most_popular, language),
+            },
+            index=pd.Index(n_most_popular, name="word"),
+        )
 
         wiki_count_max = data_pd["wiki"].max() if data_pd["wiki"].max() > 0 else 1
         lang_freq_max = data_pd["lang"].max() if data_pd["lang"].max() > 0 else 1
@@ -243,48 +483,174 @@ class WikiManager:
 
     def handle_auto_count_words(self) -> None:
         start_phrase = self.args.auto_count_words
-        max_depth = self.args.depth
-        wait_time = self.args.wait
-
-        queue = deque([(start_phrase, 0)])
-        visited = {start_phrase}
-
-        # visiting next links untill max_depth is reached
-        # or there are no more links to visit
-        while queue:
-            current_phrase, current_depth = queue.popleft()
+        concurrency = self.args.concurrency or DEFAULT_CONCURRENCY
+        checkpoint_path = self.args.checkpoint
 
+        state = None
+        if self.args.resume:
+            try:
+                state = load_checkpoint(checkpoint_path)
+            except ValueError as e:
+                print(f"Error. Can't resume crawl: {e}")
+                return
+            if (state.start_phrase, state.max_depth) != \
+                    (start_phrase, self.args.depth):
+                print(
+                    f"Error. Checkpoint '{checkpoint_path}' belongs to a " +
+                    f"crawl from '{state.start_phrase}' with depth " +
+                    f"{state.max_depth}."
+                )
+                return
             print(
-                f"\n-----Counting Words on '{current_phrase}'" +
-                " (Depth: {current_depth})-----"
+                f"Resuming crawl at depth {state.depth}, " +
+                f"{len(state.visited)} pages already queued."
             )
+
+        mailbox = None
+        if self.args.shard:
+            mailbox = ShardMailbox(
+                self.args.shard_dir, *self.args.shard,
+                timeout=self.args.shard_timeout or DEFAULT_SHARD_TIMEOUT)
             try:
-                current_article = self.scraper.scrape(current_phrase)
-                if not current_article:
-                    print(
-                        f"Skipping '{current_phrase}'" +
-                        " (Article not found or error occurred)."
-                    )
-                    continue
+                mailbox.join(start_phrase, self.args.depth)
+            except (ValueError, OSError) as e:
+                print(f"Error. Can't join sharded crawl: {e}")
+                return
+
+        # with a checkpoint, pages of an unsaved batch are counted again
+        # by the resumed crawl
+        try:
+            with self._open_counts_store(
+                    discard_on_error=checkpoint_path is not None) as store:
+                crawler = Crawler(
+                    self.scraper,
+                    max_depth=self.args.depth,
+                    wait_time=self.args.wait,
+                    on_words=lambda word_dict: self._add_counts(
+                        store, word_dict),
+                    on_page=(self._term_index.put
+                             if self._term_index is not None else None),
+                    concurrency=concurrency,
+                    checkpoint_path=checkpoint_path,
+                    workers=self.args.workers,
+                    mailbox=mailbox,
+                    **self._crawl_options(),
+                )
+                if state:
+                    crawler.resume(state)
+                else:
+                    crawler.run(start_phrase)
+        except ShardError as e:
+            print(f"Error. Sharded crawl stopped: {e}")
+            return
+
+        # crawl finished and all counts are saved
+        if checkpoint_path:
+            remove_checkpoint(checkpoint_path)
+
+    def handle_merge_counts(self) -> None:
+        """
+        Merges count shards of a sharded crawl (and any JSON counts files)
+        into a single counts file.
+        """
+
+        inputs = []
+        for path in self.args.merge_counts:
+            if os.path.isdir(path):
+                inputs.extend(sorted(
+                    os.path.join(path, name) for name in os.listdir(path)
+                    if name.endswith(SHARD_SUFFIX)))
+            else:
+                inputs.append(path)
 
-                word_dict = current_article.get_word_count()
-                if word_dict:
-                    self._update_json_stats(word_dict)
-
-                if current_depth < max_depth:
-                    links = current_article.get_linked_phrases()
-                    for link in links:
-                        if link not in visited:
-                            visited.add(link)
-                            queue.append((link, current_depth + 1))
-
-                # Wait only if there are more links waiting for processing.
-                if queue:
-                    print(f"Waiting {wait_time}s")
-                    time.sleep(wait_time)
-            except (ArticleFetchError, ContentExtractionError) as e:
-                print(f"Skipped '{current_phrase}' - error occured : {e}.")
-                continue
-            except Exception as e:
-                print(f"Unexpected error on '{current_phrase}': {e}")
-                continue
+        output = self.args.merge_output or DEFAULT_JSON_PATH
+        try:
+            words = merge_counts(inputs, output)
+        except (ValueError, OSError) as e:
+            print(f"Error. Can't merge counts: {e}")
+            return
+        print(f"Merged {len(inputs)} files, {words} words into '{output}'.")
+
+    def _crawl_options(self) -> dict:
+        """
+        Collects frontier and visited set settings given on the command
+        line, the crawler defaults are used for the rest.
+        """
+
+        names = ("max_pages", "max_pages_per_depth", "priority",
+                 "frontier_memory", "visited_set", "fp_rate")
+        return {
+            name: getattr(self.args, name) for name in names
+            if getattr(self.args, name) is not None
+        }
+
+    def _open_batch_input(self):
+        if self.args.batch == "-":
+            # stdin stays open after the batch
+            return nullcontext(sys.stdin)
+        return open(self.args.batch, "r", encoding="utf-8")
+
+    def _run_batch_job(self, job: BatchJob, store: CountsStore) -> None:
+        print(f"\n=====[{job.mode}] {job.phrase}=====")
+        if job.mode == "summary":
+            self.handle_summary(job.phrase)
+        elif job.mode == "table":
+            self.handle_table(
+                job.phrase, job.number, job.first_row_is_header)
+        else:
+            self.handle_count_words(job.phrase, store)
+
+    def handle_batch(self) -> None:
+        """
+        Runs jobs read from the batch input with a single scraper. Pages
+        of upcoming jobs are fetched concurrently, while results are
+        printed in the input order. Upcoming jobs using the same phrase
+        share a single fetch.
+        """
+
+        concurrency = self.args.concurrency or DEFAULT_CONCURRENCY
+        lookahead = 2 * concurrency
+        window = deque()
+        users = {}
+
+        try:
+            batch_input = self._open_batch_input()
+        except IOError as e:
+            print(f"Error. Can't read batch input: {e}")
+            return
+
+        with batch_input as lines, \
+                ThreadPoolExecutor(max_workers=concurrency) as executor, \
+                self._open_counts_store() as store:
+            jobs = read_batch_jobs(
+                lines, self.args.batch_mode or "summary", self.args.number)
+
+            def schedule(job: BatchJob) -> None:
+                if job.phrase not in self._prefetched:
+                    self._prefetched[job.phrase] = executor.submit(
+                        self.scraper.fetch, job.phrase)
+                users[job.phrase] = users.get(job.phrase, 0) + 1
+                window.append(job)
+
+            for job in jobs:
+                schedule(job)
+                if len(window) >= lookahead:
+                    break
+
+            while window:
+                job = window.popleft()
+                try:
+                    self._run_batch_job(job, store)
+                except Exception as e:
+                    # a failed job doesn't stop the rest of the batch
+                    print(f"Error. Batch line {job.line_number} "
+                          f"('{job.phrase}') failed: {e}")
+
+                users[job.phrase] -= 1
+                if not users[job.phrase]:
+                    del users[job.phrase]
+                    del self._prefetched[job.phrase]
+
+                next_job = next(jobs, None)
+                if next_job is not None:
+                    schedule(next_job)
@@ -0,0 +1,310 @@
+import json
+import sys
+from array import array
+from collections.abc import Mapping
+from itertools import islice, repeat
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+_MIN_TABLE_SIZE = 8
+
+
+class WordCounts(Mapping):
+    """
+    Represents word counts in a few flat arrays instead of a dict of str
+    to int, which costs over 100 bytes per word. Words are interned: their
+    utf-8 bytes are appended to a single buffer and a word gets the id of
+    its position, the counts are an array('q') column indexed by the id.
+    Ids follow the order of insertion, so iteration order is the same as of
+    a dict filled with the same counts.
+
+    Words are found through an open addressing hash table of ids, a NumPy
+    array probed for all words of an article at once, so update has no
+    Python loop over known words. A word is identified by its 64-bit
+    hash(word), two words with the same hash (chance about n^2 / 2^65)
+    count as one.
+
+    counts_array and to_pandas share the counts column (and, with pyarrow,
+    the words) with this object, while they are alive new words can't be
+    added (BufferError), counts of known words can still change.
+    """
+
+    def __init__(
+        self,
+        counts: Mapping[str, int] | Iterable[tuple[str, int]] = ()
+    ):
+        import numpy as np
+
+        self._blob = bytearray()
+        # word i is _blob[_offsets[i]:_offsets[i + 1]]
+        self._offsets = array("q", [0])
+        # hash(word) of word i
+        self._hashes = array("q")
+        self._counts = array("q")
+        # slot -> word id, -1 for an empty slot, at most half full
+        self._table = np.full(_MIN_TABLE_SIZE, -1, np.int32)
+        self.update(counts)
+
+    def _find(self, h: int) -> int:
+        """
+        Returns id of the word with the hash, or -1.
+        """
+
+        table, hashes = self._table, self._hashes
+        mask = len(table) - 1
+        slot = h & mask
+        while True:
+            word_id = int(table[slot])
+            if word_id < 0 or hashes[word_id] == h:
+                return word_id
+            slot = (slot + 1) & mask
+
+    def _find_many(self, hashes: "np.ndarray") -> "np.ndarray":
+        """
+        Returns ids of the words with the hashes, -1 for unknown words.
+        All words take a step of probing together.
+        """
+
+        import numpy as np
+
+        table = self._table
+        mask = len(table) - 1
+        known = np.frombuffer(self._hashes, np.int64)
+        ids = np.full(len(hashes), -1, np.int64)
+        pending = np.arange(len(hashes))
+        slots = hashes & mask
+        while len(pending):
+            found = table[slots]
+            occupied = found >= 0
+            hit = occupied.copy()
+            hit[occupied] = known[found[occupied]] == hashes[pending[occupied]]
+            ids[pending[hit]] = found[hit]
+            probing = occupied & ~hit
+            pending = pending[probing]
+            slots = (slots[probing] + 1) & mask
+        return ids
+
+    def _insert(self, ids: "np.ndarray", hashes: "np.ndarray") -> None:
+        """
+        Puts ids of words with the hashes into free slots of the table.
+        """
+
+        table = self._table
+        mask = len(table) - 1
+        slots = hashes & mask
+        while len(ids):
+            free = table[slots] < 0
+            # words probing the same free slot all write it, one of them
+            # stays and the others probe further
+            table[slots[free]] = ids[free]
+            left = table[slots] != ids
+            ids, slots = ids[left], (slots[left] + 1) & mask
+
+    def _append(
+        self,
+        words: list[str],
+        hashes: "np.ndarray",
+        counts: array | None = None,
+    ) -> range:
+        """
+        Adds new words with the given counts (0 if not given), returns
+        their ids.
+        """
+
+        import numpy as np
+
+        start = len(self._counts)
+        if counts is None:
+            counts = array("q", bytes(8 * len(words)))
+        self._counts.extend(counts)
+
+        encoded = "".join(words).encode("utf-8")
+        lengths = np.fromiter(map(len, words), np.int64, len(words))
+        if len(encoded) != lengths.sum():
+            # not only ASCII, some characters take more than a byte
+            lengths = np.fromiter(
+                (len(word.encode("utf-8")) for word in words), np.int64,
+                len(words))
+        try:
+            self._blob += encoded
+        except BufferError:
+            # the words are shared with an index, keep the arrays aligned
+            del self._counts[start:]
+            raise
+        ends = lengths.cumsum()
+        ends += self._offsets[-1]
+        self._offsets.frombytes(ends.tobytes())
+        self._hashes.frombytes(hashes.tobytes())
+
+        size = len(self._table)
+        if 2 * len(self._counts) <= size:
+            self._insert(np.arange(start, len(self._counts)), hashes)
+        else:
+            while 2 * len(self._counts) > size:
+                size *= 2
+            self._table = np.full(size, -1, np.int32)
+            self._insert(np.arange(len(self._counts)),
+                         np.frombuffer(self._hashes, np.int64))
+        return range(start, len(self._counts))
+
+    def _intern(self, word: str) -> int:
+        """
+        Returns id of the word, a new word is added with count 0.
+        """
+
+        import numpy as np
+
+        h = hash(word)
+        word_id = self._find(h)
+        if word_id < 0:
+            word_id = self._append([word], np.array([h], np.int64))[0]
+        return word_id
+
+    def word_id(self, word: str) -> int | None:
+        word_id = self._find(hash(word))
+        return word_id if word_id >= 0 else None
+
+    def word(self, word_id: int) -> str:
+        offsets = self._offsets
+        return self._blob[offsets[word_id]:offsets[word_id + 1]].decode(
+            "utf-8")
+
+    def __getitem__(self, word: str) -> int:
+        word_id = self.word_id(word) if isinstance(word, str) else None
+        if word_id is None:
+            raise KeyError(word)
+        return self._counts[word_id]
+
+    def __setitem__(self, word: str, count: int) -> None:
+        self._counts[self._intern(word)] = count
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and self.word_id(word) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        offsets = self._offsets
+        # slices of the buffer decoded by maps, without a Python loop
+        slices = map(slice, offsets, islice(offsets, 1, len(self) + 1))
+        if self._blob.isascii():
+            # byte offsets are character offsets of the decoded buffer
+            return map(self._blob.decode("ascii").__getitem__, slices)
+        return map(str, map(self._blob.__getitem__, slices),
+                   repeat("utf-8"))
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def values(self) -> array:
+        return self._counts
+
+    def items(self) -> Iterator[tuple[str, int]]:
+        return zip(self, self._counts)
+
+    def add(self, word: str, count: int = 1) -> None:
+        self._counts[self._intern(word)] += count
+
+    def update(
+        self,
+        counts: Mapping[str, int] | Iterable[tuple[str, int]]
+    ) -> None:
+        """
+        Adds counts of an article (or of anything else) to these counts.
+        Known words of the article are found and counted at once, only new
+        words are added one by one.
+        """
+
+        import numpy as np
+
+        if not isinstance(counts, Mapping):
+            pairs, counts = counts, {}
+            for word, count in pairs:
+                counts[word] = counts.get(word, 0) + count
+        size = len(counts)
+        if not size:
+            return
+
+        hashes = np.fromiter(map(hash, counts), np.int64, size)
+        values = np.fromiter(counts.values(), np.int64, size)
+        ids = self._find_many(hashes)
+        new = np.flatnonzero(ids < 0)
+        if len(new):
+            words = list(counts)
+            ids[new] = self._append(
+                [words[i] for i in new.tolist()], hashes[new])
+        np.add.at(self.counts_array(), ids, values)
+
+    def total(self) -> int:
+        return sum(self._counts)
+
+    def nbytes(self) -> int:
+        """
+        Returns memory taken by the arrays holding the counts.
+        """
+
+        return sum(sys.getsizeof(data) for data in (
+            self._blob, self._offsets, self._hashes, self._counts)) + \
+            self._table.nbytes
+
+    def counts_array(self) -> "np.ndarray":
+        """
+        Returns the counts column as a NumPy int64 array without copying,
+        element i is the count of word(i).
+        """
+
+        import numpy as np
+        return np.frombuffer(self._counts, dtype=np.int64)
+
+    def to_pandas(self) -> "pd.Series":
+        """
+        Returns the counts as a Series indexed by word. The values share
+        memory with the counts column. With pyarrow installed the index
+        shares the words buffer too, otherwise the words are decoded.
+        """
+
+        import pandas as pd
+        return pd.Series(
+            self.counts_array(), index=self._words_index(), name="count",
+            copy=False)
+
+    def _words_index(self) -> "pd.Index":
+        import pandas as pd
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return pd.Index(list(self), name="word")
+
+        # the buffer and the int64 offsets are the layout of an Arrow
+        # large_string array
+        words = pa.LargeStringArray.from_buffers(
+            len(self), pa.py_buffer(self._offsets), pa.py_buffer(self._blob))
+        return pd.Index(pd.arrays.ArrowStringArray(words), name="word",
+                        copy=False)
+
+    @classmethod
+    def read_json(cls, filename: str) -> "WordCounts":
+        """
+        Reads a JSON counts file. The object is loaded with json.load and
+        its words are interned at once.
+        Raises ValueError if the file is not a JSON object of counts.
+        """
+
+        import numpy as np
+
+        with open(filename, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("Not a JSON object of counts.")
+        try:
+            column = array("q", data.values())
+        except (OverflowError, TypeError) as e:
+            raise ValueError(f"Not a JSON object of counts: {e}")
+
+        counts = cls()
+        counts._append(list(data),
+                       np.fromiter(map(hash, data), np.int64, len(data)),
+                       column)
+        return counts
@@ -0,0 +1,71 @@
+import math
+import re
+import numpy as np
+import wordfreq
+from .word_counts import WordCounts
+
+
+# Lowercase ASCII words are already in the form wordfreq tokenizes them to,
+# so their frequency can be read straight from the frequency table.
+_PLAIN_WORD = re.compile(r'[a-z]+')
+
+
+def top_n_words(
+    total_counts: dict[str, int] | WordCounts,
+    n: int
+) -> list[str]:
+    """
+    Returns words with n highest counts, most frequent first. Words with
+    equal counts keep their order from total_counts, so the result is the
+    same as of sorted(total_counts, key=total_counts.get, reverse=True)[:n].
+    Only n words are sorted, the rest is skipped with a partial partition.
+    """
+
+    words = list(total_counts)
+    if isinstance(total_counts, WordCounts):
+        counts = total_counts.counts_array()
+    else:
+        counts = np.fromiter(
+            total_counts.values(), dtype=np.int64, count=len(words))
+
+    if 0 < n < len(words):
+        # count of the n-th most frequent word, all words above it are
+        # taken and the ties are filled in original order
+        kth = np.partition(counts, len(words) - n)[len(words) - n]
+        above = np.flatnonzero(counts > kth)
+        ties = np.flatnonzero(counts == kth)[:n - len(above)]
+        selected = np.concatenate((above, ties))
+    else:
+        selected = np.arange(len(words))
+
+    # sort by count descending, then by original position
+    order = selected[np.lexsort((selected, -counts[selected]))]
+    return [words[i] for i in order[:n]]
+
+
+def _round_frequency(freq: float) -> float:
+    # the same rounding to 3 significant digits as wordfreq.word_frequency
+    if freq == 0.0:
+        return 0.0
+    leading_zeroes = math.floor(-math.log(freq, 10))
+    return round(freq, leading_zeroes + 3)
+
+
+def language_frequencies(words: list[str], language: str) -> np.ndarray:
+    """
+    Returns wordfreq.word_frequency of every word in the language.
+    Plain words are looked up in the preloaded frequency table at once,
+    only the others go through the wordfreq tokenizer.
+    """
+
+    plain = wordfreq.get_language_info(language)["tokenizer"] == "regex"
+    table = wordfreq.get_frequency_dict(language)
+
+    frequencies = np.zeros(len(words))
+    for i, word in enumerate(words):
+        if plain and _PLAIN_WORD.fullmatch(word):
+            frequencies[i] = _round_frequency(table.get(word, 0.0))
+        else:
+            frequencies[i] = wordfreq.word_frequency(word, language)
+
+    return frequencies
@@ -65,6 +65,43 @@ def get_default_args():
         mode=None,
         count=None,
         chart=False,
+        concurrency=None,
+        batch=None,
+        batch_mode=None,
+        workers=None,
+        checkpoint=None,
+        resume=False,
+        max_pages=None,
+        max_pages_per_depth=None,
+        priority=None,
+        frontier_memory=None,
+        visited_set=None,
+        fp_rate=None,
+        shard=None,
+        shard_dir=None,
+        shard_timeout=None,
+        merge_counts=None,
+        merge_output=None,
+        term_index=None,
+        cache_dir=None,
+        cache_ttl=None,
+        cache_max_size=None,
+        cache_compression=None,
+        cache_compression_level=None,
+        cache_dictionary=None,
+        redirect_map=None,
+        api_url=None,
+        pool_size=None,
+        connect_timeout=None,
+        read_timeout=None,
+        retries=None,
+        backoff=None,
+        parser=None,
+        corpus=None,
+        counts_store=None,
+        counts_batch=None,
+        profile=False,
+        profile_output=None,
     )
 
 
@@ -73,6 +110,7 @@ failure_scenarios = [
     ({"table": "Rocket", "number": None}, "Table without number"),
     ({"table": None, "number": 1}, "Number without table"),
     ({"table": "Rocket", "number": 0}, "Number is zero"),
+    ({"table": "Rocket", "number": [2, 0]}, "Zero in table numbers"),
 
     # mode selection failures
     ({}, "No mode selected"),
@@ -110,6 +148,73 @@ failure_scenarios = [
       "wait": -1.0,
       "depth": 1},
      "Crawler negative wait"),
+
+    ({"auto_count_words": "Mew",
+      "wait": 1.0,
+      "depth": 1,
+      "concurrency": 0},
+     "Crawler zero concurrency"),
+
+    ({"summary": "Mew", "concurrency": 4}, "Concurrency without crawler"),
+    ({"summary": "Mew", "checkpoint": "c.gz"}, "Checkpoint without crawler"),
+    ({"summary": "Mew", "workers": 2}, "Workers without crawler"),
+    ({"summary": "Mew", "batch": "phrases.txt"}, "Batch with another mode"),
+    ({"summary": "Mew", "batch_mode": "table"}, "Batch mode without batch"),
+    ({"batch": "-", "batch_mode": "table"}, "Table batch without number"),
+    ({"summary": "Mew", "number": [2]}, "Number without table or batch"),
+    ({"auto_count_words": "Mew", "wait": 1.0, "depth": 1, "workers": 0},
+     "Crawler zero workers"),
+    ({"auto_count_words": "Mew", "wait": 1.0, "depth": 1, "resume": True},
+     "Resume without checkpoint"),
+    ({"summary": "Mew", "max_pages": 10}, "Page budget without crawler"),
+    ({"summary": "Mew", "shard": (0, 2), "shard_dir": "s"},
+     "Shard without crawler"),
+    ({"auto_count_words": "Mew", "wait": 1.0, "depth": 1, "shard": (0, 2)},
+     "Shard without shard dir"),
+    ({"auto_count_words": "Mew", "wait": 1.0, "depth": 1, "shard": (0, 2),
+      "shard_dir": "s", "counts_store": "sqlite"}, "Shard with counts store"),
+    ({"auto_count_words": "Mew", "wait": 1.0, "depth": 1,
+      "shard_timeout": 60.0}, "Shard timeout without shard"),
+    ({"auto_count_words": "Mew", "wait": 1.0, "depth": 1, "shard": (0, 2),
+      "shard_dir": "s", "shard_timeout": 0.0}, "Zero shard timeout"),
+    ({"summary": "Mew", "merge_counts": ["s"]}, "Merge with another mode"),
+    ({"summary": "Mew", "merge_output": "c.json"}, "Merge output without merge"),
+    ({"auto_count_words": "Mew", "wait": 1.0, "depth": 1,
+      "max_pages_per_depth": 0}, "Zero pages per depth"),
+    ({"auto_count_words": "Mew", "wait": 1.0, "depth": 1,
+      "fp_rate": 0.01}, "FP rate without Bloom filter"),
+    ({"auto_count_words": "Mew", "wait": 1.0, "depth": 1,
+      "visited_set": "bloom", "fp_rate": 1.5}, "FP rate above 1"),
+
+    # counts store failures
+    ({"summary": "Mew", "counts_store": "sqlite"}, "Store without counting"),
+    ({"count_words": "Mew", "counts_batch": 0}, "Zero counts batch"),
+    ({"summary": "Mew", "term_index": "i.sqlite"}, "Index without counting"),
+
+    # cache failures
+    ({"summary": "Mew", "cache_ttl": 60}, "Cache TTL without cache dir"),
+    ({"summary": "Mew", "cache_max_size": 10}, "Cache size without cache dir"),
+    ({"summary": "Mew", "cache_dir": "c", "cache_ttl": -1}, "Negative TTL"),
+    ({"summary": "Mew", "cache_dir": "c", "cache_max_size": 0}, "Zero size"),
+    ({"summary": "Mew", "cache_compression": "gzip"},
+     "Compression without cache dir"),
+    ({"summary": "Mew", "cache_dir": "c", "cache_compression": "gzip",
+      "cache_compression_level": 10}, "Compression level out of range"),
+    ({"summary": "Mew", "cache_dir": "c", "cache_compression": "gzip",
+      "cache_dictionary": "wiki.dict"}, "Dictionary without zstd"),
+
+    # network failures
+    ({"summary": "Mew", "pool_size": 0}, "Zero pool size"),
+    ({"summary": "Mew", "connect_timeout": 0}, "Zero connect timeout"),
+    ({"summary": "Mew", "read_timeout": -1}, "Negative read timeout"),
+    ({"summary": "Mew", "retries": -1}, "Negative retries"),
+    ({"summary": "Mew", "backoff": -0.5}, "Negative backoff"),
+
+    ({"summary": "Mew", "api_url": "http://w/api.php", "corpus": "c.pack"},
+     "API with offline corpus"),
+
+    # profiling failures
+    ({"summary": "Mew", "profile_output": "p.json"}, "Output without profile"),
 ]
 
 
@@ -128,10 +233,46 @@ def test_validate_arguments_failure(overrides, description):
 success_scenarios = [
     ({"summary": "Pikachu"}, "Valid Summary"),
     ({"table": "Kanto", "number": 5, "first_row_is_header": True}, "Valid Table"),
+    ({"table": "Kanto", "number": [1, 3, 5]}, "Valid Table Numbers"),
+    ({"table": "Kanto", "number": "all"}, "Valid All Tables"),
     ({"count_words": "Eevee"}, "Valid Count Words"),
     ({"analyze_relative_word_frequency": True, "count": 10,
      "mode": "language", "chart": './van_gogh'}, "Valid Analyze"),
     ({"auto_count_words": "PO", "depth": 1000, "wait": 0.5}, "Valid Crawler"),
+    ({"auto_count_words": "PO", "depth": 2, "wait": 0.5, "concurrency": 8},
+     "Valid Concurrent Crawler"),
+    ({"auto_count_words": "PO", "depth": 2, "wait": 0.5,
+      "checkpoint": "crawl.json.gz", "resume": True}, "Valid Resumed Crawler"),
+    ({"batch": "-", "batch_mode": "count-words", "concurrency": 8,
+      "counts_store": "sqlite"}, "Valid Batch"),
+    ({"batch": "-", "batch_mode": "table", "number": [2]},
+     "Valid Table Batch"),
+    ({"auto_count_words": "PO", "depth": 2, "wait": 0, "concurrency": 16,
+      "workers": 8}, "Valid Crawler With Workers"),
+    ({"auto_count_words": "PO", "depth": 3, "wait": 0, "max_pages": 500,
+      "max_pages_per_depth": 100, "priority": "inlinks",
+      "frontier_memory": 10000, "visited_set": "bloom", "fp_rate": 0.01},
+     "Valid Bounded Crawler"),
+    ({"auto_count_words": "PO", "depth": 3, "wait": 0, "shard": (1, 4),
+      "shard_dir": "shards"}, "Valid Shard"),
+    ({"auto_count_words": "PO", "depth": 3, "wait": 0, "shard": (1, 4),
+      "shard_dir": "shards", "shard_timeout": 30.0}, "Valid Shard Timeout"),
+    ({"merge_counts": ["shards", "word-counts.json"],
+      "merge_output": "all.jsonl"}, "Valid Merge"),
+    ({"summary": "Pikachu", "cache_dir": "cache", "cache_ttl": 0,
+      "cache_max_size": 50}, "Valid Cache"),
+    ({"summary": "Pikachu", "cache_dir": "cache", "cache_compression": "gzip",
+      "cache_compression_level": 9}, "Valid Cache Compression"),
+    ({"auto_count_words": "PO", "depth": 1, "wait": 0,
+      "counts_store": "sqlite", "counts_batch": 100}, "Valid Counts Store"),
+    ({"count_words": "Eevee", "term_index": "word-index.sqlite"},
+     "Valid Term Index"),
+    ({"summary": "Pikachu", "pool_size": 4, "connect_timeout": 1,
+      "read_timeout": 10, "retries": 0, "backoff": 0}, "Valid Network"),
+    ({"auto_count_words": "PO", "depth": 1, "wait": 0,
+      "api_url": "https://bulbapedia.bulbagarden.net/w/api.php"}, "Valid API"),
+    ({"count_words": "Eevee", "profile": True,
+      "profile_output": "profile.prom"}, "Valid Profile"),
 ]
 
 
@@ -0,0 +1,165 @@
+import json
+import pytest
+from src.batch import BatchJob, parse_batch_line
+from src.scraper_logic import WikiScraper
+from src.wiki_manager import WikiManager
+from tests.local_server import LocalWiki, make_page
+from wiki_scraper import parse_arguments
+
+
+line_scenarios = [
+    ("Pikachu\n", BatchJob("summary", "Pikachu"), "Plain phrase"),
+    ("  Team Rocket  ", BatchJob("summary", "Team Rocket"), "Stripped phrase"),
+    ('{"phrase": "Kanto", "mode": "table", "number": 2}',
+     BatchJob("table", "Kanto", 2), "JSON table job"),
+    ('{"phrase": "Kanto", "mode": "count-words"}',
+     BatchJob("count-words", "Kanto"), "JSON count job"),
+    ('{"phrase": "Kanto", "mode": "table", "number": [1, 3]}',
+     BatchJob("table", "Kanto", [1, 3]), "JSON list of tables"),
+    ('{"phrase": "Kanto", "mode": "table", "number": "2,4"}',
+     BatchJob("table", "Kanto", [2, 4]), "JSON tables as in --number"),
+    ('{"phrase": "Kanto", "mode": "table", "number": "all"}',
+     BatchJob("table", "Kanto", "all"), "JSON all tables"),
+    ("", None, "Empty line"),
+]
+
+
+@pytest.mark.parametrize("line, expected, description", line_scenarios)
+def test_parse_batch_line(line, expected, description):
+    assert parse_batch_line(line, "summary") == expected, \
+        f"Failed: {description}"
+
+
+default_number_scenarios = [
+    ("Kanto", BatchJob("table", "Kanto", [2]), "Plain phrase"),
+    ('{"phrase": "Kanto"}', BatchJob("table", "Kanto", [2]),
+     "JSON job without number"),
+    ('{"phrase": "Kanto", "number": 3}', BatchJob("table", "Kanto", 3),
+     "JSON number wins"),
+    ('{"phrase": "Kanto", "mode": "summary"}', BatchJob("summary", "Kanto"),
+     "Not a table job"),
+]
+
+
+@pytest.mark.parametrize("line, expected, description",
+                         default_number_scenarios)
+def test_table_mode_uses_default_number(line, expected, description):
+    assert parse_batch_line(line, "table", [2]) == expected, \
+        f"Failed: {description}"
+
+
+invalid_lines = [
+    ('{"phrase": "Kanto"', "Broken JSON"),
+    ('{"mode": "summary"}', "Missing phrase"),
+    ('{"phrase": "Kanto", "mode": "chart"}', "Unknown mode"),
+    ('{"phrase": "Kanto", "mode": "table"}', "Table without number"),
+    ("Kanto", "Plain phrase in table mode without number"),
+    ('{"phrase": "Kanto", "mode": "table", "number": 0}', "Zero number"),
+    ('{"phrase": "Kanto", "mode": "table", "number": [1, 0]}', "Zero in list"),
+    ('{"phrase": "Kanto", "mode": "table", "number": []}', "Empty list"),
+    ('{"phrase": "Kanto", "mode": "table", "number": "1,x"}', "Bad string"),
+]
+
+
+@pytest.mark.parametrize("line, description", invalid_lines)
+def test_parse_batch_line_failure(line, description):
+    with pytest.raises(ValueError):
+        parse_batch_line(line, "table" if line == "Kanto" else "summary")
+
+
+PAGES = {
+    "A": make_page(text="first page"),
+    "B": make_page(text="second page"),
+    "C": make_page(text="third page"),
+}
+
+
+def test_batch_runs_jobs_in_order(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    batch_file = tmp_path / "batch.txt"
+    batch_file.write_text(
+        "C\n"
+        "A\n"
+        '{"phrase": "B", "mode": "count-words"}\n'
+        '{"phrase": "A", "mode": "count-words"}\n'
+        "Missing\n"
+        '{"broken\n'
+        "B\n",
+        encoding="utf-8"
+    )
+    args = parse_arguments(["--batch", str(batch_file), "--concurrency", "3"])
+
+    with LocalWiki(PAGES) as wiki:
+        manager = WikiManager(args)
+        manager.scraper = WikiScraper(base_url=wiki.base_url)
+        manager.handle_batch()
+
+    output = capsys.readouterr().out
+    positions = [output.index(text) for text in [
+        "third page", "first page", "[count-words] B", "[count-words] A",
+        "Error scraping article Missing", "second page"
+    ]]
+    assert positions == sorted(positions)
+    assert "Skipping batch line 6" in output
+
+    # every phrase was fetched once, even if used by several jobs
+    assert sorted(wiki.requests) == ["A", "B", "C", "Missing"]
+
+    with open(tmp_path / "word-counts.json", encoding="utf-8") as f:
+        counts = json.load(f)
+    assert counts == {"first": 1, "second": 1, "page": 2}
+
+
+def test_batch_goes_on_after_unexpected_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    batch_file = tmp_path / "batch.txt"
+    batch_file.write_text(
+        '{"phrase": "A", "mode": "count-words"}\n'
+        '{"phrase": "B", "mode": "count-words"}\n'
+        '{"phrase": "C", "mode": "count-words"}\n',
+        encoding="utf-8"
+    )
+    args = parse_arguments(["--batch", str(batch_file)])
+
+    class FailingScraper(WikiScraper):
+        def fetch(self, phrase):
+            if phrase == "B":
+                raise RuntimeError("connection reset")
+            return super().fetch(phrase)
+
+    with LocalWiki(PAGES) as wiki:
+        manager = WikiManager(args)
+        manager.scraper = FailingScraper(base_url=wiki.base_url)
+        manager.handle_batch()
+
+    output = capsys.readouterr().out
+    assert "Error. Batch line 2 ('B') failed: connection reset" in output
+    with open(tmp_path / "word-counts.json", encoding="utf-8") as f:
+        assert json.load(f) == {"first": 1, "third": 1, "page": 2}
+
+
+TABLE_PAGE = (
+    '<html><body><div class="mw-content-ltr mw-parser-output">'
+    '<table><tr><th>Name</th><th>Type</th></tr>'
+    '<tr><td>Bulbasaur</td><td>Grass</td></tr></table>'
+    '<table><tr><th>Region</th><th>Professor</th></tr>'
+    '<tr><td>Kanto</td><td>Oak</td></tr></table>'
+    '</div></body></html>'
+)
+
+
+def test_batch_table_mode_uses_number_argument(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    batch_file = tmp_path / "batch.txt"
+    batch_file.write_text("Starters\n", encoding="utf-8")
+    args = parse_arguments(["--batch", str(batch_file),
+                            "--batch-mode", "table", "--number", "2"])
+
+    with LocalWiki({"Starters": TABLE_PAGE}) as wiki:
+        manager = WikiManager(args)
+        manager.scraper = WikiScraper(base_url=wiki.base_url)
+        manager.handle_batch()
+
+    output = capsys.readouterr().out
+    assert "Skipping batch line" not in output
+    assert "Oak" in output and "Bulbasaur" not in output
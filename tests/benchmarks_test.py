@@ -0,0 +1,52 @@
+import pytest
+from benchmarks.article_benchmark import enlarge_content, find_regressions
+from src.wiki_article import WikiArticle
+from tests.local_server import load_fixture, make_page
+
+
+@pytest.mark.parametrize("name", ["Kanto", "pythonidae"])
+def test_enlarged_fixture_repeats_content(name):
+    content = load_fixture(name)
+    original = WikiArticle(name, content, "en").get_word_count()
+
+    enlarged = WikiArticle(name, enlarge_content(content, 3), "en")
+
+    assert enlarged.get_word_count() == {
+        word: count * 3 for word, count in original.items()}
+
+
+def test_enlarge_keeps_page_outside_content_div():
+    page = make_page("A", text="alpha <div>beta</div>")
+
+    enlarged = enlarge_content(page, 2)
+
+    assert enlarged.count("alpha") == 2
+    assert enlarged.startswith("<html><body>")
+    assert enlarged.endswith("</div></body></html>")
+
+
+def _result(best_seconds, peak_kb):
+    return {"best_seconds": best_seconds, "peak_kb": peak_kb}
+
+
+regression_scenarios = [
+    (_result(0.011, 110), [], "Within threshold"),
+    (_result(0.020, 100), ["best_seconds"], "Slower"),
+    (_result(0.010, 1000), ["peak_kb"], "More memory"),
+    (_result(0.010, 150), [], "Memory growth too small to count"),
+]
+
+
+@pytest.mark.parametrize("result, expected, description",
+                         regression_scenarios)
+def test_find_regressions(result, expected, description):
+    baseline = {"Kanto@x1": {"get_summary": _result(0.010, 100)}}
+    results = {
+        "Kanto@x1": {"get_summary": result},
+        "pizza@x1": {"get_summary": result},  # not in baseline
+    }
+
+    regressions = find_regressions(results, baseline, threshold=0.2)
+
+    assert [r.split(": ")[1].split()[0] for r in regressions] == expected, \
+        f"Failed: {description}"
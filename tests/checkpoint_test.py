@@ -0,0 +1,169 @@
+import gzip
+import json
+import os
+import pytest
+from src.checkpoint import (
+    CrawlState,
+    crawl_directory,
+    load_checkpoint,
+    remove_checkpoint,
+    save_checkpoint,
+)
+from src.counts_store import JsonCountsStore
+from src.crawler import Crawler
+from src.scraper_logic import WikiScraper
+from tests.local_server import LocalWiki, make_page
+
+
+GRAPH = {
+    "A": make_page("B", "C", "D", "E", text="alpha"),
+    "B": make_page("F", text="beta"),
+    "C": make_page("G", text="gamma"),
+    "D": make_page(text="delta"),
+    "E": make_page(text="epsilon"),
+    "F": make_page(text="phi"),
+    "G": make_page(text="gamma"),
+}
+# page texts and link labels, every page counted exactly once
+COUNTS = {
+    "alpha": 1, "beta": 1, "gamma": 2, "delta": 1, "epsilon": 1,
+    "phi": 1, "b": 1, "c": 1, "d": 1, "e": 1, "f": 1, "g": 1
+}
+
+
+class Crash(BaseException):
+    """
+    Simulates the crawler process being killed.
+    """
+
+
+class CrashingScraper(WikiScraper):
+    def __init__(self, crash_on: str, **kwargs):
+        super().__init__(**kwargs)
+        self.crash_on = crash_on
+
+    def _handle_online_request(self, phrase):
+        if phrase == self.crash_on:
+            raise Crash()
+        return super()._handle_online_request(phrase)
+
+
+def _crawl(wiki, counts_path, checkpoint_path, state=None, crash_on=None):
+    scraper = CrashingScraper(crash_on, base_url=wiki.base_url)
+    with JsonCountsStore(counts_path, batch_size=2) as store:
+        store.discard_on_error = True
+        crawler = Crawler(
+            scraper, max_depth=2, wait_time=0, on_words=store.add,
+            concurrency=1, checkpoint_path=checkpoint_path
+        )
+        if state:
+            crawler.resume(state)
+        else:
+            crawler.run("A")
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "crawl.json.gz")
+    state = CrawlState(
+        start_phrase="Pokémon", max_depth=3, depth=1,
+        level_path="level-1.jsonl", level_offset=2, level=["B", "C"],
+        visited={"Pokémon", "B", "C"}, committed={"B"},
+        frontier_runs=[("run-1.jsonl", 2)]
+    )
+
+    save_checkpoint(state, path)
+
+    assert load_checkpoint(path) == state
+
+
+def test_load_checkpoint_rejects_garbage(tmp_path):
+    path = tmp_path / "crawl.json.gz"
+    path.write_text("not a checkpoint")
+
+    with pytest.raises(ValueError):
+        load_checkpoint(str(path))
+
+
+def _valid_checkpoint() -> dict:
+    return {"version": 2, "start_phrase": "A", "max_depth": 2, "depth": 0,
+            "level_path": None, "level_offset": 1, "level": ["A"],
+            "level_start": 0, "visited": ["A"], "committed": [],
+            "frontier_runs": [], "mailbox": None, "pages": 0}
+
+
+malformed_scenarios = [
+    ([1, 2], "Not an object"),
+    ({"level": ["A"]}, "No version"),
+    ({k: v for k, v in _valid_checkpoint().items() if k != "visited"},
+     "Missing field"),
+    ({**_valid_checkpoint(), "version": 1}, "Older version"),
+    ({**_valid_checkpoint(), "committed": "B"}, "Committed not a list"),
+    ({**_valid_checkpoint(), "frontier_runs": [["run.jsonl"]]},
+     "Run without size"),
+    ({**_valid_checkpoint(), "level_path": 5}, "Level path not a name"),
+    ({**_valid_checkpoint(), "depth": None}, "Depth not a number"),
+    ({**_valid_checkpoint(), "visited": {"kind": "bloom"}},
+     "Broken visited set"),
+]
+
+
+@pytest.mark.parametrize("data, description", malformed_scenarios)
+def test_load_checkpoint_rejects_malformed_state(tmp_path, data, description):
+    path = str(tmp_path / "crawl.json.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    with pytest.raises(ValueError):
+        load_checkpoint(path)
+
+
+def test_resumed_crawl_counts_every_page_once(tmp_path):
+    counts_path = str(tmp_path / "counts.json")
+    checkpoint_path = str(tmp_path / "crawl.json.gz")
+
+    with LocalWiki(GRAPH) as wiki:
+        with pytest.raises(Crash):
+            _crawl(wiki, counts_path, checkpoint_path, crash_on="E")
+
+        state = load_checkpoint(checkpoint_path)
+        assert state.depth == 1
+        assert set(state.committed) == {"B", "C", "D"}
+
+        wiki.requests.clear()
+        _crawl(wiki, counts_path, checkpoint_path, state=state)
+
+    # only pages without saved counts are fetched again
+    assert wiki.requests == ["E", "F", "G"]
+
+    with open(counts_path, encoding="utf-8") as f:
+        counts = json.load(f)
+    assert counts == COUNTS
+    assert os.path.exists(checkpoint_path)
+
+
+def test_checkpoint_keeps_only_chunk_in_flight(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.crawler._VISIT_BATCH", 2)
+    counts_path = str(tmp_path / "counts.json")
+    checkpoint_path = str(tmp_path / "crawl.json.gz")
+
+    with LocalWiki(GRAPH) as wiki:
+        with pytest.raises(Crash):
+            _crawl(wiki, counts_path, checkpoint_path, crash_on="E")
+
+        state = load_checkpoint(checkpoint_path)
+        assert (state.depth, state.level_offset) == (1, 4)
+        assert state.level == ["D", "E"]
+        # links of the committed pages are in runs, nothing else is kept
+        assert sorted(os.listdir(crawl_directory(checkpoint_path))) == \
+            sorted([state.level_path,
+                    *(name for name, _ in state.frontier_runs)])
+
+        wiki.requests.clear()
+        _crawl(wiki, counts_path, checkpoint_path, state=state)
+
+    assert wiki.requests == ["E", "F", "G"]
+    with open(counts_path, encoding="utf-8") as f:
+        assert json.load(f) == COUNTS
+
+    remove_checkpoint(checkpoint_path)
+    assert os.listdir(tmp_path) == ["counts.json"]
@@ -0,0 +1,174 @@
+import io
+import json
+import struct
+import zlib
+import pytest
+from benchmarks.compression_benchmark import load_pages, run_benchmarks
+from src.compression import (
+    Compression,
+    detect_codec,
+    train_dictionary,
+    zstd_available,
+)
+from src.corpus import PackedCorpus, PackWriter
+from src.http_cache import HttpCache
+from tests.local_server import load_fixture
+
+needs_zstd = pytest.mark.skipif(
+    not zstd_available(), reason="zstandard is not installed")
+
+CODEC_PARAMS = [
+    "none",
+    "gzip",
+    pytest.param("zstd", marks=needs_zstd),
+]
+
+
+@pytest.mark.parametrize("codec", CODEC_PARAMS)
+def test_round_trip(codec):
+    page = load_fixture("Kanto").encode("utf-8")
+    compression = Compression(codec)
+
+    data = compression.compress(page)
+
+    assert detect_codec(data) == codec
+    assert compression.decompress(data) == page
+    assert compression.read_text(io.BytesIO(data)) == page.decode("utf-8")
+    if codec != "none":
+        assert len(data) < len(page) / 3
+
+
+def test_plain_reader_reads_every_codec():
+    page = "zażółć gęślą jaźń " * 10000
+    data = Compression("gzip", 9).compress(page.encode("utf-8"))
+
+    # multi-byte characters are split between decompressed chunks
+    assert Compression("none").read_text(io.BytesIO(data)) == page
+
+
+corrupted_scenarios = [
+    (lambda data: data[:len(data) // 2], "Truncated"),
+    (lambda data: data[:10] + b"\0" * (len(data) - 10), "Damaged"),
+]
+
+
+@pytest.mark.parametrize("damage, description", corrupted_scenarios)
+def test_corrupted_body(damage, description):
+    compression = Compression("gzip")
+    data = damage(compression.compress(load_fixture("pizza").encode("utf-8")))
+
+    with pytest.raises(ValueError):
+        compression.read_text(io.BytesIO(data))
+    with pytest.raises(ValueError):
+        compression.decompress(data)
+
+
+invalid_settings_scenarios = [
+    ({"codec": "lzma"}, "Unknown codec"),
+    ({"codec": "gzip", "level": 10}, "Level out of range"),
+    ({"codec": "gzip", "dictionary": b"dict"}, "Dictionary without zstd"),
+]
+
+
+@pytest.mark.parametrize("settings, description", invalid_settings_scenarios)
+def test_invalid_settings(settings, description):
+    with pytest.raises(ValueError):
+        Compression(**settings)
+
+
+def test_cache_stores_compressed_bodies(tmp_path):
+    page = load_fixture("Kanto")
+    url = "https://example.org/wiki/Kanto"
+    cache = HttpCache(str(tmp_path), compression=Compression("gzip"))
+
+    cache.put(url, page)
+
+    assert cache.size < len(page.encode("utf-8")) / 3
+    # a cache with other settings still reads the entry
+    assert HttpCache(str(tmp_path)).get(url).body == page
+
+
+def test_compressed_cache_reads_plain_entries(tmp_path):
+    url = "https://example.org/wiki/A"
+    HttpCache(str(tmp_path)).put(url, "<p>plain</p>")
+
+    cache = HttpCache(str(tmp_path), compression=Compression("gzip"))
+
+    assert cache.get(url).body == "<p>plain</p>"
+
+
+def test_corrupted_cache_entry_is_a_miss(tmp_path):
+    url = "https://example.org/wiki/A"
+    cache = HttpCache(str(tmp_path), compression=Compression("gzip"))
+    cache.put(url, "<p>" + "a" * 1000 + "</p>")
+    body = next(tmp_path.glob("*.body"))
+    body.write_bytes(body.read_bytes()[:20])
+
+    assert HttpCache(str(tmp_path)).get(url) is None
+    assert list(tmp_path.glob("*.body")) == []
+
+
+@pytest.mark.parametrize("codec", CODEC_PARAMS)
+def test_pack_round_trip(codec, tmp_path):
+    path = str(tmp_path / "corpus.pack")
+    page = load_fixture("pythonidae")
+
+    with PackWriter(path, Compression(codec)) as writer:
+        writer.add("Pythonidae", page)
+
+    with PackedCorpus(path) as pack:
+        assert pack.codec == codec
+        assert pack.get("pythonidae") == page
+
+
+def test_pack_of_other_version_is_rejected(tmp_path):
+    path = tmp_path / "corpus.pack"
+    record = zlib.compress("<p>old</p>".encode("utf-8"))
+    header = struct.pack("<8sI", b"WIKIPACK", 1)
+    index = zlib.compress(json.dumps(
+        {"Old": [len(header), len(record)]}).encode("utf-8"))
+    offset = len(header) + len(record)
+    path.write_bytes(header + record + index +
+                     struct.pack("<QQ8s", offset, len(index), b"WIKIPACK"))
+
+    with pytest.raises(ValueError, match="Unsupported"):
+        PackedCorpus(str(path))
+
+
+@needs_zstd
+def test_pack_with_dictionary(tmp_path):
+    pages = {name: load_fixture(name) for name in ("Kanto", "pythonidae")}
+    dictionary = train_dictionary(
+        [page.encode("utf-8") for page in pages.values()], size=16384)
+    path = str(tmp_path / "corpus.pack")
+
+    with PackWriter(path, Compression("zstd", dictionary=dictionary)) \
+            as writer:
+        for name, page in pages.items():
+            writer.add(name, page)
+
+    with PackedCorpus(path) as pack:
+        for name, page in pages.items():
+            assert pack.get(name) == page
+
+
+@needs_zstd
+def test_dictionary_is_needed_to_read(tmp_path):
+    page = load_fixture("Kanto").encode("utf-8")
+    dictionary = train_dictionary([page], size=16384)
+
+    data = Compression("zstd", dictionary=dictionary).compress(page)
+
+    with pytest.raises(ValueError):
+        Compression("none").read_text(io.BytesIO(data))
+
+
+def test_benchmark_reports_every_available_setting(capsys):
+    results = run_benchmarks(
+        load_pages(), [("none", None, False), ("gzip", 6, False),
+                       ("zstd", 3, False)], repeat=1)
+
+    expected = ["none", "gzip-6"] + (["zstd-3"] if zstd_available() else [])
+    assert list(results) == expected
+    assert results["none"]["ratio"] == 1
+    assert results["gzip-6"]["ratio"] > 3
@@ -0,0 +1,169 @@
+import os
+import pytest
+from src.corpus import (
+    DirectoryCorpus,
+    PackedCorpus,
+    PackWriter,
+    build_pack,
+    directory_articles,
+    main,
+    open_corpus,
+)
+from src.compression import Compression
+from src.exceptions import ArticleFetchError
+from src.http_cache import HttpCache
+from src.redirects import RedirectMap
+from src.scraper_logic import WikiScraper
+from src.wiki_manager import WikiManager
+from tests.local_server import DATA_DIR, load_fixture
+from wiki_scraper import parse_arguments
+
+FIXTURES = ["Kanto", "pizza", "pythonidae", "monty_python"]
+
+
+@pytest.fixture
+def pack_path(tmp_path):
+    path = str(tmp_path / "corpus.pack")
+    build_pack(path, directory_articles(DATA_DIR))
+    return path
+
+
+lookup_scenarios = [
+    ("monty_python", "monty_python", "Phrase as the file is named"),
+    ("monty python", "monty_python", "Spaces instead of underscores"),
+    ("Monty_python", "monty_python", "Canonical title"),
+    ("Kanto#History", "Kanto", "Fragment"),
+]
+
+
+@pytest.mark.parametrize("phrase, fixture, description", lookup_scenarios)
+def test_pack_and_directory_return_fixture(phrase, fixture, description,
+                                           pack_path):
+    expected = load_fixture(fixture)
+
+    with PackedCorpus(pack_path) as pack:
+        assert pack.get(phrase) == expected, f"Failed: {description}"
+    directory = DirectoryCorpus(os.path.join(DATA_DIR, ""))
+    assert directory.get(phrase) == expected, f"Failed: {description}"
+
+
+def test_missing_article(pack_path):
+    with PackedCorpus(pack_path) as pack:
+        assert pack.get("Johto") is None
+        assert "Johto" not in pack
+        assert sorted(pack.titles()) == [
+            "Kanto", "Monty python", "Pizza", "Pythonidae"]
+    assert DirectoryCorpus(os.path.join(DATA_DIR, "")).get("Johto") is None
+
+
+def test_directory_sees_files_added_later(tmp_path):
+    corpus = DirectoryCorpus(f"{tmp_path}/")
+    assert corpus.get("Team Rocket") is None
+
+    (tmp_path / "Team_Rocket.html").write_text("rocket", encoding="utf-8")
+
+    assert corpus.get("team_Rocket") == "rocket"
+
+
+def test_directory_is_listed_once(tmp_path, monkeypatch):
+    listings = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, "listdir",
+                        lambda path: listings.append(path) or listdir(path))
+    (tmp_path / "Kanto.html").write_text("kanto", encoding="utf-8")
+    corpus = DirectoryCorpus(f"{tmp_path}/")
+
+    assert [corpus.get(phrase) for phrase in ["Johto", "Hoenn", "kanto"]] \
+        == [None, None, "kanto"]
+    assert len(listings) == 1
+
+
+def test_aliases_lead_to_the_same_record(tmp_path):
+    path = str(tmp_path / "corpus.pack")
+
+    with PackWriter(path) as writer:
+        writer.add("Team_Rocket", "rocket")
+        assert writer.add_alias("Rockets", "Team Rocket")
+        assert not writer.add_alias("Johto", "Missing")
+
+    with PackedCorpus(path) as pack:
+        assert pack.get("rockets") == "rocket"
+        assert len(pack) == 2
+
+
+def test_corrupted_record_is_reported(tmp_path):
+    path = tmp_path / "corpus.pack"
+    with PackWriter(str(path), Compression("gzip")) as writer:
+        writer.add("Team_Rocket", "rocket " * 100)
+    with PackedCorpus(str(path)) as pack:
+        offset, length = pack._index["Team Rocket"]
+    data = bytearray(path.read_bytes())
+    data[offset + 10:offset + length] = b"\xff" * (length - 10)
+    path.write_bytes(bytes(data))
+
+    with PackedCorpus(str(path)) as pack:
+        with pytest.raises(IOError):
+            pack.get("Team Rocket")
+    scraper = WikiScraper(
+        use_local_html_file_instead=True, corpus=PackedCorpus(str(path)))
+    with pytest.raises(ArticleFetchError):
+        scraper.fetch("Team Rocket")
+    scraper.close()
+
+
+def test_interrupted_pack_is_not_created(tmp_path):
+    path = tmp_path / "corpus.pack"
+
+    with pytest.raises(KeyError):
+        with PackWriter(str(path)) as writer:
+            writer.add("A", "a")
+            raise KeyError
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("content", [b"", b"not a pack at all" * 4])
+def test_invalid_pack(content, tmp_path):
+    path = tmp_path / "corpus.pack"
+    path.write_bytes(content)
+
+    with pytest.raises(ValueError):
+        open_corpus(str(path))
+
+
+def test_pack_built_from_cache(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cache = HttpCache(cache_dir)
+    cache.put("https://wiki/wiki/Team_Rocket", "rocket")
+    cache.put("https://wiki/wiki/Pok%C3%A9mon", "pokemon")
+    cache.put("https://wiki/w/index.php?title=X", "skipped")
+    RedirectMap(os.path.join(cache_dir, "redirects.jsonl")).add(
+        "Rockets", "Team Rocket")
+    path = str(tmp_path / "corpus.pack")
+
+    assert main(["--from-cache", cache_dir, "--output", path]) == 0
+
+    with PackedCorpus(path) as pack:
+        assert sorted(pack.titles()) == ["Pokémon", "Rockets", "Team Rocket"]
+        assert pack.get("Pok%C3%A9mon") == "pokemon"
+        assert pack.get("Rockets") == "rocket"
+
+
+def test_scraper_reads_pack(pack_path):
+    scraper = WikiScraper(
+        use_local_html_file_instead=True, corpus=PackedCorpus(pack_path))
+
+    assert scraper.fetch("pizza") == load_fixture("pizza")
+    scraper.close()
+
+
+def test_corpus_argument(pack_path, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    args = parse_arguments(["--summary", "Pythonidae", "--corpus", pack_path])
+
+    manager = WikiManager(args)
+    manager.handle_args()
+
+    assert "-----Summary-----" in capsys.readouterr().out
+    # the pack is unmapped when the modes are done
+    assert manager.scraper.corpus._map.closed
@@ -0,0 +1,126 @@
+import json
+import os
+import pytest
+from src.counts_store import (
+    CountsStore,
+    JsonCountsStore,
+    SqliteCountsStore,
+    load_word_counts,
+)
+
+
+ARTICLES = [
+    {"pikachu": 2, "mew": 1},
+    {"mew": 3, "ząb": 1},
+    {"pikachu": 1},
+]
+EXPECTED = {"pikachu": 3, "mew": 4, "ząb": 1}
+
+
+def _read_json(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 10])
+def test_json_store_merges_articles(tmp_path, batch_size):
+    path = str(tmp_path / "counts.json")
+
+    with JsonCountsStore(path, batch_size=batch_size) as store:
+        for word_dict in ARTICLES:
+            store.add(word_dict)
+
+    assert _read_json(path) == EXPECTED
+
+
+def test_store_flushes_once_per_batch(tmp_path):
+    path = str(tmp_path / "counts.json")
+    store = JsonCountsStore(path, batch_size=2)
+
+    assert store.add(ARTICLES[0]) is False
+    assert not os.path.exists(path)
+    assert store.add(ARTICLES[1]) is True
+    assert _read_json(path) == {"pikachu": 2, "mew": 4, "ząb": 1}
+
+    assert store.add(ARTICLES[2]) is False
+    store.close()
+    assert _read_json(path) == EXPECTED
+
+
+def test_json_store_reads_file_only_when_changed(tmp_path, monkeypatch):
+    path = str(tmp_path / "counts.json")
+    loads = []
+
+    def counting_load(filename):
+        loads.append(filename)
+        return load_word_counts(filename)
+
+    monkeypatch.setattr("src.counts_store.load_word_counts", counting_load)
+    with JsonCountsStore(path, batch_size=1) as store:
+        store.add(ARTICLES[0])
+        store.add(ARTICLES[1])
+        assert len(loads) == 1
+
+        # written by someone else between the flushes
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"mew": 10, "bulbasaur": 1}, f, indent=4)
+        store.add(ARTICLES[2])
+
+    assert len(loads) == 2
+    assert _read_json(path) == {"mew": 10, "bulbasaur": 1, "pikachu": 1}
+
+
+@pytest.mark.parametrize("batch_size", [1, 2])
+def test_sqlite_store_exports_json(tmp_path, batch_size):
+    json_path = str(tmp_path / "counts.json")
+    db_path = str(tmp_path / "counts.sqlite")
+
+    with SqliteCountsStore(db_path, json_path, batch_size) as store:
+        for word_dict in ARTICLES:
+            store.add(word_dict)
+        store.flush()
+        assert store.totals() == EXPECTED
+
+    assert _read_json(json_path) == EXPECTED
+
+
+def test_sqlite_store_continues_existing_counts(tmp_path):
+    json_path = str(tmp_path / "counts.json")
+    db_path = str(tmp_path / "counts.sqlite")
+
+    with SqliteCountsStore(db_path, json_path) as store:
+        store.add(ARTICLES[0])
+
+    with SqliteCountsStore(db_path, json_path) as store:
+        store.add(ARTICLES[1])
+
+    # JSON changed behind the database's back, it has to be reloaded
+    with JsonCountsStore(json_path, batch_size=1) as store:
+        store.add(ARTICLES[2])
+
+    with SqliteCountsStore(db_path, json_path) as store:
+        assert store.totals() == EXPECTED
+
+
+@pytest.mark.parametrize("discard_on_error, expected", [
+    (False, {"pikachu": 2, "mew": 1}),
+    (True, None),
+])
+def test_store_left_with_exception(tmp_path, discard_on_error, expected):
+    path = str(tmp_path / "counts.json")
+
+    with pytest.raises(KeyboardInterrupt):
+        with JsonCountsStore(path, batch_size=10) as store:
+            store.discard_on_error = discard_on_error
+            store.add(ARTICLES[0])
+            raise KeyboardInterrupt
+
+    if expected is None:
+        assert not os.path.exists(path)
+    else:
+        assert _read_json(path) == expected
+
+
+def test_base_store_is_abstract():
+    with pytest.raises(TypeError):
+        CountsStore()
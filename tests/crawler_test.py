@@ -0,0 +1,204 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+import pytest
+from src.crawler import Crawler
+from src.rate_limiter import TokenBucket
+from src.scraper_logic import WikiScraper
+from src.wiki_article import WikiArticle
+from tests.local_server import LocalWiki, load_fixture, make_page
+
+
+class FakeClock:
+    """
+    Helper clock that only moves forward when someone sleeps.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_spaces_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(2.0, clock=clock, sleep=clock.sleep)
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(take(4))
+
+    # first token is available immediately, the rest are 2s apart
+    assert clock.sleeps == pytest.approx([2.0, 2.0, 2.0])
+    assert clock.now == pytest.approx(6.0)
+
+
+def test_token_bucket_zero_interval_never_waits():
+    clock = FakeClock()
+    bucket = TokenBucket(0, clock=clock, sleep=clock.sleep)
+
+    asyncio.run(asyncio.wait_for(bucket.acquire(), 1))
+    asyncio.run(asyncio.wait_for(bucket.acquire(), 1))
+
+    assert clock.sleeps == []
+
+
+GRAPH = {
+    "A": make_page("B", "C", text="alpha"),
+    "B": make_page("D", text="beta"),
+    "C": make_page("D", "E", "Missing", text="gamma"),
+    "D": make_page("F", text="delta"),
+    "E": make_page("A", text="epsilon"),
+    "F": make_page(text="phi"),
+}
+
+
+@pytest.mark.parametrize(
+    "concurrency, workers", [(1, None), (4, None), (4, 2)])
+def test_crawler_keeps_bfs_depth_and_dedup(concurrency, workers):
+    counted = []
+
+    with LocalWiki(GRAPH) as wiki:
+        scraper = WikiScraper(base_url=wiki.base_url)
+        crawler = Crawler(
+            scraper, max_depth=2, wait_time=0,
+            on_words=counted.append, concurrency=concurrency,
+            workers=workers
+        )
+        crawler.run("A")
+
+    # F is only reachable at depth 3, every page is requested once
+    assert sorted(wiki.requests) == ["A", "B", "C", "D", "E", "Missing"]
+    assert crawler.visited == {"A", "B", "C", "D", "E", "Missing"}
+
+    words = {word for word_dict in counted for word in word_dict}
+    assert "phi" not in words
+    assert {"alpha", "beta", "gamma", "delta", "epsilon"} <= words
+
+
+def test_crawler_runs_fetches_concurrently():
+    pages = {"Root": make_page(*[f"P{i}" for i in range(8)])}
+    pages.update({f"P{i}": make_page(text="leaf") for i in range(8)})
+
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    class SlowScraper(WikiScraper):
+        def _handle_online_request(self, phrase):
+            nonlocal in_flight, max_in_flight
+            with lock:
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+            time.sleep(0.05)
+            try:
+                return super()._handle_online_request(phrase)
+            finally:
+                with lock:
+                    in_flight -= 1
+
+    with LocalWiki(pages) as wiki:
+        crawler = Crawler(
+            SlowScraper(base_url=wiki.base_url), max_depth=1, wait_time=0,
+            on_words=lambda word_dict: None, concurrency=4
+        )
+        crawler.run("Root")
+
+    assert len(wiki.requests) == 9
+    assert max_in_flight == 4
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_crawler_on_local_fixture(workers):
+    counted = []
+    content = load_fixture("Kanto")
+
+    with LocalWiki({"Kanto": content}) as wiki:
+        crawler = Crawler(
+            WikiScraper(base_url=wiki.base_url), max_depth=0, wait_time=0,
+            on_words=counted.append, workers=workers
+        )
+        crawler.run("Kanto")
+
+    assert wiki.requests == ["Kanto"]
+    assert counted == [WikiArticle("Kanto", content, "en").get_word_count()]
+
+
+def _crawl_graph(pages, start, redirects=None, on_words=None, **options):
+    visits = []
+
+    class RecordingScraper(WikiScraper):
+        def fetch(self, phrase):
+            visits.append(phrase)
+            return super().fetch(phrase)
+
+    with LocalWiki(pages) as wiki:
+        wiki.redirects.update(redirects or {})
+        crawler = Crawler(
+            RecordingScraper(base_url=wiki.base_url), wait_time=0,
+            on_words=on_words or (lambda word_dict: None), concurrency=1,
+            **options
+        )
+        crawler.run(start)
+    return visits, crawler
+
+
+# C and D are linked from both pages of depth 1, E only from X
+RANKED_GRAPH = {
+    "A": make_page("X", "Y", text="root"),
+    "X": make_page("E", "C", "D", text="x"),
+    "Y": make_page("D", "C", text="y"),
+    "C": make_page(text="c"),
+    "D": make_page(text="d"),
+    "E": make_page(text="e"),
+}
+
+limit_scenarios = [
+    ({}, ["A", "X", "Y", "E", "C", "D"], "No limits"),
+    ({"max_pages": 4}, ["A", "X", "Y", "E"], "Page budget"),
+    ({"max_pages_per_depth": 2}, ["A", "X", "Y", "E", "C"],
+     "Per-depth cap in discovery order"),
+    ({"max_pages_per_depth": 2, "priority": "inlinks"},
+     ["A", "X", "Y", "C", "D"], "Per-depth cap of the most linked pages"),
+    ({"priority": "inlinks", "frontier_memory": 1, "visited_set": "hashed"},
+     ["A", "X", "Y", "C", "D", "E"], "Spilled frontier, hashed set"),
+]
+
+
+@pytest.mark.parametrize("options, expected, description", limit_scenarios)
+def test_crawler_limits_and_priority(options, expected, description):
+    visits, _ = _crawl_graph(RANKED_GRAPH, "A", max_depth=2, **options)
+
+    assert visits == expected, f"Failed: {description}"
+
+
+def test_crawler_with_bloom_filter_visits_every_page_once():
+    visits, crawler = _crawl_graph(
+        GRAPH, "A", max_depth=3, visited_set="bloom", fp_rate=0.0001)
+
+    assert sorted(visits) == ["A", "B", "C", "D", "E", "F", "Missing"]
+    assert "F" in crawler.visited
+    assert len(crawler.visited) == 7
+
+
+def test_redirect_target_linked_directly_is_visited_once():
+    counts = Counter()
+    # R redirects to B, which X links at the next depth
+    pages = {"A": make_page("X", "R", text="alpha"),
+             "X": make_page("B", text="x"),
+             "B": make_page(text="beta")}
+
+    visits, _ = _crawl_graph(pages, "A", redirects={"R": "B"}, max_depth=2,
+                             on_words=counts.update)
+
+    assert visits == ["A", "X", "R"]
+    assert counts["beta"] == 1
@@ -0,0 +1,91 @@
+import os
+import pytest
+from src.frontier import Frontier
+
+# (title, page position, link position) in the order pages finished
+LINKS = [
+    ("D", 2, 0), ("C", 2, 1),
+    ("B", 0, 0), ("E", 0, 1), ("C", 0, 2), ("D", 0, 3),
+    ("C", 1, 0),
+]
+
+pop_scenarios = [
+    ("bfs", None, (), ["B", "E", "C", "D"], "Order of discovery"),
+    ("inlinks", None, (), ["C", "D", "B", "E"], "Most linked first"),
+    ("bfs", 2, (), ["B", "E"], "Limited"),
+    ("inlinks", 1, (), ["C"], "Limited most linked"),
+    ("inlinks", 0, (), [], "Nothing left of the budget"),
+    ("bfs", 2, {"B"}, ["E", "C"], "Excluded titles don't use the limit"),
+]
+
+
+@pytest.mark.parametrize("memory_limit", [100, 1, 2])
+@pytest.mark.parametrize("priority, limit, exclude, expected, description",
+                         pop_scenarios)
+def test_pop_order(priority, limit, exclude, expected, description,
+                   memory_limit):
+    frontier = Frontier(priority, memory_limit)
+    for link in LINKS:
+        frontier.add(*link)
+
+    assert list(frontier.pop(limit, exclude)) == expected, \
+        f"Failed: {description}"
+
+
+def test_spilled_files_are_removed(tmp_path, monkeypatch):
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    monkeypatch.setattr("tempfile.tempdir", None)
+
+    with Frontier(memory_limit=1) as frontier:
+        for link in LINKS:
+            frontier.add(*link)
+        assert frontier.spilled > 0
+        assert os.listdir(tmp_path) != []
+        list(frontier.pop())
+
+    assert os.listdir(tmp_path) == []
+    assert list(frontier.pop()) == []
+
+
+def test_runs_are_merged_while_similar(tmp_path):
+    frontier = Frontier(memory_limit=1, directory=str(tmp_path))
+    for i in range(64):
+        frontier.add(f"T{i:02}", i, 0)
+
+    assert frontier.spilled == 64
+    assert len(frontier.runs) <= 7
+    assert sum(count for _, count in frontier.runs) == 64
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(path) for path, _ in frontier.runs)
+
+
+def test_spilled_runs_are_reopened(tmp_path):
+    removed = []
+    frontier = Frontier("inlinks", directory=str(tmp_path),
+                        remove=removed.append)
+    for link in LINKS[:4]:
+        frontier.add(*link)
+    frontier.spill()
+    runs = frontier.runs
+
+    reopened = Frontier("inlinks", directory=str(tmp_path), runs=runs,
+                        remove=removed.append)
+    for link in LINKS[4:]:
+        reopened.add(*link)
+
+    assert list(reopened.pop()) == ["C", "D", "B", "E"]
+    # files are left to the caller, e.g. until a newer checkpoint is saved
+    assert removed == [path for path, _ in runs]
+    assert all(os.path.exists(path) for path in removed)
+
+
+def test_pop_sorts_more_titles_than_memory_limit(tmp_path):
+    frontier = Frontier("inlinks", memory_limit=3, directory=str(tmp_path))
+    for i in range(20):
+        for page in range(i % 4 + 1):
+            frontier.add(f"T{i:02}", page, i)
+
+    popped = list(frontier.pop(10))
+
+    assert popped == [f"T{i:02}" for i in (3, 7, 11, 15, 19, 2, 6, 10, 14, 18)]
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,146 @@
+import pytest
+from src.http_cache import HttpCache, normalize_url
+from src.scraper_logic import WikiScraper
+from tests.local_server import LocalWiki, make_page
+
+
+normalization_scenarios = [
+    ("HTTPS://Bulbapedia.Bulbagarden.net/wiki/Kanto",
+     "https://bulbapedia.bulbagarden.net/wiki/Kanto", "Lowercase host"),
+    ("https://example.org:443/wiki/Kanto#History",
+     "https://example.org/wiki/Kanto", "Default port and fragment"),
+    ("https://example.org/wiki/Pok%C3%A9mon",
+     "https://example.org/wiki/Pok%C3%A9mon", "Encoded path"),
+    ("https://example.org/wiki/Pokémon",
+     "https://example.org/wiki/Pok%C3%A9mon", "Unencoded path"),
+    ("http://example.org:8080/w?b=2&a=1",
+     "http://example.org:8080/w?a=1&b=2", "Sorted query"),
+]
+
+
+@pytest.mark.parametrize("url, expected, description", normalization_scenarios)
+def test_normalize_url(url, expected, description):
+    assert normalize_url(url) == expected, f"Failed: {description}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_round_trip_and_persistence(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=60)
+    cache.put("https://example.org/wiki/A", "<p>ą</p>", etag='"x"')
+
+    entry = HttpCache(str(tmp_path)).get("https://EXAMPLE.org/wiki/A#top")
+
+    assert entry.body == "<p>ą</p>"
+    assert entry.etag == '"x"'
+    assert entry.last_modified is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    clock = FakeClock()
+    cache = HttpCache(str(tmp_path), max_size=25, clock=clock)
+
+    for name in "ABC":
+        clock.now += 1
+        cache.put(f"https://example.org/{name}", "x" * 10)
+        if name == "B":
+            # touch A so B becomes the least recently used entry
+            clock.now += 1
+            cache.get("https://example.org/A")
+
+    assert cache.get("https://example.org/B") is None
+    assert cache.get("https://example.org/A") is not None
+    assert cache.get("https://example.org/C") is not None
+    assert cache.size == 20
+    assert cache.evictions == 1
+
+
+def test_scraper_serves_fresh_entries_from_cache(tmp_path):
+    with LocalWiki({"A": make_page(text="cached")}) as wiki:
+        cache = HttpCache(str(tmp_path), ttl=3600)
+        scraper = WikiScraper(base_url=wiki.base_url, cache=cache)
+
+        first = scraper.scrape("A").get_summary()
+        second = scraper.scrape("A").get_summary()
+
+    assert first == second == "cached"
+    assert wiki.requests == ["A"]
+    assert (cache.hits, cache.misses, cache.revalidations) == (1, 1, 0)
+
+
+def test_scraper_revalidates_stale_entries(tmp_path):
+    pages = {"A": make_page(text="old")}
+
+    with LocalWiki(pages) as wiki:
+        cache = HttpCache(str(tmp_path), ttl=0)
+        scraper = WikiScraper(base_url=wiki.base_url, cache=cache)
+
+        scraper.scrape("A")
+        unchanged = scraper.scrape("A").get_summary()
+
+        pages["A"] = make_page(text="new")
+        changed = scraper.scrape("A").get_summary()
+
+    assert unchanged == "old"
+    assert changed == "new"
+    assert wiki.requests == ["A", "A", "A"]
+    assert (cache.hits, cache.misses, cache.revalidations) == (0, 2, 1)
+
+
+def test_lru_order_survives_reopening(tmp_path):
+    clock = FakeClock()
+    cache = HttpCache(str(tmp_path), clock=clock)
+    for name in "ABC":
+        clock.now += 1
+        cache.put(f"https://example.org/{name}", "x" * 10)
+    clock.now += 1
+    cache.get("https://example.org/A")
+
+    reopened = HttpCache(str(tmp_path), max_size=20)
+    reopened.put("https://example.org/D", "x" * 5)
+
+    assert reopened.get("https://example.org/B") is None
+    assert reopened.get("https://example.org/C") is None
+    assert reopened.get("https://example.org/A") is not None
+
+
+corrupted_meta_scenarios = [
+    ('{"url": "https://example.org/A", "unknown": 1}', "Unknown fields"),
+    ('["not", "an", "object"]', "Not an object"),
+    ("{broken", "Not JSON"),
+]
+
+
+@pytest.mark.parametrize("meta, description", corrupted_meta_scenarios)
+def test_corrupted_meta_is_refetched(tmp_path, meta, description):
+    with LocalWiki({"A": make_page(text="fresh")}) as wiki:
+        cache = HttpCache(str(tmp_path), ttl=0)
+        scraper = WikiScraper(base_url=wiki.base_url, cache=cache)
+        scraper.scrape("A")
+        for path in tmp_path.glob("*.meta.json"):
+            path.write_text(meta, encoding="utf-8")
+
+        summary = scraper.scrape("A").get_summary()
+
+    assert summary == "fresh", f"Failed: {description}"
+    assert wiki.requests == ["A", "A"]
+    assert cache.misses == 2
+
+
+def test_refresh_of_unreadable_entry_removes_it(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    url = "https://example.org/A"
+    cache.put(url, "body")
+    for path in tmp_path.glob("*.meta.json"):
+        path.write_text('["not", "an", "object"]', encoding="utf-8")
+
+    cache.refresh(url)
+
+    assert cache.get(url) is None
+    assert cache.size == 0
@@ -51,6 +51,12 @@ processing_scenarios = [
     # handle duplicates with '#'
     ("/wiki/Bulbasaur#Stats", "Bulbasaur", "Remove anchor"),
     ("/wiki/Mewtwo#Mega_Mewtwo_X", "Mewtwo", "Remove complex anchor"),
+
+    # canonical titles
+    ("/wiki/Team_Rocket", "Team Rocket", "Underscores become spaces"),
+    ("/wiki/Pok%C3%A9mon", "Pokémon", "Percent-encoded title"),
+    ("/wiki/pokémon", "Pokémon", "Lowercase first letter"),
+    ("/wiki/Kanto?oldid=1", "Kanto", "Remove query string"),
 ]
 
 
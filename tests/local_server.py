@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, quote, unquote, urlsplit
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+def load_fixture(name: str) -> str:
+    """
+    Returns content of one of the bundled data/*.html files.
+    """
+    with open(os.path.join(DATA_DIR, name + '.html'), encoding='utf-8') as f:
+        return f.read()
+
+
+def make_page(*links: str, text: str = "") -> str:
+    """
+    Builds a minimal wiki page with given text and links to given titles.
+    """
+    anchors = "".join(f'<a href="/wiki/{link}">{link}</a>' for link in links)
+    return (
+        '<html><body><div class="mw-content-ltr mw-parser-output">'
+        f'<p>{text}</p>{anchors}</div></body></html>'
+    )
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # clients that time out on purpose close the socket early
+        pass
+
+
+class LocalWiki:
+    """
+    Local HTTP stand-in for the wiki. Serves pages from the `pages` dict
+    under /wiki/<title> and records every requested title and client
+    address. Titles listed in `failures` first answer with given statuses
+    (with Retry-After: 0), `delay` slows every response down. Titles
+    in `redirects` answer with a http redirect to the mapped title.
+    """
+
+    def __init__(self, pages: dict[str, str]):
+        self.pages = pages
+        self.requests = []
+        self.clients = []
+        self.failures = {}
+        self.redirects = {}
+        self.delay = 0.0
+        self._lock = threading.Lock()
+        self._server = _QuietServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/wiki"
+
+    def _handler(self):
+        wiki = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                title = unquote(self.path.removeprefix('/wiki/'))
+                with wiki._lock:
+                    wiki.requests.append(title)
+                    wiki.clients.append(self.client_address)
+                    statuses = wiki.failures.get(title)
+                    status = statuses.pop(0) if statuses else None
+
+                time.sleep(wiki.delay)
+
+                if status is not None:
+                    self.send_response(status)
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                target = wiki.redirects.get(title)
+                if target is not None:
+                    self.send_response(301)
+                    self.send_header('Location', '/wiki/' + quote(target))
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                page = wiki.pages.get(title)
+                if page is None:
+                    self.send_error(404)
+                    return
+
+                body = page.encode('utf-8')
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def load_recording(name: str) -> list[dict]:
+    """
+    Returns API responses recorded in data/<name>.json.
+    """
+    with open(os.path.join(DATA_DIR, name + '.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+class LocalApi(LocalWiki):
+    """
+    Local stand-in for the MediaWiki api.php. Replays recorded responses:
+    every entry of `recording` has request 'params' and the JSON
+    'response' sent back when a request has exactly these params.
+    Params of every request are recorded in `api_requests`.
+    """
+
+    def __init__(self, recording: list[dict]):
+        super().__init__({})
+        self.recording = recording
+        self.api_requests = []
+
+    @property
+    def api_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/w/api.php"
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                params = dict(parse_qsl(urlsplit(self.path).query))
+                with api._lock:
+                    api.api_requests.append(params)
+
+                for entry in api.recording:
+                    if entry['params'] == params:
+                        body = json.dumps(entry['response']).encode('utf-8')
+                        self.send_response(200)
+                        self.send_header(
+                            'Content-Type', 'application/json; charset=utf-8')
+                        self.send_header('Content-Length', str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body)
+                        return
+                self.send_error(404)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
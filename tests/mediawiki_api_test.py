@@ -0,0 +1,127 @@
+import json
+import pytest
+from src.crawler import Crawler
+from src.exceptions import ArticleFetchError
+from src.mediawiki_api import MediaWikiApi
+from src.parsers import slice_content_div
+from src.scraper_logic import WikiScraper
+from src.wiki_article import WikiArticle
+from tests.local_server import LocalApi, load_fixture, load_recording
+
+
+def api_scraper(api: LocalApi) -> WikiScraper:
+    return WikiScraper(base_url=api.base_url, api_url=api.api_url)
+
+
+def test_parse_feeds_article_extraction():
+    with LocalApi(load_recording("api_recording")) as api:
+        scraper = api_scraper(api)
+        article = scraper.scrape("team_Rocket")
+
+    assert article.get_summary().startswith("Team Rocket is a villainous")
+    assert sorted(article.get_linked_phrases()) == [
+        "Giovanni", "Missingno", "Rockets"]
+    assert api.api_requests[0]["page"] == "Team Rocket"
+
+
+def test_parse_of_redirect_is_remembered():
+    with LocalApi(load_recording("api_recording")) as api:
+        scraper = api_scraper(api)
+        scraper.fetch("Rockets")
+        scraper.fetch("Rockets")
+
+    assert [r["page"] for r in api.api_requests] == ["Rockets", "Team Rocket"]
+    assert scraper.resolve("rockets") == "Team Rocket"
+
+
+def test_api_error_raises():
+    with LocalApi(load_recording("api_recording")) as api:
+        with pytest.raises(ArticleFetchError, match="missingtitle"):
+            api_scraper(api).fetch("Missingno")
+
+
+def test_titles_resolved_in_a_single_request():
+    with LocalApi(load_recording("api_recording")) as api:
+        scraper = api_scraper(api)
+        targets = scraper.resolve_many(["team_rocket", "Rockets", "rockets"])
+
+    assert targets == {
+        "team_rocket": "Team Rocket",
+        "Rockets": "Team Rocket",
+        "rockets": "Team Rocket",
+    }
+    assert len(api.api_requests) == 1
+
+
+def test_read_query_follows_normalization_and_redirects():
+    response = {"query": {
+        "normalized": [{"from": "team_rocket", "to": "Team rocket"}],
+        "redirects": [{"from": "Team rocket", "to": "Team Rocket"}],
+        "pages": [{"ns": 0, "title": "Team Rocket"},
+                  {"ns": 0, "title": "Nope", "missing": True},
+                  {"title": "<", "invalid": True}],
+    }}
+
+    targets = MediaWikiApi("http://w/api.php").read_query(
+        json.dumps(response), ["team_rocket", "Nope", "<", "Other"])
+
+    assert targets == {
+        "team_rocket": "Team Rocket", "Nope": None, "<": None,
+        "Other": "Other"}
+
+
+def test_query_titles_are_batched():
+    titles = [f"T{i}" for i in range(120)]
+    recording = []
+    for start in (0, 50, 100):
+        batch = titles[start:start + 50]
+        recording.append({
+            "params": {"action": "query", "titles": "|".join(batch),
+                       "format": "json", "formatversion": "2",
+                       "redirects": "1"},
+            "response": {"query": {"pages": [
+                {"ns": 0, "title": title} for title in batch]}},
+        })
+
+    with LocalApi(recording) as api:
+        targets = api_scraper(api).resolve_many(titles)
+
+    assert len(api.api_requests) == 3
+    assert targets == {title: title for title in titles}
+
+
+def test_crawler_skips_redirects_and_missing_pages():
+    counted = []
+
+    with LocalApi(load_recording("api_recording")) as api:
+        crawler = Crawler(
+            api_scraper(api), max_depth=1, wait_time=0,
+            on_words=counted.append
+        )
+        crawler.run("Team Rocket")
+
+    parsed = [r["page"] for r in api.api_requests if r["action"] == "parse"]
+    assert parsed == ["Team Rocket", "Giovanni"]
+    assert [r["titles"] for r in api.api_requests if r["action"] == "query"] \
+        == ["Team Rocket", "Giovanni|Rockets|Missingno"]
+    assert len(counted) == 2
+    assert crawler.visited == {
+        "Team Rocket", "Giovanni", "Rockets", "Missingno"}
+
+
+@pytest.mark.parametrize("name", ["Kanto", "pizza", "pythonidae"])
+def test_api_content_matches_rendered_page(name):
+    content = load_fixture(name)
+    recording = [{
+        "params": {"action": "parse", "page": name.capitalize(),
+                   "prop": "text", "format": "json", "formatversion": "2",
+                   "redirects": "1"},
+        "response": {"parse": {"title": name.capitalize(),
+                               "text": slice_content_div(content)}},
+    }]
+
+    with LocalApi(recording) as api:
+        article = api_scraper(api).scrape(name)
+
+    expected = WikiArticle(name, content, "en")
+    assert article.extract_all() == expected.extract_all()
@@ -0,0 +1,151 @@
+import pytest
+from src.wiki_article import WikiArticle
+from src.parsers import get_backend, slice_content_div
+from src.exceptions import ContentExtractionError
+from tests.local_server import load_fixture
+
+FIXTURES = ["Kanto", "pizza", "pythonidae", "monty_python"]
+FAST_PARSERS = ["lxml", "lxml.html"]
+
+
+@pytest.fixture(scope="module")
+def articles():
+    """
+    Every fixture parsed with every backend.
+    """
+    parsed = {}
+    for name in FIXTURES:
+        content = load_fixture(name)
+        for parser in ["html.parser"] + FAST_PARSERS:
+            parsed[name, parser] = WikiArticle(name, content, "en", parser)
+    return parsed
+
+
+def _table_or_error(article: WikiArticle, index: int):
+    try:
+        return article.get_table(index)
+    except ContentExtractionError as e:
+        return str(e)
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+@pytest.mark.parametrize("parser", FAST_PARSERS)
+def test_text_extraction_matches_html_parser(articles, name, parser):
+    expected = articles[name, "html.parser"]
+    article = articles[name, parser]
+
+    assert article.get_summary() == expected.get_summary()
+    assert article.get_word_count() == expected.get_word_count()
+    assert sorted(article.get_linked_phrases()) == \
+        sorted(expected.get_linked_phrases())
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+@pytest.mark.parametrize("parser", FAST_PARSERS)
+def test_tables_match_html_parser(articles, name, parser):
+    expected = articles[name, "html.parser"]
+    article = articles[name, parser]
+
+    for index in range(1, 6):
+        expected_table = _table_or_error(expected, index)
+        table = _table_or_error(article, index)
+
+        if isinstance(expected_table, str):
+            assert table == expected_table
+        else:
+            assert table.equals(expected_table)
+
+
+@pytest.mark.parametrize("parser", FAST_PARSERS)
+def test_whitespace_and_hidden_text_match(parser):
+    html = """
+    <div class="mw-content-ltr mw-parser-output">
+        <style>.hidden { color: red }</style>
+        <p>First <b>bold</b>
+            <i>line</i><!-- comment --> end<ruby>漢<rt>kan</rt></ruby></p>
+        <pre>  keep   this  </pre>
+        <script>var ignored = 1;</script>
+    </div>
+    """
+    expected = WikiArticle("Test", html, "en")
+    article = WikiArticle("Test", html, "en", parser)
+
+    assert article.get_summary() == expected.get_summary()
+    assert article.get_word_count() == expected.get_word_count()
+    assert "hidden" not in article.get_word_count()
+
+
+def test_unknown_parser_raises():
+    with pytest.raises(ContentExtractionError):
+        WikiArticle("Test", "", "en", "html5")
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+@pytest.mark.parametrize("parser", ["html.parser"] + FAST_PARSERS)
+def test_content_only_parse_matches_full_document(name, parser):
+    content = load_fixture(name)
+    backend = get_backend(parser)
+
+    full = backend.find_content_div(backend.parse(content))
+    restricted = backend.parse_content(content)
+
+    assert backend.text(restricted) == backend.text(full)
+    assert list(backend.hrefs(restricted)) == list(backend.hrefs(full))
+
+
+slicing_scenarios = [
+    ('<html><nav>menu</nav><div class="mw-content-ltr mw-parser-output">'
+     '<p>x</p></div><div class="printfooter">f</div><script></script>',
+     '<div class="mw-content-ltr mw-parser-output"><p>x</p></div>',
+     "Chrome around content is cut off"),
+    ('<div id="a" class=\'mw-content-ltr  mw-parser-output\'>x</div>',
+     '<div id="a" class=\'mw-content-ltr  mw-parser-output\'>x</div>',
+     "Other attributes and quotes"),
+    ('<p>no content div</p>', '<p>no content div</p>', "Missing content div"),
+]
+
+
+@pytest.mark.parametrize("content, expected, description", slicing_scenarios)
+def test_slice_content_div(content, expected, description):
+    assert slice_content_div(content) == expected, f"Failed: {description}"
+
+
+def test_article_is_parsed_lazily():
+    article = WikiArticle("Test", load_fixture("pizza"), "en")
+
+    assert article._is_parsed is False
+    article.get_summary()
+    assert article._is_parsed is True
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+@pytest.mark.parametrize("parser", ["html.parser"] + FAST_PARSERS)
+def test_extract_all_matches_separate_calls(name, parser):
+    content = load_fixture(name)
+    expected = WikiArticle(name, content, "en", parser)
+    article = WikiArticle(name, content, "en", parser)
+
+    data = article.extract_all()
+
+    assert data.summary == expected.get_summary()
+    assert data.word_count == expected.get_word_count()
+    assert sorted(data.links) == sorted(expected.get_linked_phrases())
+
+    # tables indexed during extraction are the ones get_table would find
+    last = data.table_count
+    assert last == len(expected.parser.find_all(expected.content_div, 'table'))
+    assert article.get_table(1).equals(expected.get_table(1))
+    with pytest.raises(ContentExtractionError):
+        article.get_table(last + 1)
+
+
+def test_extract_all_without_paragraph():
+    html = ('<div class="mw-content-ltr mw-parser-output">'
+            '<a href="/wiki/Mew">Mew</a> <a href="/wiki/Mew#Stats">x</a></div>')
+
+    data = WikiArticle("Test", html, "en").extract_all()
+
+    assert data.summary is None
+    assert data.word_count == {"mew": 1, "x": 1}
+    assert data.links == ["Mew"]
+    assert data.table_count == 0
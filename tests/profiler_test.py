@@ -0,0 +1,168 @@
+import json
+import pytest
+from src.crawler import Crawler
+from src.profiler import NullProfiler, Profiler, get_profiler, profiling
+from src.scraper_logic import WikiScraper
+from src.wiki_manager import WikiManager
+from tests.local_server import LocalWiki, load_fixture, make_page
+from wiki_scraper import parse_arguments
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_timer_adds_calls_and_time():
+    clock = FakeClock()
+    profiler = Profiler(clock)
+
+    for seconds in (0.5, 1.5):
+        with profiler.timer("parse"):
+            clock.now += seconds
+    profiler.count("pages_parsed", 2)
+    profiler.count("bytes_fetched", 3_000_000)
+
+    stats = profiler.stats()
+
+    assert stats["stages"] == {"parse": {"calls": 2, "seconds": 2.0}}
+    assert stats["elapsed_seconds"] == 2.0
+    assert stats["rates"] == {"pages_per_second": 1.0, "mb_per_second": 1.5}
+
+
+def test_timer_counts_failed_stage():
+    clock = FakeClock()
+    profiler = Profiler(clock)
+
+    with pytest.raises(ValueError):
+        with profiler.timer("fetch"):
+            clock.now += 1
+            raise ValueError
+
+    assert profiler.stats()["stages"]["fetch"] == {"calls": 1, "seconds": 1}
+
+
+def test_merge_adds_stats_of_another_profiler():
+    worker = Profiler()
+    worker.add_time("parse", 0.25)
+    worker.count("pages_parsed")
+    profiler = Profiler()
+    profiler.add_time("parse", 0.75)
+
+    profiler.merge(worker.stats())
+    profiler.merge(worker.stats())
+
+    stats = profiler.stats()
+    assert stats["stages"]["parse"] == {"calls": 3, "seconds": 1.25}
+    assert stats["counters"] == {"pages_parsed": 2}
+
+
+cache_scenarios = [
+    ({"cache_hits": 3, "cache_misses": 1}, 0.75, "Hits and misses"),
+    ({"cache_revalidations": 1, "cache_misses": 1}, 0.5, "Revalidated"),
+    ({"cache_misses": 2}, 0.0, "Only misses"),
+]
+
+
+@pytest.mark.parametrize("counters, hit_rate, description", cache_scenarios)
+def test_cache_hit_rate(counters, hit_rate, description):
+    profiler = Profiler()
+    for name, value in counters.items():
+        profiler.count(name, value)
+
+    assert profiler.stats()["rates"]["cache_hit_rate"] == hit_rate, \
+        f"Failed: {description}"
+
+
+def test_null_profiler_records_nothing():
+    profiler = NullProfiler()
+
+    with profiler.timer("parse"):
+        profiler.count("pages_parsed")
+
+    assert not profiler.enabled
+    assert profiler.timer("a") is profiler.timer("b")
+
+
+def test_profiling_restores_previous_profiler():
+    profiler = Profiler()
+    previous = get_profiler()
+
+    with profiling(profiler):
+        assert get_profiler() is profiler
+
+    assert get_profiler() is previous
+
+
+def test_write_json_and_prometheus(tmp_path):
+    clock = FakeClock()
+    profiler = Profiler(clock)
+    with profiler.timer("json.save"):
+        clock.now += 2
+    profiler.count("pages_fetched", 4)
+
+    profiler.write(str(tmp_path / "profile.json"))
+    profiler.write(str(tmp_path / "profile.prom"))
+
+    with open(tmp_path / "profile.json", encoding="utf-8") as f:
+        assert json.load(f) == profiler.stats()
+    lines = (tmp_path / "profile.prom").read_text().splitlines()
+    assert 'wiki_scraper_stage_seconds_total{stage="json.save"} 2.0' in lines
+    assert 'wiki_scraper_stage_calls_total{stage="json.save"} 1' in lines
+    assert "wiki_scraper_pages_fetched_total 4" in lines
+    assert "# TYPE wiki_scraper_elapsed_seconds gauge" in lines
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "profile.json", "profile.prom"]
+
+
+def test_profile_flag_reports_stages(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "Kanto.html").write_text(load_fixture("Kanto"), encoding="utf-8")
+    args = parse_arguments([
+        "--count-words", "Kanto", "--profile",
+        "--profile-output", "profile.json"
+    ])
+
+    WikiManager(args, use_local_html_files_instead=True).handle_args()
+
+    output = capsys.readouterr().out
+    assert "-----Profile-----" in output
+    with open(tmp_path / "profile.json", encoding="utf-8") as f:
+        stats = json.load(f)
+    assert {"fetch", "parse", "tokenize", "counts.flush"} <= \
+        set(stats["stages"])
+    assert stats["counters"]["pages_parsed"] == 1
+    assert stats["counters"]["bytes_fetched"] == \
+        (tmp_path / "Kanto.html").stat().st_size
+    assert not get_profiler().enabled
+
+
+def test_no_profile_without_flag(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "Kanto.html").write_text(load_fixture("Kanto"), encoding="utf-8")
+    args = parse_arguments(["--summary", "Kanto"])
+
+    WikiManager(args, use_local_html_files_instead=True).handle_args()
+
+    assert "-----Profile-----" not in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_crawler_profile_includes_workers(workers):
+    pages = {"A": make_page("B", "C"), "B": make_page(), "C": make_page()}
+    profiler = Profiler()
+
+    with LocalWiki(pages) as wiki, profiling(profiler):
+        crawler = Crawler(
+            WikiScraper(base_url=wiki.base_url), max_depth=1, wait_time=0,
+            on_words=lambda word_dict: None, workers=workers
+        )
+        crawler.run("A")
+
+    stats = profiler.stats()
+    assert stats["counters"]["pages_fetched"] == 3
+    assert stats["counters"]["pages_parsed"] == 3
+    assert stats["stages"]["parse"]["calls"] == 3
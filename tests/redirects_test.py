@@ -0,0 +1,110 @@
+import pytest
+from src.crawler import Crawler
+from src.redirects import RedirectMap, canonical_link
+from src.scraper_logic import WikiScraper
+from tests.local_server import LocalWiki, load_fixture, make_page
+
+
+link_scenarios = [
+    ('<html><head><link rel="canonical" href="https://w/wiki/Kanto">'
+     '</head></html>', "https://w/wiki/Kanto", "Canonical link"),
+    ('<head><link href="/wiki/A" rel="canonical"/></head>', "/wiki/A",
+     "Attributes in other order"),
+    ('<head><link rel="stylesheet" href="/s.css"></head>', None,
+     "Other links only"),
+    ('<head></head><body><link rel="canonical" href="/wiki/B"></body>',
+     None, "Link outside of the head"),
+]
+
+
+@pytest.mark.parametrize("content, expected, description", link_scenarios)
+def test_canonical_link(content, expected, description):
+    assert canonical_link(content) == expected, f"Failed: {description}"
+
+
+def test_canonical_link_of_fixture():
+    assert canonical_link(load_fixture("monty_python")) == \
+        "https://pl.wikipedia.org/wiki/Monty_Python"
+
+
+def test_redirect_map_resolves_chains_and_loops():
+    redirects = RedirectMap()
+    redirects.add("Team_Rocket", "Team Rocket")  # not a redirect
+    redirects.add("rocket", "Team Rocket")
+    redirects.add("Rockets", "Rocket")
+    redirects.add("X", "Y")
+    redirects.add("Y", "X")
+
+    assert len(redirects) == 4
+    assert redirects.resolve("Team_Rocket") == "Team Rocket"
+    assert redirects.resolve("rockets") == "Team Rocket"
+    assert redirects.resolve("X") in ("X", "Y")
+
+
+def test_redirect_map_is_persistent(tmp_path):
+    path = str(tmp_path / "redirects.jsonl")
+    redirects = RedirectMap(path)
+    redirects.add("Pikachu_(Pokémon)", "Pikachu")
+    redirects.add("Pikachu (Pokémon)", "Pikachu")  # already known
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"alias": "Cut')  # interrupted write
+
+    loaded = RedirectMap(path)
+
+    assert len(loaded) == 1
+    assert loaded.resolve("pikachu_(Pokémon)") == "Pikachu"
+    assert len(open(path, encoding="utf-8").readlines()) == 2
+
+
+def test_http_redirect_is_remembered():
+    pages = {"Team_Rocket": make_page(text="rocket")}
+
+    with LocalWiki(pages) as wiki:
+        wiki.redirects["Rocket"] = "Team_Rocket"
+        scraper = WikiScraper(base_url=wiki.base_url)
+
+        first = scraper.fetch("Rocket")
+        second = scraper.fetch("rocket")
+
+    assert first == second == pages["Team_Rocket"]
+    assert wiki.requests == ["Rocket", "Team_Rocket", "Team_Rocket"]
+    assert scraper.resolve("Rocket") == "Team Rocket"
+
+
+def test_canonical_link_redirect_is_remembered():
+    page = ('<html><head><link rel="canonical" href="{}/Pikachu"></head>'
+            '<body></body></html>')
+
+    with LocalWiki({}) as wiki:
+        wiki.pages["Pika"] = page.format(wiki.base_url)
+        wiki.pages["Pikachu"] = page.format(wiki.base_url)
+        scraper = WikiScraper(base_url=wiki.base_url)
+
+        scraper.fetch("Pika")
+        scraper.fetch("Pika")
+
+    assert wiki.requests == ["Pika", "Pikachu"]
+
+
+def test_crawler_counts_redirect_target_once():
+    pages = {
+        "Start": make_page("Alias", "Other_alias", "Target", "Known"),
+        "Target": make_page(text="bullseye"),
+        "Known_target": make_page(text="known"),
+    }
+    counted = []
+    redirects = RedirectMap()
+    redirects.add("Known", "Known target")
+
+    with LocalWiki(pages) as wiki:
+        wiki.redirects.update({"Alias": "Target", "Other_alias": "Target"})
+        crawler = Crawler(
+            WikiScraper(base_url=wiki.base_url, redirects=redirects),
+            max_depth=1, wait_time=0, on_words=counted.append
+        )
+        crawler.run("Start")
+
+    assert sum(word_dict.get("bullseye", 0) for word_dict in counted) == 1
+    assert "Known" not in wiki.requests
+    assert wiki.requests.count("Known_target") == 1
+    assert {"Target", "Known target"} <= crawler.visited
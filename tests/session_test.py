@@ -0,0 +1,63 @@
+import pytest
+from src.scraper_logic import WikiScraper
+from src.exceptions import ArticleFetchError
+from tests.local_server import LocalWiki, make_page
+
+
+PAGES = {"A": make_page(text="first"), "B": make_page(text="second")}
+
+
+def test_session_reuses_connection():
+    with LocalWiki(PAGES) as wiki:
+        scraper = WikiScraper(base_url=wiki.base_url)
+        scraper.scrape("A")
+        scraper.scrape("B")
+        scraper.scrape("A")
+        scraper.close()
+
+    # all requests came through the same kept-alive socket
+    assert len(wiki.requests) == 3
+    assert len(set(wiki.clients)) == 1
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_transient_errors_are_retried(status):
+    with LocalWiki(PAGES) as wiki:
+        wiki.failures["A"] = [status, status]
+        scraper = WikiScraper(base_url=wiki.base_url, retries=2, backoff=0)
+
+        summary = scraper.scrape("A").get_summary()
+
+    assert summary == "first"
+    assert wiki.requests == ["A", "A", "A"]
+
+
+def test_retries_give_up_with_fetch_error():
+    with LocalWiki(PAGES) as wiki:
+        wiki.failures["A"] = [503, 503, 503]
+        scraper = WikiScraper(base_url=wiki.base_url, retries=1, backoff=0)
+
+        with pytest.raises(ArticleFetchError):
+            scraper.scrape("A")
+
+    assert wiki.requests == ["A", "A"]
+
+
+def test_not_found_is_not_retried():
+    with LocalWiki(PAGES) as wiki:
+        scraper = WikiScraper(base_url=wiki.base_url, retries=3, backoff=0)
+
+        with pytest.raises(ArticleFetchError):
+            scraper.scrape("Missing")
+
+    assert wiki.requests == ["Missing"]
+
+
+def test_read_timeout_raises_fetch_error():
+    with LocalWiki(PAGES) as wiki:
+        wiki.delay = 0.5
+        scraper = WikiScraper(
+            base_url=wiki.base_url, read_timeout=0.1, retries=0)
+
+        with pytest.raises(ArticleFetchError):
+            scraper.scrape("A")
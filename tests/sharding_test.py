@@ -0,0 +1,251 @@
+import argparse
+import json
+import threading
+from collections import Counter
+import pytest
+from src.counts_store import (
+    ShardCountsStore,
+    merge_counts,
+    read_counts,
+)
+from src.crawler import Crawler
+from src.exceptions import ShardError
+from src.frontier import Frontier
+from src.scraper_logic import WikiScraper
+from src.sharding import ShardMailbox, counts_shard_path, parse_shard, shard_of
+from src.wiki_manager import WikiManager
+from tests.local_server import LocalWiki, make_page
+from wiki_scraper import parse_arguments
+
+
+GRAPH = {
+    "A": make_page("B", "C", "D", text="alpha"),
+    "B": make_page("E", "F", "C", text="beta"),
+    "C": make_page("G", "A", text="gamma"),
+    "D": make_page("G", "H", text="delta"),
+    "E": make_page(text="epsilon"),
+    "F": make_page("I", text="phi"),
+    "G": make_page("I", text="gamma"),
+    "H": make_page(text="eta"),
+    "I": make_page(text="iota"),
+}
+
+
+shard_scenarios = [
+    ("0/4", (0, 4), "First shard"),
+    ("3/4", (3, 4), "Last shard"),
+    ("4/4", None, "Index out of range"),
+    ("1", None, "No count"),
+    ("a/b", None, "Not numbers"),
+]
+
+
+@pytest.mark.parametrize("value, expected, description", shard_scenarios)
+def test_parse_shard(value, expected, description):
+    if expected is None:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(value)
+    else:
+        assert parse_shard(value) == expected, f"Failed: {description}"
+
+
+def test_shard_of_uses_canonical_titles():
+    titles = [f"Page {i}" for i in range(1000)]
+    owners = Counter(shard_of(title, 4) for title in titles)
+
+    assert shard_of("team_Rocket", 4) == shard_of("Team Rocket", 4)
+    assert set(owners) == {0, 1, 2, 3}
+    assert min(owners.values()) > 200
+
+
+def _crawl(wiki, counts, shard_dir=None, shard=None, shards=None):
+    class RecordingStore(ShardCountsStore):
+        def add(self, word_dict):
+            counts.update(word_dict)
+            return super().add(word_dict)
+
+    mailbox = None
+    path = str(shard_dir / "single.jsonl")
+    if shards:
+        mailbox = ShardMailbox(str(shard_dir), shard, shards, 0.01)
+        mailbox.join("A", 3)
+        path = counts_shard_path(str(shard_dir), shard, shards)
+
+    with RecordingStore(path, batch_size=2) as store:
+        crawler = Crawler(
+            WikiScraper(base_url=wiki.base_url), max_depth=3, wait_time=0,
+            on_words=store.add, concurrency=2, mailbox=mailbox)
+        crawler.run("A")
+    return crawler
+
+
+@pytest.mark.parametrize("shards", [2, 3])
+def test_sharded_crawl_visits_every_page_once(shards, tmp_path):
+    single = Counter()
+    with LocalWiki(GRAPH) as wiki:
+        _crawl(wiki, single, tmp_path)
+        expected_requests = sorted(wiki.requests)
+        wiki.requests.clear()
+
+        shard_dir = tmp_path / "shards"
+        counts = [Counter() for _ in range(shards)]
+        threads = [
+            threading.Thread(target=_crawl,
+                             args=(wiki, counts[i], shard_dir, i, shards))
+            for i in range(shards)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+
+    assert sorted(wiki.requests) == expected_requests
+    output = str(tmp_path / "word-counts.json")
+    merge_counts([counts_shard_path(str(shard_dir), i, shards)
+                  for i in range(shards)], output)
+    with open(output, encoding="utf-8") as f:
+        assert json.load(f) == dict(single)
+
+
+def _redirect_across_shards() -> tuple[str, str]:
+    titles = [f"P{i}" for i in range(10)]
+    return next((source, target) for source in titles for target in titles
+                if shard_of(source, 2) != shard_of(target, 2))
+
+
+def test_redirect_to_other_shard_is_visited_at_same_depth(tmp_path, capsys):
+    source, target = _redirect_across_shards()
+    # the redirect is found at the last depth, a depth later it would be
+    # visited beyond max_depth
+    graph = {"A": make_page("B"), "B": make_page("C"),
+             "C": make_page(source), target: make_page(text="tau")}
+    with LocalWiki(graph) as wiki:
+        wiki.redirects[source] = target
+        single = Counter()
+        _crawl(wiki, single, tmp_path)
+
+        shard_dir = tmp_path / "shards"
+        counts = [Counter(), Counter()]
+        threads = [
+            threading.Thread(target=_crawl,
+                             args=(wiki, counts[i], shard_dir, i, 2))
+            for i in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+
+    assert single["tau"] == 1
+    assert counts[0] + counts[1] == single
+    output = capsys.readouterr().out
+    assert f"'{target}' of another shard" in output
+    assert f"'{target}' (Depth: 3)" in output
+    assert "(Depth: 4)" not in output
+
+
+def test_outboxes_resume_from_checkpoint(tmp_path):
+    foreign = [title for title in GRAPH if shard_of(title, 2) == 1][:2]
+    mailbox = ShardMailbox(str(tmp_path), 0, 2)
+    mailbox.open_level(1, Frontier())
+    mailbox.add(foreign[0], 0, 0)
+    saved = mailbox.checkpoint()
+    # found after the checkpoint, the resumed crawl finds it again
+    mailbox.add(foreign[1], 1, 0)
+    mailbox.close()
+
+    resumed = ShardMailbox(str(tmp_path), 0, 2)
+    resumed.open_level(1, Frontier(), saved)
+    resumed.close()
+
+    with open(tmp_path / "depth-1" / "0-to-1-0.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)[0] for line in f] == foreign[:1]
+    assert saved["queued"] == 1
+
+
+def test_wait_fails_when_shard_is_gone(tmp_path):
+    mailbox = ShardMailbox(str(tmp_path), 0, 2, 0.01, timeout=0.2)
+    mailbox.open_level(0, Frontier())
+
+    with pytest.raises(ShardError, match="Shard 1 didn't respond"):
+        mailbox.exchange(set())
+    mailbox.close()
+
+
+def test_wait_fails_when_shard_abandons_crawl(tmp_path):
+    failing = ShardMailbox(str(tmp_path), 1, 2, 0.01)
+    failing.open_level(0, Frontier())
+    failing.close(failed=True)
+    mailbox = ShardMailbox(str(tmp_path), 0, 2, 0.01)
+    mailbox.open_level(0, Frontier())
+
+    with pytest.raises(ShardError, match="Shard 1 abandoned"):
+        mailbox.exchange(set())
+    mailbox.close()
+
+    # the shard takes part again when it is resumed
+    failing.join("A", 3)
+    assert not (tmp_path / "abandoned-1").exists()
+
+
+def test_crawl_stops_with_error_without_other_shards(tmp_path, capsys):
+    args = parse_arguments([
+        "--auto-count-words", "A", "--depth", "2", "--wait", "0",
+        "--shard", "0/2", "--shard-dir", str(tmp_path),
+        "--shard-timeout", "0.3"])
+    with LocalWiki(GRAPH) as wiki:
+        manager = WikiManager(args)
+        manager.scraper = WikiScraper(base_url=wiki.base_url)
+        manager.handle_args()
+
+    assert "Error. Sharded crawl stopped: Shard 1 didn't respond" in \
+        capsys.readouterr().out
+    assert (tmp_path / "abandoned-0").exists()
+
+
+def test_join_rejects_another_crawl(tmp_path):
+    ShardMailbox(str(tmp_path), 0, 2).join("A", 3)
+    ShardMailbox(str(tmp_path), 1, 2).join("A", 3)
+
+    with pytest.raises(ValueError):
+        ShardMailbox(str(tmp_path), 1, 2).join("A", 4)
+
+
+def _write_shard(path, counts):
+    with ShardCountsStore(str(path)) as store:
+        store.add(counts)
+    return str(path)
+
+
+def test_merge_is_associative(tmp_path):
+    a = _write_shard(tmp_path / "a.jsonl", {"ab": 1, "zz": 2})
+    b = _write_shard(tmp_path / "b.jsonl", {"ab": 3, "mm": 1})
+    c = str(tmp_path / "c.json")
+    with open(c, "w", encoding="utf-8") as f:
+        json.dump({"zz": 5, "ąę": 1}, f)
+
+    merge_counts([a, b, c], str(tmp_path / "all.json"))
+    merge_counts([a, b], str(tmp_path / "ab.jsonl"))
+    merge_counts([str(tmp_path / "ab.jsonl"), c], str(tmp_path / "ab_c.json"))
+
+    expected = [("ab", 4), ("mm", 1), ("zz", 7), ("ąę", 1)]
+    assert list(read_counts(str(tmp_path / "all.json"))) == expected
+    assert list(read_counts(str(tmp_path / "ab_c.json"))) == expected
+
+
+def test_shard_store_merges_every_flush(tmp_path):
+    path = str(tmp_path / "counts-0-of-1.jsonl")
+
+    with ShardCountsStore(path, batch_size=1) as store:
+        store.add({"b": 1, "a": 1})
+        store.add({"b": 2, "c": 1})
+
+    assert list(read_counts(path)) == [("a", 1), ("b", 3), ("c", 1)]
+
+
+def test_merge_rejects_corrupted_input(tmp_path):
+    path = tmp_path / "broken.jsonl"
+    path.write_text('["a", 1]\nnot json\n', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        merge_counts([str(path)], str(tmp_path / "out.json"))
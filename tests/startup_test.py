@@ -0,0 +1,38 @@
+import pytest
+from benchmarks.startup_benchmark import (
+    imported_forbidden,
+    measure_mode,
+    parse_importtime,
+)
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _json\n"
+        "import time:       380 |        500 | json\n"
+        "unrelated stderr line\n"
+    )
+
+    measurement = parse_importtime(output)
+
+    assert measurement.total_ms == pytest.approx(0.5)
+    assert measurement.modules == {"_json", "json"}
+
+
+lazy_scenarios = [
+    ("help", "Help doesn't load the scraping stack"),
+    ("argument-error", "Argument errors don't load the scraping stack"),
+    ("summary", "Summary doesn't load pandas, matplotlib or wordfreq"),
+    ("table", "Table doesn't load matplotlib or wordfreq"),
+    ("analysis", "Analysis without chart doesn't load matplotlib"),
+]
+
+
+@pytest.mark.parametrize("mode, description", lazy_scenarios)
+def test_mode_skips_heavy_imports(mode, description):
+    measurement = measure_mode(mode)
+
+    assert "wiki_scraper" in measurement.modules
+    assert imported_forbidden(mode, measurement) == [], \
+        f"Failed: {description}"
@@ -0,0 +1,166 @@
+from io import StringIO
+import numpy as np
+import pandas as pd
+import pytest
+from src.exceptions import ContentExtractionError
+from src.parsers import PARSER_BACKENDS, get_backend
+from src.tables import parse_table_numbers, table_to_frame
+from src.wiki_article import WikiArticle
+from src.wiki_manager import WikiManager
+from tests.local_server import load_fixture
+from wiki_scraper import parse_arguments
+
+
+def read_html_frame(html, header):
+    # the way get_table used to build tables
+    frames = pd.read_html(StringIO(html), header=header, index_col=0)
+    return frames[0]
+
+
+def direct_frame(html, header, parser):
+    backend = get_backend(parser)
+    root = backend.parse(html)
+    table = backend.find_all(root, "table", limit=1)[0]
+    return table_to_frame(backend.table_rows(table), header)
+
+
+table_scenarios = [
+    ("<table><tr><td>a</td><td>1</td></tr><tr><td>b</td><td>2</td></tr>"
+     "</table>", "Plain rows"),
+    ("<table><tr><th>k</th><th>v</th></tr><tr><td>a</td><td>1,000</td></tr>"
+     "</table>", "Header of th cells and thousands separator"),
+    ("<table><thead><tr><th>k</th><th>v</th></tr></thead><tbody>"
+     "<tr><td>a</td><td>1.5</td></tr></tbody><tfoot><tr><td>sum</td>"
+     "<td>1.5</td></tr></tfoot></table>", "Thead, tbody and tfoot"),
+    ("<table><tr><th>k</th><th>x</th><th>y</th></tr>"
+     "<tr><td rowspan=\"2\">a</td><td colspan=\"2\">wide</td></tr>"
+     "<tr><td>1</td><td>2</td></tr><tr><td>b</td><td>3</td></tr></table>",
+     "Rowspan and colspan"),
+    ("<table><tr><th>k</th><th>v</th></tr>"
+     "<tr><td>a</td><td rowspan=\"3\">tall</td></tr></table>",
+     "Rowspan past the last row"),
+    ("<table><tr><th colspan=\"2\">group</th></tr><tr><th>k</th><th>v</th>"
+     "</tr><tr><td>a</td><td>1</td></tr></table>", "Two header rows"),
+    ("<table><tr><td>a</td><td>line<br>break</td></tr>"
+     "<tr><td>b</td><td>  many \n\n spaces  </td></tr></table>",
+     "Line breaks and whitespace"),
+    ("<table><tr><td>a</td><td>x<span style=\"display: none\">hidden</span>"
+     "<style>.c{}</style>y</td></tr><tr style=\"display:none\"><td>b</td>"
+     "<td>2</td></tr><tr><td>c</td><td>3</td><td>extra</td></tr></table>",
+     "Hidden elements and ragged rows"),
+    ("<table><tr><td>a</td><td><table><tr><td>inner</td></tr></table>"
+     "</td></tr></table>", "Nested table"),
+    ("<table><tr><td>a</td><td></td></tr><tr><td>b</td><td>NaN</td></tr>"
+     "</table>", "Missing values"),
+]
+
+
+@pytest.mark.parametrize("parser", list(PARSER_BACKENDS))
+@pytest.mark.parametrize("header", [None, 0])
+@pytest.mark.parametrize("html, description", table_scenarios)
+def test_table_matches_read_html(html, description, header, parser):
+    expected = read_html_frame(html, header)
+    frame = direct_frame(html, header, parser)
+
+    pd.testing.assert_frame_equal(frame, expected, obj=description)
+
+
+def test_empty_table_has_no_data():
+    with pytest.raises(ContentExtractionError):
+        direct_frame("<table><tr></tr></table>", None, "html.parser")
+
+
+@pytest.mark.parametrize("parser", list(PARSER_BACKENDS))
+@pytest.mark.parametrize("name", [
+    "Kanto", "pizza", "pythonidae", "monty_python"])
+def test_fixture_tables_match_read_html(name, parser):
+    article = WikiArticle(name, load_fixture(name), "en", parser)
+    # markup of the tables serialized by BeautifulSoup, as get_table read
+    # them before
+    tables = WikiArticle(
+        name, load_fixture(name), "en", "html.parser")._find_tables()
+    assert len(tables) == article.table_count()
+    compared = 0
+
+    for index, table in enumerate(tables, start=1):
+        try:
+            expected = read_html_frame(str(table), None).replace(np.nan, "")
+        except (ValueError, ImportError):
+            # read_html finds no text in the table and needs html5lib
+            continue
+        if expected.empty:
+            continue
+
+        pd.testing.assert_frame_equal(
+            article.get_table(index), expected, obj=f"table {index}")
+        compared += 1
+
+    assert compared > 0
+
+
+numbers_scenarios = [
+    ("3", 3, "Single index"),
+    ("1,3,5", [1, 3, 5], "Several indexes"),
+    (" ALL ", "all", "All tables"),
+]
+
+
+@pytest.mark.parametrize("value, expected, description", numbers_scenarios)
+def test_parse_table_numbers(value, expected, description):
+    assert parse_table_numbers(value) == expected, f"Failed: {description}"
+
+
+@pytest.mark.parametrize("value", ["", "x", "1,,2", "1;2"])
+def test_parse_table_numbers_failure(value):
+    with pytest.raises(ValueError):
+        parse_table_numbers(value)
+
+
+def test_value_counts_match_counting_loop():
+    article = WikiArticle("Kanto", load_fixture("Kanto"), "en")
+    manager = WikiManager(parse_arguments(["--table", "Kanto", "--number", "1"]))
+
+    for index in (1, 4, 8):
+        df_table = article.get_table(index)
+
+        counts = {}
+        for row in df_table.values:
+            for item in row:
+                counts[str(item)] = counts.get(str(item), 0) + 1
+        expected = pd.DataFrame(counts.items(), columns=["Value", "Count"])
+        expected = expected.sort_values(by="Count", ascending=False)
+
+        assert manager._table_value_counts(df_table).to_string(index=False) \
+            == expected.to_string(index=False)
+
+
+@pytest.mark.parametrize("number, titles, files", [
+    ("2", ["-----Table-----"], ["Kanto.csv"]),
+    ("1,3", ["-----Table 1-----", "-----Table 3-----"],
+     ["Kanto-1.csv", "Kanto-3.csv"]),
+])
+def test_handle_table_numbers(number, titles, files, tmp_path, monkeypatch,
+                              capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "Kanto.html").write_text(load_fixture("Kanto"), encoding="utf-8")
+    args = parse_arguments(["--table", "Kanto", "--number", number])
+
+    WikiManager(args, use_local_html_files_instead=True).handle_table()
+
+    output = capsys.readouterr().out
+    assert [line for line in output.splitlines()
+            if line.startswith("-----Table")] == titles
+    assert sorted(path.name for path in tmp_path.glob("*.csv")) == files
+
+
+def test_handle_all_tables(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pizza.html").write_text(load_fixture("pizza"), encoding="utf-8")
+    args = parse_arguments(["--table", "pizza", "--number", "all"])
+
+    WikiManager(args, use_local_html_files_instead=True).handle_table()
+
+    output = capsys.readouterr().out
+    assert "-----Table 1-----" in output
+    assert "-----Table 3-----" in output
+    assert "-----Table 4-----" not in output
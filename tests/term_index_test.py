@@ -0,0 +1,150 @@
+import json
+from collections import Counter
+import pytest
+from src.crawler import Crawler
+from src.scraper_logic import WikiScraper
+from src.term_index import TermIndex, main
+from src.wiki_manager import WikiManager
+from tests.local_server import LocalWiki, make_page
+from wiki_scraper import parse_arguments
+
+
+ARTICLES = {
+    "Bulbasaur": {"grass": 3, "poison": 1, "seed": 2},
+    "Oddish": {"grass": 1, "poison": 4},
+    "Charmander": {"fire": 5, "lizard": 1},
+}
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = str(tmp_path / "word-index.sqlite")
+    with TermIndex(path) as index:
+        for title, word_dict in ARTICLES.items():
+            index.put(title, word_dict)
+    return path
+
+
+def test_put_and_vector(index_path):
+    with TermIndex(index_path) as index:
+        assert len(index) == 3
+        assert "bulbasaur" in index
+        assert "Squirtle" not in index
+        assert index.vector("Oddish") == ARTICLES["Oddish"]
+        assert index.vector("Squirtle") is None
+        assert index.titles() == ["Bulbasaur", "Charmander", "Oddish"]
+
+
+articles_with_scenarios = [
+    ("poison", None, [("Oddish", 4), ("Bulbasaur", 1)], "Most counts first"),
+    ("grass", 1, [("Bulbasaur", 3)], "Limited"),
+    ("water", None, [], "Unknown word"),
+]
+
+
+@pytest.mark.parametrize("word, limit, expected, description",
+                         articles_with_scenarios)
+def test_articles_with(index_path, word, limit, expected, description):
+    with TermIndex(index_path) as index:
+        assert index.articles_with(word, limit) == expected, \
+            f"Failed: {description}"
+
+
+def _sum(*titles):
+    totals = Counter()
+    for title in titles:
+        totals.update(ARTICLES[title])
+    return dict(totals)
+
+
+def test_totals_are_sums_of_articles(index_path):
+    with TermIndex(index_path) as index:
+        assert index.totals() == _sum(*ARTICLES)
+        assert index.totals(exclude=["oddish"]) == _sum(
+            "Bulbasaur", "Charmander")
+
+
+def test_remove_and_update(index_path):
+    with TermIndex(index_path) as index:
+        assert index.remove("Charmander")
+        assert not index.remove("Charmander")
+        index.put("Oddish", {"grass": 2, "flower": 1})
+
+    with TermIndex(index_path) as index:
+        assert index.totals() == {"grass": 5, "poison": 1, "seed": 2,
+                                  "flower": 1}
+        assert index.articles_with("poison") == [("Bulbasaur", 1)]
+        assert index.articles_with("fire") == []
+
+
+def test_changes_are_rolled_back_on_error(index_path):
+    with pytest.raises(RuntimeError):
+        with TermIndex(index_path) as index:
+            index.remove("Bulbasaur")
+            raise RuntimeError
+
+    with TermIndex(index_path) as index:
+        assert "Bulbasaur" in index
+
+
+GRAPH = {
+    "A": make_page("B", "C", text="alpha beta"),
+    "B": make_page("C", text="beta gamma"),
+    "C": make_page("A", text="gamma gamma"),
+}
+
+
+def test_crawler_fills_index(tmp_path):
+    counts = Counter()
+    path = str(tmp_path / "word-index.sqlite")
+
+    def on_words(word_dict):
+        counts.update(word_dict)
+        return True
+
+    with LocalWiki(GRAPH) as wiki, TermIndex(path) as index:
+        crawler = Crawler(
+            WikiScraper(base_url=wiki.base_url), max_depth=2, wait_time=0,
+            on_words=on_words, on_page=index.put)
+        crawler.run("A")
+
+    with TermIndex(path) as index:
+        assert index.titles() == ["A", "B", "C"]
+        assert index.totals() == dict(counts)
+        assert index.articles_with("gamma") == [("C", 2), ("B", 1)]
+
+
+def test_count_words_argument(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with LocalWiki(GRAPH) as wiki:
+        for phrase in ["A", "B", "A"]:
+            args = parse_arguments(["--count-words", phrase,
+                                    "--term-index", "word-index.sqlite"])
+            manager = WikiManager(args)
+            manager.scraper = WikiScraper(base_url=wiki.base_url)
+            manager.handle_args()
+
+    with open(tmp_path / "word-counts.json", encoding="utf-8") as f:
+        counts = Counter(json.load(f))
+    with TermIndex(str(tmp_path / "word-index.sqlite")) as index:
+        # A was counted twice, the index keeps its latest counts only
+        counts.subtract(index.vector("A"))
+        assert index.titles() == ["A", "B"]
+        assert index.totals() == {
+            word: count for word, count in counts.items() if count}
+
+
+def test_cli(index_path, tmp_path, capsys):
+    output = str(tmp_path / "word-counts.json")
+
+    assert main(["--index", index_path, "articles", "Grass"]) == 0
+    assert main(["--index", index_path, "remove", "Oddish", "Squirtle"]) == 0
+    assert main(["--index", index_path, "totals", "--output", output,
+                 "--exclude", "Charmander"]) == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["3", "Bulbasaur"]
+    assert lines[1].split() == ["1", "Oddish"]
+    assert lines[2] == "'Squirtle' is not in the index."
+    with open(output, encoding="utf-8") as f:
+        assert json.load(f) == ARTICLES["Bulbasaur"]
@@ -0,0 +1,77 @@
+import pytest
+from src.checkpoint import CrawlState
+from src.crawler import Crawler
+from src.scraper_logic import WikiScraper
+from src.titles import canonical_title, title_to_path
+from tests.local_server import LocalWiki, make_page
+
+
+canonical_scenarios = [
+    ("Pikachu", "Pikachu", "Already canonical"),
+    ("Team_Rocket", "Team Rocket", "Underscores"),
+    ("Team__Rocket_", "Team Rocket", "Runs of underscores and trailing one"),
+    ("Pok%C3%A9mon", "Pokémon", "Percent-encoded"),
+    ("pokémon", "Pokémon", "Lowercase first letter"),
+    ("łódź", "Łódź", "Non-ASCII first letter"),
+    ("Mewtwo#Mega_Mewtwo_X", "Mewtwo", "Fragment"),
+    ("Kanto?action=edit&oldid=1", "Kanto", "Query string"),
+    ("What%3F", "What?", "Encoded question mark is a part of the title"),
+    ("AC/DC", "AC/DC", "Subpage slash"),
+    ("", "", "Empty title"),
+]
+
+
+@pytest.mark.parametrize("title, expected, description", canonical_scenarios)
+def test_canonical_title(title, expected, description):
+    assert canonical_title(title) == expected, f"Failed: {description}"
+
+
+path_scenarios = [
+    ("team Rocket", "Team_Rocket", "Spaces"),
+    ("Pokémon", "Pok%C3%A9mon", "Non-ASCII"),
+    ("What%3F", "What%3F", "Question mark"),
+    ("Farfetch'd (Pokémon)", "Farfetch%27d_(Pok%C3%A9mon)", "Parentheses"),
+]
+
+
+@pytest.mark.parametrize("title, expected, description", path_scenarios)
+def test_title_to_path(title, expected, description):
+    assert title_to_path(title) == expected, f"Failed: {description}"
+
+
+def test_crawler_fetches_every_article_once():
+    pages = {
+        "Start": make_page(
+            "Team_Rocket", "Team Rocket", "team_Rocket#Members",
+            "Pok%C3%A9mon", "pokémon", "Start", "start"),
+        "Team_Rocket": make_page(text="rocket"),
+        "Pokémon": make_page(text="pocket"),
+    }
+
+    with LocalWiki(pages) as wiki:
+        crawler = Crawler(
+            WikiScraper(base_url=wiki.base_url), max_depth=1, wait_time=0,
+            on_words=lambda word_dict: None
+        )
+        crawler.run("start")
+
+    assert sorted(wiki.requests) == ["Pokémon", "Start", "Team_Rocket"]
+    assert crawler.visited == {"Start", "Team Rocket", "Pokémon"}
+
+
+def test_crawl_state_marks_canonical_start():
+    state = CrawlState.start("monty_python", 1)
+
+    # depth 0 has no level file, it is just the start phrase
+    assert (state.start_phrase, state.level_path) == ("monty_python", None)
+    assert state.visited == {"Monty python"}
+
+
+@pytest.mark.parametrize("phrase", [
+    "team Rocket", "Team Rocket", "Team_Rocket", "team_Rocket"])
+def test_local_file_found_for_every_form(phrase, tmp_path):
+    (tmp_path / "Team_Rocket.html").write_text("rocket", encoding="utf-8")
+    scraper = WikiScraper(
+        use_local_html_file_instead=True, base_path=f"{tmp_path}/")
+
+    assert scraper.fetch(phrase) == "rocket"
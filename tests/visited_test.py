@@ -0,0 +1,85 @@
+import pytest
+from src.checkpoint import CrawlState, load_checkpoint, save_checkpoint
+from src.visited import (
+    BloomFilter,
+    HashedSet,
+    dump_visited,
+    load_visited,
+    make_visited_set,
+)
+
+TITLES = [f"Page {i}" for i in range(5000)]
+OTHERS = [f"Other {i}" for i in range(20000)]
+
+
+@pytest.mark.parametrize("kind", ["exact", "hashed", "bloom"])
+def test_added_titles_are_present(kind):
+    visited = make_visited_set(kind)
+    for title in TITLES + TITLES[:100]:
+        visited.add(title)
+
+    assert all(title in visited for title in TITLES)
+    assert len(visited) == len(TITLES)
+
+
+def test_hashed_set_has_no_false_positives():
+    visited = HashedSet(TITLES)
+
+    assert not any(title in visited for title in OTHERS)
+
+
+def test_hashed_set_merges_into_sorted_array():
+    visited = HashedSet(TITLES)
+    visited.to_json()
+    hashes = visited._sorted
+
+    assert len(hashes) == len(TITLES)
+    assert list(hashes) == sorted({HashedSet._hash(t) for t in TITLES})
+
+
+def test_bloom_filter_keeps_false_positive_rate_while_growing():
+    # small first filter, so the titles need a few larger ones
+    bloom = BloomFilter(fp_rate=0.01, capacity=256)
+    for title in TITLES:
+        bloom.add(title)
+
+    false_positives = sum(title in bloom for title in OTHERS)
+
+    assert len(bloom._slices) > 1
+    # the bound is reached only when the last filter is full, the rest
+    # of the margin is for the sampling noise
+    assert false_positives / len(OTHERS) < 0.015
+
+
+@pytest.mark.parametrize("kind", ["exact", "hashed", "bloom"])
+def test_dump_and_load(kind):
+    visited = make_visited_set(kind)
+    for title in TITLES[:300]:
+        visited.add(title)
+
+    loaded = load_visited(dump_visited(visited))
+
+    assert type(loaded) is type(visited)
+    assert all(title in loaded for title in TITLES[:300])
+    assert len(loaded) == 300
+
+
+@pytest.mark.parametrize("kind", ["hashed", "bloom"])
+def test_checkpoint_keeps_compact_visited_set(kind, tmp_path):
+    path = str(tmp_path / "crawl.json.gz")
+    state = CrawlState.start("Pokémon", 2, make_visited_set(kind))
+    state.visited.add("B")
+    state.pages = 7
+
+    save_checkpoint(state, path)
+    loaded = load_checkpoint(path)
+
+    assert "Pokémon" in loaded.visited and "B" in loaded.visited
+    assert "C" not in loaded.visited
+    assert loaded.pages == 7
+
+
+@pytest.mark.parametrize("data", [{"kind": "cuckoo"}, {"kind": "bloom"}])
+def test_load_rejects_unknown_sets(data):
+    with pytest.raises(ValueError):
+        load_visited(data)
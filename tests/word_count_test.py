@@ -0,0 +1,64 @@
+import re
+import pytest
+from src import wiki_article
+from src.wiki_article import WikiArticle, _text_chunks
+from tests.local_server import load_fixture
+
+
+def reference_count(strings):
+    # the way get_word_count used to count words
+    text = ' '.join(strings)
+    word_count = {}
+    for word in re.findall(r'\w+', text.lower()):
+        if word.isalpha():
+            word_count[word] = word_count.get(word, 0) + 1
+    return word_count
+
+
+def count(strings):
+    return WikiArticle("A", "", "en")._count_text(strings)
+
+
+text_scenarios = [
+    (["Pika", "chu"], "Words are not glued across text nodes"),
+    (["mp3 1990s abc_def x²"], "Tokens with digits or underscores dropped"),
+    (["Łódź ŻÓŁW", "żółw"], "Polish letters"),
+    (["L'Italia è più bella"], "Apostrophes and Italian accents"),
+    (["ΟΔΟΣ", "ΟΔΟΣ.", "Σ"], "Greek final sigma"),
+    (["İstanbul"], "Lowercase longer than uppercase"),
+    (["", " ", "a  b\n\ta"], "Empty and whitespace nodes"),
+]
+
+
+@pytest.mark.parametrize("strings, description", text_scenarios)
+def test_count_matches_reference(strings, description):
+    result = count(strings)
+
+    assert result == reference_count(strings), f"Failed: {description}"
+    assert list(result) == list(reference_count(strings)), \
+        f"Failed order: {description}"
+
+
+def test_chunks_keep_text_nodes_whole():
+    strings = ["ab", "cd", "efgh", "i", "", "jk"]
+
+    chunks = list(_text_chunks(strings, size=4))
+
+    assert chunks == ["ab cd", "efgh", "i  jk"]
+    assert ' '.join(chunks) == ' '.join(strings)
+
+
+@pytest.mark.parametrize("name, language", [
+    ("Kanto", "en"), ("pizza", "it"), ("monty_python", "pl"),
+    ("pythonidae", "en")])
+@pytest.mark.parametrize("chunk_size", [1, 100, 1 << 16])
+def test_fixture_counts_match_reference(name, language, chunk_size,
+                                        monkeypatch):
+    monkeypatch.setattr(wiki_article, "_CHUNK_SIZE", chunk_size)
+    article = WikiArticle(name, load_fixture(name), language)
+    strings = list(article.parser.strings(article.content_div))
+
+    word_count = article.get_word_count()
+
+    assert word_count == reference_count(strings)
+    assert list(word_count) == list(reference_count(strings))
@@ -0,0 +1,143 @@
+import json
+import random
+import numpy as np
+import pytest
+from benchmarks.word_counts_benchmark import run_benchmarks
+from src.counts_store import load_word_counts, save_json_counts
+from src.word_counts import WordCounts
+from src.word_frequency import top_n_words
+
+
+ARTICLES = [
+    {"pikachu": 2, "mew": 1},
+    {"mew": 3, "ząb": 1},
+    {"pikachu": 1, "": 1},
+]
+
+
+def test_counts_behave_like_dict():
+    counts = WordCounts()
+    expected = {}
+    for word_dict in ARTICLES:
+        counts.update(word_dict)
+        for word, count in word_dict.items():
+            expected[word] = expected.get(word, 0) + count
+
+    assert counts == expected
+    assert list(counts) == list(expected)
+    assert list(counts.items()) == list(expected.items())
+    assert counts["ząb"] == 1
+    assert counts.get("mewtwo", 0) == 0
+    assert "mew" in counts and "mewtwo" not in counts and 1 not in counts
+    assert counts.total() == sum(expected.values())
+    assert counts.word(counts.word_id("mew")) == "mew"
+    with pytest.raises(KeyError):
+        counts["mewtwo"]
+
+
+def test_many_words_survive_table_growth():
+    rng = random.Random(7)
+    expected = {}
+    counts = WordCounts()
+    for _ in range(20):
+        word_dict = {str(rng.randrange(5000)): rng.randrange(1, 10)
+                     for _ in range(500)}
+        counts.update(word_dict)
+        for word, count in word_dict.items():
+            expected[word] = expected.get(word, 0) + count
+
+    assert len(counts) == len(expected)
+    assert all(counts[word] == count for word, count in expected.items())
+    assert list(counts) == list(expected)
+
+
+def test_counts_are_smaller_than_dict():
+    words = [f"word{i}" for i in range(10000)]
+    counts = WordCounts((word, 1000) for word in words)
+
+    assert counts.nbytes() < 50 * len(words)
+
+
+def test_pandas_export_shares_counts():
+    counts = WordCounts({"mew": 4, "pikachu": 3})
+
+    series = counts.to_pandas()
+    counts["mew"] = 5
+
+    assert series.to_dict() == {"mew": 5, "pikachu": 3}
+    assert np.shares_memory(series.to_numpy(), counts.counts_array())
+    with pytest.raises(BufferError):
+        counts.add("ząb")
+    del series
+    counts.add("ząb")
+    assert counts["ząb"] == 1
+
+
+def test_pandas_index_shares_words_with_pyarrow():
+    pa = pytest.importorskip("pyarrow")
+    counts = WordCounts(ARTICLES[1])
+
+    index = counts.to_pandas().index
+
+    assert list(index) == ["mew", "ząb"]
+    words = pa.array(index.array)
+    assert words.buffers()[2].address == \
+        pa.py_buffer(counts._blob).address
+
+
+json_scenarios = [
+    (None, {}, "Empty counts"),
+    ({"mew": 4, 'say "hi"': 2, "ząb": 1}, None, "Written by the store"),
+    ('{"mew": 4, "ząb": 1}', {"mew": 4, "ząb": 1}, "Single line"),
+    ('{\n"mew": 4,\n"mew": 1\n}', {"mew": 1}, "Duplicated word"),
+    ("[1, 2]", ValueError, "Not an object"),
+    ('{"mew": 1.5}', ValueError, "Not a count"),
+    ('{\n    "mew": 4,\n', ValueError, "Truncated"),
+]
+
+
+@pytest.mark.parametrize("content, expected, description", json_scenarios)
+def test_read_json(tmp_path, content, expected, description):
+    path = str(tmp_path / "word-counts.json")
+    if content is None or isinstance(content, dict):
+        save_json_counts(WordCounts(content or {}), path)
+        expected = content or expected
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    if expected is ValueError:
+        with pytest.raises(ValueError):
+            WordCounts.read_json(path)
+        return
+    assert WordCounts.read_json(path) == expected, f"Failed: {description}"
+    if isinstance(content, dict):
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == content
+
+
+def test_load_word_counts_of_missing_or_corrupted_file(tmp_path, capsys):
+    path = tmp_path / "word-counts.json"
+
+    assert load_word_counts(str(path)) == {}
+    path.write_text('{"mew": ', encoding="utf-8")
+    assert load_word_counts(str(path)) == {}
+
+    output = capsys.readouterr().out
+    assert "does not exist" in output
+    assert "corrupted or empty" in output
+
+
+def test_top_n_words_reads_counts_column():
+    total_counts = {f"w{i}": i % 7 for i in range(100)}
+
+    assert top_n_words(WordCounts(total_counts), 10) == \
+        top_n_words(total_counts, 10)
+
+
+def test_benchmark_measures_both_structures(capsys):
+    results = run_benchmarks(words=2000, articles=5)
+
+    assert list(results) == ["dict", "WordCounts"]
+    assert results["WordCounts"]["bytes_per_word"] < \
+        results["dict"]["bytes_per_word"]
@@ -0,0 +1,99 @@
+import json
+import random
+import numpy as np
+import pandas as pd
+import pytest
+import wordfreq
+from src.wiki_article import WikiArticle
+from src.wiki_manager import WikiManager
+from src.word_frequency import language_frequencies, top_n_words
+from tests.local_server import load_fixture
+from wiki_scraper import parse_arguments
+
+
+def sorted_top_n(total_counts, n):
+    return sorted(
+        total_counts.keys(), key=lambda x: total_counts[x], reverse=True)[:n]
+
+
+COUNTS = {"a": 3, "b": 5, "c": 3, "d": 1, "e": 5, "f": 3}
+
+top_n_scenarios = [
+    (COUNTS, 1, "Single word, tie goes to the first one"),
+    (COUNTS, 3, "Ties cut at the boundary"),
+    (COUNTS, 4, "Ties partly taken"),
+    (COUNTS, 6, "Whole vocabulary"),
+    (COUNTS, 10, "More than vocabulary"),
+    (COUNTS, 0, "Nothing"),
+    (COUNTS, -2, "Negative slices from the end"),
+    ({"x": 2, "y": 2, "z": 2}, 2, "All counts equal"),
+    ({}, 5, "Empty counts"),
+]
+
+
+@pytest.mark.parametrize("total_counts, n, description", top_n_scenarios)
+def test_top_n_words_matches_sorting(total_counts, n, description):
+    assert top_n_words(total_counts, n) == sorted_top_n(total_counts, n), \
+        f"Failed: {description}"
+
+
+def test_top_n_words_random_counts():
+    rng = random.Random(7)
+    total_counts = {f"w{i}": rng.randint(1, 20) for i in range(2000)}
+
+    for n in (1, 5, 50, 333, 1999):
+        assert top_n_words(total_counts, n) == sorted_top_n(total_counts, n)
+
+
+@pytest.mark.parametrize("name, language", [
+    ("Kanto", "en"), ("pizza", "it"), ("monty_python", "pl")])
+def test_language_frequencies_match_wordfreq(name, language):
+    article = WikiArticle(name, load_fixture(name), language)
+    words = list(article.get_word_count())
+    words += wordfreq.top_n_list(language, 500)
+
+    expected = [wordfreq.word_frequency(word, language) for word in words]
+
+    assert language_frequencies(words, language).tolist() == expected
+
+
+def reference_analysis(total_counts, mode, n, language):
+    # row by row version the analysis used to be built with
+    if mode == "article":
+        words = sorted_top_n(total_counts, n)
+    else:
+        words = wordfreq.top_n_list(language, n)
+    data = [
+        {"word": word, "wiki": total_counts.get(word, 0),
+         "lang": wordfreq.word_frequency(word, language)}
+        for word in words
+    ]
+    data_pd = pd.DataFrame(data).set_index("word")
+    wiki_max = data_pd["wiki"].max() if data_pd["wiki"].max() > 0 else 1
+    lang_max = data_pd["lang"].max() if data_pd["lang"].max() > 0 else 1
+    data_pd["wiki_norm"] = data_pd["wiki"] / wiki_max
+    data_pd["lang_norm"] = data_pd["lang"] / lang_max
+    sort_norm = "wiki_norm" if mode == "article" else "lang_norm"
+    data_pd = data_pd.sort_values(by=sort_norm, ascending=True)
+    data_pd = data_pd.replace(0, np.nan)
+    return data_pd[["wiki_norm", "lang_norm"]].to_string(
+        na_rep=" ", float_format="%.6f")
+
+
+@pytest.mark.parametrize("mode, count", [
+    ("article", 25), ("language", 25), ("article", 5000)])
+def test_analysis_output_unchanged(mode, count, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    total_counts = WikiArticle(
+        "Kanto", load_fixture("Kanto"), "en").get_word_count()
+    with open(tmp_path / "word-counts.json", "w", encoding="utf-8") as f:
+        json.dump(total_counts, f)
+
+    args = parse_arguments([
+        "--analyze-relative-word-frequency",
+        "--mode", mode, "--count", str(count)
+    ])
+    WikiManager(args).handle_relative_word_frequency_analysis()
+
+    output = capsys.readouterr().out
+    assert reference_analysis(total_counts, mode, count, "en") in output
@@ -1,5 +1,23 @@
 import argparse
-from src.wiki_manager import WikiManager
+from src.parsers import PARSER_BACKENDS
+from src.counts_store import COUNTS_STORES
+from src.batch import BATCH_MODES
+from src.frontier import PRIORITIES
+from src.sharding import DEFAULT_SHARD_TIMEOUT, parse_shard
+from src.visited import VISITED_SETS
+from src.compression import (
+    CODECS, LEVEL_RANGES, resolve_codec, zstd_available)
+from src.tables import parse_table_numbers, table_indexes
+
+
+def _table_numbers(value: str) -> int | list[int] | str:
+    try:
+        return parse_table_numbers(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"'{value}' is not a table index, comma separated indexes " +
+            "or 'all'"
+        )
 
 
 def _check_mutually_dependent(*args) -> bool:
@@ -23,7 +41,9 @@ def validate_arguments(parser: argparse.ArgumentParser, args):
         args.table,
         args.count_words,
         args.analyze_relative_word_frequency,
-        args.auto_count_words
+        args.auto_count_words,
+        args.batch,
+        args.merge_counts,
     ]
 
     # Check if only on of main modes has been selected.
@@ -32,10 +52,13 @@ def validate_arguments(parser: argparse.ArgumentParser, args):
     if selected_modes != 1:
         parser.error("Exactly one main mode must be selected. Main modes are " +
                      "summary, table, count-words," +
-                     " analyze-relative-word-frequency, auto-count-words.)"
+                     " analyze-relative-word-frequency, auto-count-words," +
+                     " batch, merge-counts.)"
                      )
 
-    if not _check_mutually_dependent(args.table, args.number):
+    # in batch mode --number is the table of jobs that don't give one
+    if not _check_mutually_dependent(args.table, args.number) and \
+            not (args.batch is not None and args.table is None):
         parser.error(
             "Arguments '--table' and '--number' must be used together."
         )
@@ -46,7 +69,8 @@ def validate_arguments(parser: argparse.ArgumentParser, args):
             " for '--first-row-is-header'."
         )
 
-    if args.number is not None and args.number <= 0:
+    if args.number is not None and \
+            min(table_indexes(args.number) or [1]) <= 0:
         parser.error("Argument '--number' needs to be greater or equal to 1")
 
     if not _check_mutually_dependent(
@@ -83,8 +107,152 @@ def validate_arguments(parser: argparse.ArgumentParser, args):
         parser.error(
             "Waiting time for crawling msut be greater or equal to 0.")
 
+    if args.concurrency is not None and \
+            args.auto_count_words is None and args.batch is None:
+        parser.error(
+            "Argument '--auto-count-words' or '--batch' is required for " +
+            "'--concurrency'.")
+
+    if args.batch_mode is not None and args.batch is None:
+        parser.error("Argument '--batch' is required for '--batch-mode'.")
+
+    if args.batch_mode == "table" and args.number is None:
+        parser.error(
+            "Argument '--number' is required for '--batch-mode table'.")
+
+    if args.workers is not None and args.auto_count_words is None:
+        parser.error(
+            "Argument '--auto-count-words' is required for '--workers'.")
+
+    if args.workers is not None and args.workers < 1:
+        parser.error("Number of workers must be greater or equal to 1.")
+
+    if args.checkpoint is not None and args.auto_count_words is None:
+        parser.error(
+            "Argument '--auto-count-words' is required for '--checkpoint'.")
+
+    crawl_limits = (args.max_pages, args.max_pages_per_depth,
+                    args.frontier_memory)
+    crawl_options = crawl_limits + (args.priority, args.visited_set,
+                                    args.fp_rate)
+    if args.auto_count_words is None and any(
+            option is not None for option in crawl_options):
+        parser.error(
+            "Argument '--auto-count-words' is required for the page " +
+            "limits, '--priority', '--frontier-memory', '--visited-set' " +
+            "and '--fp-rate'.")
+
+    if any(limit is not None and limit < 1 for limit in crawl_limits):
+        parser.error(
+            "Page limits and frontier memory must be greater or equal to 1.")
+
+    if args.fp_rate is not None and args.visited_set != "bloom":
+        parser.error("Argument '--fp-rate' needs '--visited-set bloom'.")
+
+    if args.fp_rate is not None and not 0 < args.fp_rate < 1:
+        parser.error("False positive rate must be between 0 and 1.")
+
+    if args.shard is not None and args.auto_count_words is None:
+        parser.error("Argument '--auto-count-words' is required for '--shard'.")
+
+    if not _check_mutually_dependent(args.shard, args.shard_dir):
+        parser.error(
+            "Arguments '--shard' and '--shard-dir' must be used together.")
+
+    if args.shard_timeout is not None and args.shard is None:
+        parser.error("Argument '--shard' is required for '--shard-timeout'.")
+
+    if args.shard_timeout is not None and args.shard_timeout <= 0:
+        parser.error("Shard timeout must be greater than 0.")
+
+    if args.shard is not None and args.counts_store is not None:
+        parser.error(
+            "Argument '--counts-store' can't be used with '--shard', every " +
+            "shard writes its counts to '--shard-dir'.")
+
+    if args.merge_output is not None and args.merge_counts is None:
+        parser.error(
+            "Argument '--merge-counts' is required for '--merge-output'.")
+
+    if args.resume and args.checkpoint is None:
+        parser.error("Argument '--checkpoint' is required for '--resume'.")
+
+    if args.concurrency is not None and args.concurrency < 1:
+        parser.error("Concurrency for crawling must be greater or equal to 1.")
+
+    counting = (args.count_words is not None or
+                args.auto_count_words is not None or args.batch is not None)
+    if not counting and (
+            args.counts_store is not None or args.counts_batch is not None):
+        parser.error(
+            "Arguments '--counts-store' and '--counts-batch' can be used only" +
+            " with '--count-words', '--auto-count-words' or '--batch'."
+        )
+
+    if not counting and args.term_index is not None:
+        parser.error(
+            "Argument '--term-index' can be used only with '--count-words'," +
+            " '--auto-count-words' or '--batch'.")
+
+    if args.counts_batch is not None and args.counts_batch < 1:
+        parser.error("Counts batch size must be greater or equal to 1.")
+
+    if args.cache_dir is None and (
+            args.cache_ttl is not None or args.cache_max_size is not None or
+            args.cache_compression is not None or
+            args.cache_compression_level is not None or
+            args.cache_dictionary is not None):
+        parser.error(
+            "Argument '--cache-dir' is required for '--cache-ttl', " +
+            "'--cache-max-size' and the cache compression options."
+        )
+
+    if args.cache_ttl is not None and args.cache_ttl < 0:
+        parser.error("Cache TTL must be greater or equal to 0.")
+
+    if args.cache_max_size is not None and args.cache_max_size <= 0:
+        parser.error("Cache size limit must be greater than 0.")
+
+    if args.cache_dir is not None:
+        _validate_cache_compression(parser, args)
+
+    if args.pool_size is not None and args.pool_size < 1:
+        parser.error("Connection pool size must be greater or equal to 1.")
+
+    for timeout in (args.connect_timeout, args.read_timeout):
+        if timeout is not None and timeout <= 0:
+            parser.error("Timeouts must be greater than 0.")
+
+    if args.retries is not None and args.retries < 0:
+        parser.error("Number of retries must be greater or equal to 0.")
+
+    if args.backoff is not None and args.backoff < 0:
+        parser.error("Retry backoff must be greater or equal to 0.")
+
+    if args.api_url is not None and args.corpus is not None:
+        parser.error("Arguments '--api-url' and '--corpus' can't be used " +
+                     "together.")
+
+    if args.profile_output and not args.profile:
+        parser.error("Argument '--profile' is required for '--profile-output'.")
+
+
+def _validate_cache_compression(parser, args) -> None:
+    codec = resolve_codec(args.cache_compression or "auto")
+    if codec == "zstd" and not zstd_available():
+        parser.error("Compression 'zstd' needs the 'zstandard' package.")
 
-def parse_arguments():
+    low, high = LEVEL_RANGES[codec]
+    level = args.cache_compression_level
+    if level is not None and not low <= level <= high:
+        parser.error(
+            f"Compression level of {codec} must be between {low} and {high}.")
+
+    if args.cache_dictionary is not None and codec != "zstd":
+        parser.error("Argument '--cache-dictionary' needs zstd compression.")
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
 
     # summary extraction arguments
@@ -113,9 +281,13 @@ def parse_arguments():
     )
     table_group.add_argument(
         '--number',
-        type=int,
+        type=_table_numbers,
         metavar='INDEX',
-        help='Index of the table to fetch (1-based). Required if --table is used.'
+        help=('Index of the table to fetch (1-based), comma separated ' +
+              'indexes (e.g. 1,3,5) or \'all\'. Required if --table or ' +
+              '--batch-mode table is used, with --batch it applies to ' +
+              'table jobs without a number.'
+              )
     )
     table_group.add_argument(
         '--first-row-is-header',
@@ -189,10 +361,325 @@ def parse_arguments():
         '--wait',
         type=float,
         metavar='TIME',
-        help='Wait TIME seconds before visiting next site when auto crawling.'
+        help=('Keep at least TIME seconds between requests on average ' +
+              'when auto crawling (shared by all concurrent fetches).'
+              )
+    )
+    statistics_group.add_argument(
+        '--concurrency',
+        type=int,
+        metavar='N',
+        help=('Number of pages fetched at once when auto crawling or in ' +
+              'batch mode (default: 4).'
+              )
+    )
+
+    statistics_group.add_argument(
+        '--workers',
+        type=int,
+        metavar='N',
+        help=('Parse pages in N separate processes when auto crawling ' +
+              '(default: parse in the fetching threads).'
+              )
+    )
+    statistics_group.add_argument(
+        '--max-pages',
+        type=int,
+        metavar='N',
+        help='Stop auto crawling after N pages.'
+    )
+    statistics_group.add_argument(
+        '--max-pages-per-depth',
+        type=int,
+        metavar='N',
+        help=('Visit at most N pages of every depth when auto crawling, ' +
+              'the first ones in the --priority order.'
+              )
+    )
+    statistics_group.add_argument(
+        '--priority',
+        type=str,
+        choices=PRIORITIES,
+        help=('Order of pages of every depth: bfs (order of discovery, ' +
+              'default) or inlinks (pages linked from more pages first).'
+              )
+    )
+    statistics_group.add_argument(
+        '--frontier-memory',
+        type=int,
+        metavar='N',
+        help=('Keep up to N titles of the next depth in memory, the rest ' +
+              'is spilled to disk (default: 100000).'
+              )
+    )
+    statistics_group.add_argument(
+        '--visited-set',
+        type=str,
+        choices=VISITED_SETS,
+        help=('Keep visited titles as strings (exact, default), 64-bit ' +
+              'hashes (hashed) or in a Bloom filter (bloom), which uses ' +
+              'the least memory but skips some unvisited pages.'
+              )
+    )
+    statistics_group.add_argument(
+        '--fp-rate',
+        type=float,
+        metavar='RATE',
+        help=('False positive rate of the Bloom filter, the chance that ' +
+              'an unvisited page is skipped (default: 0.001).'
+              )
+    )
+    statistics_group.add_argument(
+        '--shard',
+        type=parse_shard,
+        metavar='I/N',
+        help=('Crawl as shard I of N processes (counted from 0) sharing ' +
+              '--shard-dir. Every shard visits pages whose titles hash to ' +
+              'it and writes its own count shard.'
+              )
+    )
+    statistics_group.add_argument(
+        '--shard-dir',
+        type=str,
+        metavar='PATH',
+        help=('Directory shared by shards of one crawl (use a new one for ' +
+              'every crawl), links and count shards are exchanged in it.'
+              )
+    )
+    statistics_group.add_argument(
+        '--shard-timeout',
+        type=float,
+        metavar='SECONDS',
+        help=('Stop with an error when another shard shows no sign of ' +
+              'life for SECONDS while this one waits for it ' +
+              f'(default: {DEFAULT_SHARD_TIMEOUT:g}).'
+              )
+    )
+    statistics_group.add_argument(
+        '--checkpoint',
+        type=str,
+        metavar='PATH',
+        help=('Save crawl progress to PATH every time word counts are ' +
+              'written, so an interrupted crawl can be resumed. Level ' +
+              'files and frontier runs are kept in PATH.d.'
+              )
+    )
+    statistics_group.add_argument(
+        '--resume',
+        action='store_true',
+        help=('Continue the crawl saved in --checkpoint, without counting ' +
+              'already saved pages again.'
+              )
+    )
+    statistics_group.add_argument(
+        '--counts-store',
+        type=str,
+        choices=COUNTS_STORES,
+        help=('Where word counts are accumulated. \'sqlite\' keeps them in ' +
+              'word-counts.sqlite and exports word-counts.json at the end ' +
+              '(default: json).'
+              )
+    )
+    statistics_group.add_argument(
+        '--counts-batch',
+        type=int,
+        metavar='N',
+        help=('Write collected word counts once per N articles ' +
+              '(default: 20).'
+              )
+    )
+    statistics_group.add_argument(
+        '--term-index',
+        type=str,
+        metavar='PATH',
+        help=('Also keep counts of every article in a term index in PATH ' +
+              '(e.g. ./word-index.sqlite), see python3 -m src.term_index.'
+              )
+    )
+    statistics_group.add_argument(
+        '--merge-counts',
+        type=str,
+        nargs='+',
+        metavar='PATH',
+        help=('Merge count shards (or directories with them) and JSON ' +
+              'counts files into --merge-output.'
+              )
+    )
+    statistics_group.add_argument(
+        '--merge-output',
+        type=str,
+        metavar='PATH',
+        help=('File with merged counts (default: ./word-counts.json). ' +
+              'A name ending with .jsonl gives a count shard, which can ' +
+              'be merged again later.'
+              )
+    )
+
+    # batch arguments
+    batch_group = parser.add_argument_group('Batch Mode')
+    batch_group.add_argument(
+        '--batch',
+        type=str,
+        metavar='FILE',
+        help=('Process many phrases in one run. FILE (or \'-\' for stdin) ' +
+              'has one phrase per line or one JSON object per line, e.g. ' +
+              '{"mode": "table", "phrase": "Kanto", "number": 2}. Results ' +
+              'are printed in the input order.'
+              )
+    )
+    batch_group.add_argument(
+        '--batch-mode',
+        type=str,
+        choices=BATCH_MODES,
+        help='Mode used for plain phrase lines of --batch (default: summary).'
+    )
+
+    # network arguments
+    network_group = parser.add_argument_group('Network')
+    network_group.add_argument(
+        '--cache-dir',
+        type=str,
+        metavar='PATH',
+        help=('Keep fetched pages in an on-disk cache in PATH and ' +
+              'revalidate them with conditional requests.'
+              )
+    )
+    network_group.add_argument(
+        '--cache-ttl',
+        type=float,
+        metavar='SECONDS',
+        help=('Serve cached pages younger than SECONDS without asking the ' +
+              'server (default: 3600).'
+              )
+    )
+    network_group.add_argument(
+        '--cache-max-size',
+        type=float,
+        metavar='MB',
+        help='Evict least recently used pages when cache exceeds MB megabytes.'
+    )
+    network_group.add_argument(
+        '--cache-compression',
+        type=str,
+        choices=CODECS,
+        help=('Compress cached pages with zstd, gzip or not at all ' +
+              '(default: auto, zstd if installed, else gzip). Pages cached ' +
+              'with other settings stay readable.'
+              )
+    )
+    network_group.add_argument(
+        '--cache-compression-level',
+        type=int,
+        metavar='N',
+        help='Compression level of cached pages (default: 3 zstd, 6 gzip).'
+    )
+    network_group.add_argument(
+        '--cache-dictionary',
+        type=str,
+        metavar='PATH',
+        help=('zstd dictionary for cached pages, trained with ' +
+              '\'python3 -m src.compression\'. Pages cached with it can\'t ' +
+              'be read without it.'
+              )
+    )
+    network_group.add_argument(
+        '--api-url',
+        type=str,
+        metavar='URL',
+        help=('Fetch only article content through the MediaWiki API at URL ' +
+              '(e.g. https://bulbapedia.bulbagarden.net/w/api.php), the ' +
+              'crawler also resolves titles in batches with it.'
+              )
     )
+    network_group.add_argument(
+        '--redirect-map',
+        type=str,
+        metavar='PATH',
+        help=('Remember redirects in PATH, so links to a redirect go ' +
+              'straight to its target (default: redirects.jsonl in ' +
+              '--cache-dir if given).'
+              )
+    )
+    network_group.add_argument(
+        '--pool-size',
+        type=int,
+        metavar='N',
+        help='Number of kept-alive connections to the wiki (default: 10).'
+    )
+    network_group.add_argument(
+        '--connect-timeout',
+        type=float,
+        metavar='SECONDS',
+        help='Give up connecting to the wiki after SECONDS (default: 5).'
+    )
+    network_group.add_argument(
+        '--read-timeout',
+        type=float,
+        metavar='SECONDS',
+        help=('Give up waiting for the response data after SECONDS ' +
+              '(default: 30).'
+              )
+    )
+    network_group.add_argument(
+        '--retries',
+        type=int,
+        metavar='N',
+        help=('Retry failed requests (connection errors, 429 and 5xx) up to ' +
+              'N times (default: 3).'
+              )
+    )
+    network_group.add_argument(
+        '--backoff',
+        type=float,
+        metavar='SECONDS',
+        help=('Base of the exponential delay between retries, Retry-After ' +
+              'sent by the server is honored (default: 0.5).'
+              )
+    )
+
+    parser.add_argument(
+        '--corpus',
+        type=str,
+        metavar='PATH',
+        help=('Read articles offline from a packed corpus file (built with ' +
+              '\'python -m src.corpus\') or a directory of ' +
+              '\'<phrase>.html\' files instead of the wiki.'
+              )
+    )
+    parser.add_argument(
+        '--parser',
+        type=str,
+        choices=list(PARSER_BACKENDS),
+        help=('HTML parser used for articles. \'lxml\' and \'lxml.html\' ' +
+              'are faster than the default \'html.parser\'.'
+              )
+    )
+
+    # profiling arguments
+    profile_group = parser.add_argument_group('Profiling')
+    profile_group.add_argument(
+        '--profile',
+        action='store_true',
+        help=('Measure time of every stage (fetch, parse, tokenize, ...), ' +
+              'bytes fetched, pages/s and cache hit rate and print a summary.'
+              )
+    )
+    profile_group.add_argument(
+        '--profile-output',
+        type=str,
+        metavar='PATH',
+        help=('Also write the profile to PATH, in the Prometheus textfile ' +
+              'format if PATH ends with \'.prom\', as JSON otherwise.'
+              )
+    )
+
+    return parser
+
+
+def parse_arguments(argv: list[str] | None = None):
+    parser = build_parser()
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     validate_arguments(parser, args)
 
     return args
@@ -200,6 +687,9 @@ def parse_arguments():
 
 def main():
     args = parse_arguments()
+    # imported only after the arguments are valid, so --help and argument
+    # errors don't pay for the scraping stack
+    from src.wiki_manager import WikiManager
     manager = WikiManager(args)
     manager.handle_args()
 